@@ -0,0 +1,41 @@
+"""
+Compares handlers registered with `app.router.add_route` against the ones
+registered with the `@app.get` decorator.
+
+Both endpoints should perform the same since the decorator registers the
+original handler, run wrk against each of them:
+
+    ./wrk -t 1 -c 100 -d 10 -s misc/pipeline.lua http://localhost:8080/route
+    ./wrk -t 1 -c 100 -d 10 -s misc/pipeline.lua http://localhost:8080/get
+"""
+from japronto import Application
+
+
+app = Application()
+
+
+def route(request):
+    return request.Response(text='Hello world!')
+
+
+app.router.add_route('/route', route, method='GET')
+
+
+@app.get('/get')
+def get(request):
+    return request.Response(text='Hello world!')
+
+
+async def async_route(request):
+    return request.Response(text='Hello world!')
+
+
+app.router.add_route('/async_route', async_route, method='GET')
+
+
+@app.get('/async_get')
+async def async_get(request):
+    return request.Response(text='Hello world!')
+
+
+app.run()
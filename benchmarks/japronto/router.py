@@ -0,0 +1,57 @@
+"""
+Measures route matching latency as the number of routes grows.
+
+With the radix tree matcher the time to match the first, the middle and
+the last registered route should stay flat from 10 to 10,000 routes.
+
+    python benchmarks/japronto/router.py
+"""
+import argparse
+import timeit
+
+from japronto.router import Router
+
+
+class FakeRequest:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+
+
+def handler(request):
+    return request.Response(text='Hello world!')
+
+
+def make_matcher(count):
+    router = Router()
+    for i in range(count):
+        router.add_route('/api/v1/resource{}/{{id}}'.format(i), handler,
+                         methods=['GET'])
+
+    return router.get_matcher()
+
+
+def main():
+    argparser = argparse.ArgumentParser('router')
+    argparser.add_argument('-n', dest='number', type=int, default=100000)
+    args = argparser.parse_args()
+
+    print('{:>8} {:>10} {:>10} {:>10}'.format(
+        'routes', 'first', 'middle', 'last'))
+    for count in [10, 100, 1000, 10000]:
+        matcher = make_matcher(count)
+        timings = []
+        for i in [0, count // 2, count - 1]:
+            request = FakeRequest(
+                'GET', '/api/v1/resource{}/42'.format(i))
+            assert matcher.match_request(request)
+            seconds = timeit.timeit(
+                lambda: matcher.match_request(request), number=args.number)
+            timings.append(seconds / args.number * 1e9)
+
+        print('{:>8} {:>8.0f}ns {:>8.0f}ns {:>8.0f}ns'.format(
+            count, *timings))
+
+
+if __name__ == '__main__':
+    main()
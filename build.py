@@ -213,9 +213,6 @@ def get_parser():
     argparser.add_argument(
         '--disable-reaper', dest='enable_reaper', const=False,
         action='store_const', default=True)
-    argparser.add_argument(
-        '--disable-response-cache', dest='enable_response_cache', const=False,
-        action='store_const', default=True)
     argparser.add_argument(
         '--coverage', dest='coverage', const=True,
         action='store_const', default=False)
@@ -34,7 +34,10 @@ def basic(request):
 # would yield `mime_type` set to `'text/plain'`, `encoding` set to `'utf-8'`,
 # `body` set to `b'J\xc3\xa1'` and `text` set to `'Já'`.
 # `form` and `files` attributes are dictionaries respectively used for HTML forms and
-# HTML file uploads. The `json` helper property will try to decode `body` as a
+# HTML file uploads. Every file has `name`, `type` and `file`, a temporary
+# file that is moved to disk when it's large. Routes registered with
+# `stream=True` can use `await request.read_form()` to parse them as the
+# body arrives. The `json` helper property will try to decode `body` as a
 # JSON document and give you resulting Python data type.
 @app.get('/body')
 def body(request):
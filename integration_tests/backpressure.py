@@ -0,0 +1,25 @@
+import sys
+
+
+from japronto.app import Application
+
+
+write_buffer_settings = {'high': int(sys.argv[1])} if len(sys.argv) > 1 else None
+
+app = Application(write_buffer_settings=write_buffer_settings)
+
+body = b'x' * 1024 * 1024
+
+
+@app.get('/big')
+def big(request):
+    return request.Response(body=body)
+
+
+@app.get('/async/big')
+async def async_big(request):
+    return request.Response(body=body)
+
+
+if __name__ == '__main__':
+    app.run()
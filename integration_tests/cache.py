@@ -0,0 +1,52 @@
+import asyncio
+from collections import Counter
+
+from japronto.app import Application
+
+
+app = Application(response_cache_settings={'max_entries': 4})
+calls = Counter()
+
+
+@app.get('/cached/{id}', cache_ttl=60)
+def cached(request):
+    calls[request.path] += 1
+
+    return request.Response(json={
+        'id': request.match_dict['id'], 'calls': calls[request.path]})
+
+
+@app.get('/async', cache_ttl=60)
+async def cached_async(request):
+    await asyncio.sleep(0.01)
+    calls[request.path] += 1
+
+    return request.Response(json={'calls': calls[request.path]})
+
+
+@app.get('/vary', cache_ttl=60, cache_vary=['Accept'])
+def vary(request):
+    calls[request.headers.get('Accept')] += 1
+
+    return request.Response(text=request.headers.get('Accept', ''))
+
+
+@app.get('/error', cache_ttl=60)
+def error(request):
+    calls[request.path] += 1
+    if calls[request.path] == 1:
+        1 / 0
+
+    return request.Response(json={'calls': calls[request.path]})
+
+
+@app.get('/stats')
+def stats(request):
+    cache = request.app.response_cache
+
+    return request.Response(json={
+        'hits': cache.hits, 'misses': cache.misses, 'entries': len(cache)})
+
+
+if __name__ == '__main__':
+    app.run()
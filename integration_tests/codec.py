@@ -0,0 +1,44 @@
+import json
+from collections import Counter
+
+from japronto.app import Application
+
+
+calls = Counter()
+
+
+def encoder(obj):
+    calls['encode'] += 1
+
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def decoder(data):
+    calls[type(data).__name__] += 1
+
+    return json.loads(data)
+
+
+app = Application(json_encoder=encoder, json_decoder=decoder)
+# doesn't change the encoder of the application being served
+Application()
+
+
+@app.post('/echo')
+def echo(request):
+    return request.Response(json={'echo': request.json})
+
+
+@app.get('/text')
+def text(request):
+    return request.Response(json={'text': 'zażółć'}, encoding='iso-8859-2')
+
+
+@app.get('/calls')
+def stats(request):
+    return request.Response(text=json.dumps(calls))
+
+
+if __name__ == '__main__':
+    app.run()
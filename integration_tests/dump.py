@@ -1,5 +1,6 @@
 from base64 import b64encode
 from asyncio import sleep as async_sleep
+from contextvars import ContextVar
 from japronto.app import Application
 
 app = Application()
@@ -53,7 +54,70 @@ async def adump(request):
     sleep = float(request.query.get('sleep', 0))
     await async_sleep(sleep)
 
-    return await dump(request)
+    return dump(request)
+
+variable = ContextVar('variable', default='unset')
+
+@app.get('/context/get')
+def get_context(request):
+    return request.Response(text=variable.get())
+
+@app.get('/context/set')
+async def set_context(request):
+    variable.set(request.query['value'])
+    if 'sleep' in request.query:
+        await async_sleep(float(request.query['sleep']))
+
+    return request.Response(text=variable.get())
+
+@app.get('/header/{name}')
+def header(request):
+    name = request.match_dict['name']
+
+    return request.Response(json={
+        'get_header': request.get_header(name),
+        'multi_headers': request.multi_headers.get(name),
+        'headers': request.headers.get(name.title()),
+        'getall': request.multi_headers.getall(name),
+        'cookies': request.cookies})
+
+@app.route('/query', methods=['GET', 'POST'])
+def query(request):
+    return request.Response(json={
+        'query_string': request.query_string,
+        'query': request.query.multi_items(),
+        'form': request.form and request.form.multi_items(),
+        'query_dict': request.query,
+        'form_dict': request.form})
+
+computed = []
+
+def token(request):
+    computed.append(request.path)
+    return request.get_header('Authorization')
+
+class Greeter:
+    def __call__(self, request, name):
+        return 'Hello {} from {}'.format(name, request.path)
+
+def has_header(request, name):
+    return request.get_header(name) is not None
+
+app.extend_request(token, property=True)
+app.extend_request(Greeter(), name='greet')
+app.extend_request(has_header)
+
+@app.get('/extension')
+def extension(request):
+    computed.clear()
+    tokens = [request.token, request.token]
+
+    return request.Response(json={
+        'tokens': tokens,
+        'computed': len(computed),
+        'greet': request.greet('world'),
+        'has_header': request.has_header('Authorization'),
+        'bound': request.has_header.__self__ is request})
 
 # sigsegv-crash-process when None class is assinged
 # app.add_error_handler(None, dump)
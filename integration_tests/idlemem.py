@@ -0,0 +1,89 @@
+"""Opens many keep-alive connections, makes a request on each and reports
+how much the resident memory of the worker grew per connection once they
+are all idle.
+
+    python integration_tests/idlemem.py [connections] [requests]
+
+Connections come from different loopback addresses to not run out of
+ephemeral ports, the open files limit has to allow for them in both
+processes. Every connection makes `requests` pipelined requests so
+buffers used by pipelining are counted as well."""
+
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+import integration_tests.common  # noqa
+import integration_tests.idlerun  # noqa
+
+from misc import client  # noqa
+
+
+def setup():
+    subprocess.check_call([
+        sys.executable, 'build.py', '--dest', '.test/idlemem',
+        '--kit', 'platform'])
+
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    # connections are kept open for the whole run
+    return integration_tests.common.start_server([
+        'integration_tests/reaper.py', '1', '3600'],
+        path='.test/idlemem', sanitize=False, return_process=True)
+
+
+def get_rss(process):
+    workers = process.children()
+
+    return sum(p.memory_info().rss for p in workers or [process])
+
+
+def make_requests(connections, requests):
+    for sock in connections:
+        sock.setblocking(True)
+        sock.sendall(b'GET / HTTP/1.1\r\n\r\n' * requests)
+        for _ in range(requests):
+            client.Response(sock)
+
+
+def run(process, count, requests):
+    time.sleep(1)
+    start_rss = get_rss(process)
+
+    connections = integration_tests.idlerun.open_connections(count)
+    time.sleep(1)
+    connected_rss = get_rss(process)
+
+    make_requests(connections, requests)
+    time.sleep(1)
+    idle_rss = get_rss(process)
+
+    print('{} connections, RSS {:.1f}MB before, {:.1f}MB connected, '
+          '{:.1f}MB idle'.format(
+              count, start_rss / 2 ** 20, connected_rss / 2 ** 20,
+              idle_rss / 2 ** 20))
+    print('per idle connection {:.0f} bytes, {:.0f} after connecting'.format(
+        (idle_rss - start_rss) / count, (connected_rss - start_rss) / count))
+
+    for sock in connections:
+        sock.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    server, process = setup()
+    try:
+        run(process, count, requests)
+    finally:
+        server.terminate()
+        assert server.wait() == 0
+
+
+if __name__ == '__main__':
+    main()
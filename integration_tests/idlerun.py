@@ -0,0 +1,120 @@
+"""Keeps many idle keep-alive connections open against the reaper server and
+measures the latency of requests on an active connection while the reaper
+runs, then how long it takes to reap the idle ones.
+
+    python integration_tests/idlerun.py [connections] [idle_timeout]
+
+Every connection takes a file descriptor in both processes so the open files
+limit has to allow for it. Connections come from different loopback
+addresses to not run out of ephemeral ports."""
+
+import resource
+import selectors
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+import integration_tests.common  # noqa
+
+from misc import client  # noqa
+
+
+PER_ADDRESS = 20000
+
+
+def setup(idle_timeout):
+    subprocess.check_call([
+        sys.executable, 'build.py', '--dest', '.test/idlerun',
+        '--kit', 'platform'])
+
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    return integration_tests.common.start_server([
+        'integration_tests/reaper.py', '0.1', str(idle_timeout)],
+        path='.test/idlerun', sanitize=False)
+
+
+def open_connections(count):
+    connections = []
+    for i in range(count):
+        sock = socket.socket()
+        sock.bind(('127.0.{}.{}'.format(*divmod(i // PER_ADDRESS + 2, 256)), 0))
+        sock.connect(('127.0.0.1', 8080))
+        sock.setblocking(False)
+        connections.append(sock)
+        if not i % 50:
+            # let the server accept before the listen backlog overflows
+            time.sleep(.005)
+
+    return connections
+
+
+def measure_latency(duration):
+    sock = socket.create_connection(('127.0.0.1', 8080))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    latencies = []
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        start = time.monotonic()
+        sock.sendall(b'GET / HTTP/1.1\r\n\r\n')
+        client.Response(sock)
+        latencies.append(time.monotonic() - start)
+        time.sleep(.001)
+    sock.close()
+
+    latencies.sort()
+
+    return latencies[len(latencies) // 2], \
+        latencies[int(len(latencies) * .99)], latencies[-1]
+
+
+def wait_reaped(connections, timeout):
+    selector = selectors.DefaultSelector()
+    for sock in connections:
+        selector.register(sock, selectors.EVENT_READ)
+
+    open_count = len(connections)
+    end = time.monotonic() + timeout
+    while open_count and time.monotonic() < end:
+        for key, _ in selector.select(timeout=.1):
+            selector.unregister(key.fileobj)
+            key.fileobj.close()
+            open_count -= 1
+
+    return open_count
+
+
+def run(count, idle_timeout):
+    start = time.monotonic()
+    connections = open_connections(count)
+    print('opened {} connections in {:.2f}s'.format(
+        count, time.monotonic() - start))
+
+    median, p99, worst = measure_latency(idle_timeout / 2)
+    print('latency median {:.3f}ms, p99 {:.3f}ms, max {:.3f}ms'.format(
+        median * 1000, p99 * 1000, worst * 1000))
+
+    remaining = wait_reaped(
+        connections, idle_timeout + 10 - (time.monotonic() - start))
+    print('reaped {} connections {:.2f}s after opening, {} left'.format(
+        count - remaining, time.monotonic() - start, remaining))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    idle_timeout = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    server = setup(idle_timeout)
+    try:
+        run(count, idle_timeout)
+    finally:
+        server.terminate()
+        assert server.wait() == 0
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+from japronto.app import Application
+
+
+app = Application(max_header_size=1024, max_headers=10, max_body_size=1024)
+
+
+@app.route('/')
+def hello(request):
+    return request.Response(text='Hello')
+
+
+@app.post('/echo')
+def echo(request):
+    return request.Response(body=request.body or b'')
+
+
+@app.post('/upload', max_body_size=1024 * 1024)
+def upload(request):
+    return request.Response(text=str(len(request.body)))
+
+
+# anything a Content-Length can hold
+@app.post('/unlimited', max_body_size=2 ** 63)
+def unlimited(request):
+    return request.Response(text=str(len(request.body)))
+
+
+@app.post('/stream', stream=True)
+async def stream(request):
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+
+    return request.Response(text=str(size))
+
+
+if __name__ == '__main__':
+    app.run()
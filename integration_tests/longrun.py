@@ -16,7 +16,7 @@ from misc import client  # noqa
 def setup():
     subprocess.check_call([
         sys.executable, 'build.py', '--dest', '.test/longrun',
-        '--kit', 'platform', '--disable-response-cache'])
+        '--kit', 'platform'])
 
     os.putenv('MALLOC_TRIM_THRESHOLD_', '0')
     server = integration_tests.common.start_server(
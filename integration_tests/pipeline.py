@@ -0,0 +1,28 @@
+import asyncio
+import sys
+
+
+from japronto.app import Application
+
+
+app = Application(max_pipeline_depth=int(sys.argv[1]))
+
+
+@app.get('/sync/{n}')
+def sync(request):
+    return request.Response(text=request.match_dict['n'])
+
+
+@app.get('/async/{n}')
+async def async_(request):
+    return request.Response(text=request.match_dict['n'])
+
+
+@app.get('/sleep/{n}')
+async def sleep(request):
+    await asyncio.sleep(int(request.match_dict['n']) % 3 / 1000)
+    return request.Response(text=request.match_dict['n'])
+
+
+if __name__ == '__main__':
+    app.run()
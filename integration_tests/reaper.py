@@ -3,10 +3,15 @@ import sys
 from japronto.app import Application
 
 reaper_settings = {
-    'check_interval': int(sys.argv[1]),
-    'idle_timeout': int(sys.argv[2])
+    'check_interval': float(sys.argv[1]),
+    'idle_timeout': float(sys.argv[2])
 }
 
+# other timeouts as name=seconds
+for arg in sys.argv[3:]:
+    name, value = arg.split('=')
+    reaper_settings[name] = float(value)
+
 app = Application(reaper_settings=reaper_settings)
 
 if __name__ == '__main__':
@@ -0,0 +1,21 @@
+import sys
+
+from japronto.app import Application
+from japronto.response.cresponse import Response
+
+
+app = Application(date_header=True, server_header='japronto')
+app.router.add_static('/static', sys.argv[1])
+app.router.add_static_response('/health', Response(json={'status': 'ok'}))
+app.router.add_static_response(
+    '/robots.txt', Response(text='User-agent: *\nDisallow: /\n'),
+    method='GET')
+
+
+@app.get('/')
+def slash(request):
+    return request.Response()
+
+
+if __name__ == '__main__':
+    app.run()
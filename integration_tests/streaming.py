@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+
+from japronto.app import Application
+
+
+app = Application()
+
+# routes taking bodies over the default limit of 1MiB
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+@app.post('/upload', stream=True, max_body_size=MAX_BODY_SIZE)
+async def upload(request):
+    digest = hashlib.md5()
+    length = 0
+    async for chunk in request.stream():
+        digest.update(chunk)
+        length += len(chunk)
+        # a handler slower than the client
+        await asyncio.sleep(0.001)
+
+    return request.Response(json={'length': length, 'md5': digest.hexdigest()})
+
+
+@app.post('/reject', stream=True, max_body_size=MAX_BODY_SIZE)
+def reject(request):
+    return request.Response(code=413, text='Too large')
+
+
+@app.post('/buffered')
+async def buffered(request):
+    body = await request.stream().read()
+
+    return request.Response(json={'length': len(body)})
+
+
+def describe_form(form, files):
+    return {
+        'form': form.multi_items() if form is not None else None,
+        'files': [
+            [name, f.name, len(f.body), hashlib.md5(f.body).hexdigest()]
+            for name, f in files.multi_items()] if files is not None else None}
+
+
+@app.post('/form', stream=True, max_body_size=MAX_BODY_SIZE)
+async def stream_form(request):
+    form, files = await request.read_form()
+
+    return request.Response(json=describe_form(form, files))
+
+
+@app.post('/buffered-form', max_body_size=MAX_BODY_SIZE)
+def buffered_form(request):
+    return request.Response(json=describe_form(request.form, request.files))
+
+
+async def chunks(count, size):
+    for i in range(count):
+        yield bytes([ord('a') + i % 26]) * size
+        await asyncio.sleep(0)
+
+
+@app.get('/download')
+def download(request):
+    count = int(request.query.get('count', 4))
+    size = int(request.query.get('size', 1024))
+
+    return request.Response(body=chunks(count, size))
+
+
+async def broken_chunks():
+    yield b'partial'
+    raise RuntimeError('broken')
+
+
+@app.get('/broken')
+def broken(request):
+    return request.Response(body=broken_chunks())
+
+
+if __name__ == '__main__':
+    app.run()
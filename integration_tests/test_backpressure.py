@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from misc import client
+import integration_tests.common
+
+
+pytestmark = pytest.mark.needs_build
+
+
+@pytest.fixture(autouse=True, scope='module')
+def server_process():
+    server, process = integration_tests.common.start_server([
+        'integration_tests/backpressure.py', str(64 * 1024)], path='.test',
+        return_process=True)
+
+    yield process
+
+    server.terminate()
+    assert server.wait() == 0
+
+
+def worker_rss(process):
+    return sum(p.memory_info().rss for p in process.children())
+
+
+@pytest.mark.parametrize('path', ['/big', '/async/big'])
+def test_slow_reader(server_process, path):
+    count = 200
+    rss_before = worker_rss(server_process)
+
+    connection = client.Connection('localhost:8080')
+    for _ in range(count):
+        connection.putrequest('GET', path)
+        connection.endheaders()
+
+    # a reader that doesn't read would have 200MB of responses buffered
+    time.sleep(1)
+    assert worker_rss(server_process) - rss_before < 32 * 1024 * 1024
+
+    for _ in range(count):
+        response = connection.getresponse()
+        assert response.status == 200
+        assert len(response.body) == 1024 * 1024
+
+    connection.close()
@@ -0,0 +1,99 @@
+import pytest
+
+from misc import client
+import integration_tests.common
+
+
+pytestmark = pytest.mark.needs_build
+
+
+@pytest.fixture(autouse=True, scope='module')
+def server():
+    server = integration_tests.common.start_server(
+        'integration_tests/cache.py', path='.test')
+
+    yield server
+
+    server.terminate()
+    assert server.wait() == 0
+
+
+@pytest.fixture()
+def connection():
+    connection = client.Connection('localhost:8080')
+
+    yield connection
+
+    connection.close()
+
+
+def get(connection, path, headers=None):
+    connection.request('GET', path, headers=headers)
+
+    return connection.getresponse()
+
+
+def test_hit(connection):
+    stats = get(connection, '/stats').json
+
+    first = get(connection, '/cached/1')
+    assert first.json == {'id': '1', 'calls': 1}
+    second = get(connection, '/cached/1')
+    assert second.json == {'id': '1', 'calls': 1}
+    assert second.headers == first.headers
+
+    assert get(connection, '/cached/1').json['calls'] == 1
+    assert get(connection, '/cached/2').json == {'id': '2', 'calls': 1}
+
+    after = get(connection, '/stats').json
+    assert after['hits'] - stats['hits'] == 2
+    assert after['misses'] - stats['misses'] == 2
+
+
+def test_async(connection):
+    assert get(connection, '/async').json == {'calls': 1}
+    assert get(connection, '/async').json == {'calls': 1}
+
+
+def test_pipeline(connection):
+    get(connection, '/cached/3')
+
+    paths = ['/cached/3', '/async', '/cached/3', '/cached/4', '/cached/3']
+    for path in paths:
+        connection.request('GET', path)
+
+    for path in paths:
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.json['calls'] == 1
+        if path != '/async':
+            assert response.json['id'] == path.split('/')[-1]
+
+    # the server keeps at most 4 responses
+    assert get(connection, '/stats').json['entries'] <= 4
+
+
+def test_vary(connection):
+    assert get(connection, '/vary', [('Accept', 'text/html')]).text \
+        == 'text/html'
+    assert get(connection, '/vary', [('Accept', 'text/plain')]).text \
+        == 'text/plain'
+    assert get(connection, '/vary', [('Accept', 'text/html')]).text \
+        == 'text/html'
+
+
+def test_error_not_cached(connection):
+    assert get(connection, '/error').status == 500
+    assert get(connection, '/error').json == {'calls': 2}
+    assert get(connection, '/error').json == {'calls': 2}
+
+
+def test_http10(connection):
+    get(connection, '/cached/5')
+
+    connection.putline('GET /cached/5 HTTP/1.0')
+    connection.putline()
+    response = client.Response(connection.sock)
+
+    # rendered for HTTP/1.1 keep-alive, so not served from the cache
+    assert response.json['calls'] == 2
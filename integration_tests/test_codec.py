@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from misc import client
+import integration_tests.common
+
+
+pytestmark = pytest.mark.needs_build
+
+
+@pytest.fixture(autouse=True, scope='module')
+def server():
+    server = integration_tests.common.start_server(
+        'integration_tests/codec.py', path='.test')
+
+    yield server
+
+    server.terminate()
+    assert server.wait() == 0
+
+
+@pytest.fixture()
+def connection():
+    connection = client.Connection('localhost:8080')
+
+    yield connection
+
+    connection.close()
+
+
+def calls(connection):
+    connection.request('GET', '/calls')
+
+    return json.loads(connection.getresponse().text)
+
+
+def test_bytes(connection):
+    before = calls(connection)
+
+    connection.request(
+        'POST', '/echo', body='{"a": [1, "ą"]}'.encode('utf-8'),
+        headers=[('Content-Type', 'application/json')])
+    response = connection.getresponse()
+
+    assert response.headers['Content-Type'] == \
+        'application/json; charset=utf-8'
+    assert response.body == '{"echo":{"a":[1,"ą"]}}'.encode('utf-8')
+
+    after = calls(connection)
+    assert after['encode'] - before.get('encode', 0) == 1
+    assert after['bytes'] - before.get('bytes', 0) == 1
+
+
+def test_charset(connection):
+    before = calls(connection)
+
+    connection.request(
+        'POST', '/echo', body='{"a": "ą"}'.encode('iso-8859-2'),
+        headers=[('Content-Type', 'application/json; charset=iso-8859-2')])
+
+    assert connection.getresponse().json == {'echo': {'a': 'ą'}}
+    assert calls(connection)['str'] - before.get('str', 0) == 1
+
+
+def test_encoding(connection):
+    connection.request('GET', '/text')
+    response = connection.getresponse()
+
+    assert response.headers['Content-Type'] == \
+        'application/json; charset=iso-8859-2'
+    assert json.loads(response.body.decode('iso-8859-2')) == \
+        {'text': 'zażółć'}
@@ -0,0 +1,116 @@
+import socket
+
+import pytest
+
+from misc import client
+import integration_tests.common
+
+
+pytestmark = pytest.mark.needs_build
+
+
+@pytest.fixture(autouse=True, scope='module')
+def server():
+    server = integration_tests.common.start_server(
+        'integration_tests/limits.py', path='.test')
+
+    yield server
+
+    server.terminate()
+    assert server.wait() == 0
+
+
+@pytest.fixture()
+def sock():
+    sock = socket.create_connection(('localhost', 8080))
+
+    yield sock
+
+    sock.close()
+
+
+def request(sock, data):
+    sock.sendall(data)
+
+    return client.Response(sock)
+
+
+def test_within_limits(sock):
+    response = request(
+        sock, b'POST /echo HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello')
+    assert response.status == 200
+    assert response.body == b'hello'
+
+    response = request(sock, b'GET / HTTP/1.1\r\n\r\n')
+    assert response.status == 200
+
+
+def test_body_too_large(sock):
+    # answered without the body ever being sent
+    response = request(
+        sock, b'POST /echo HTTP/1.1\r\nContent-Length: 1025\r\n\r\n')
+    assert response.status == 413
+    assert response.headers['Connection'] == 'close'
+    assert client.readall(sock) == b''
+
+
+@pytest.mark.parametrize('path', ['/echo', '/unlimited'])
+def test_huge_content_length(sock, path):
+    # overflows a long and is never waited for
+    response = request(
+        sock, b'POST ' + path.encode('ascii') + b' HTTP/1.1\r\n'
+        b'Content-Length: 18446744073709551614\r\n\r\n')
+    assert response.status == 413
+
+
+def test_route_limit(sock):
+    body = b'x' * 100000
+    response = request(
+        sock, b'POST /upload HTTP/1.1\r\nContent-Length: 100000\r\n\r\n' + body)
+    assert response.status == 200
+    assert response.body == b'100000'
+
+    response = request(
+        sock, b'POST /upload HTTP/1.1\r\n'
+        b'Content-Length: 1048577\r\n\r\n')
+    assert response.status == 413
+
+
+@pytest.mark.parametrize('path', ['/echo', '/stream'])
+def test_chunked_too_large(sock, path):
+    head = 'POST {} HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n' \
+        .format(path).encode('ascii')
+    response = request(
+        sock, head + b'200\r\n' + b'x' * 512 + b'\r\n'
+        b'200\r\n' + b'x' * 512 + b'\r\n'
+        b'1\r\nx\r\n')
+    assert response.status == 413
+
+
+def test_chunked_within_limit(sock):
+    response = request(
+        sock, b'POST /stream HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+        b'200\r\n' + b'x' * 512 + b'\r\n0\r\n\r\n')
+    assert response.status == 200
+    assert response.body == b'512'
+
+
+def test_too_many_headers(sock):
+    headers = b''.join(
+        'X-Header-{}: {}\r\n'.format(i, i).encode('ascii') for i in range(11))
+    response = request(sock, b'GET / HTTP/1.1\r\n' + headers + b'\r\n')
+    assert response.status == 431
+    assert response.headers['Connection'] == 'close'
+
+
+def test_headers_too_large(sock):
+    # rejected before the end of the headers arrives
+    response = request(
+        sock, b'GET / HTTP/1.1\r\nX-Large: ' + b'x' * 2048)
+    assert response.status == 431
+    assert client.readall(sock) == b''
+
+
+def test_malformed_headers(sock):
+    response = request(sock, b'GET / HTTP/1.1\r\nX-Broken\r\n\r\n')
+    assert response.status == 400
@@ -0,0 +1,41 @@
+import pytest
+
+from misc import client
+import integration_tests.common
+
+
+pytestmark = pytest.mark.needs_build
+
+
+@pytest.fixture(autouse=True, scope='module', params=[1, 10, 128])
+def server(request):
+    server = integration_tests.common.start_server([
+        'integration_tests/pipeline.py', str(request.param)], path='.test')
+
+    yield server
+
+    server.terminate()
+    assert server.wait() == 0
+
+
+@pytest.fixture(scope='function')
+def connection():
+    conn = client.Connection('localhost:8080')
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize('prefixes', [
+    ['/sync'], ['/async'], ['/sleep'], ['/sync', '/async', '/sleep']
+], ids=['sync', 'async', 'sleep', 'mixed'])
+def test_pipeline(connection, prefixes):
+    count = 1000
+
+    for i in range(count):
+        connection.putrequest('GET', '{}/{}'.format(prefixes[i % len(prefixes)], i))
+        connection.endheaders()
+
+    for i in range(count):
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.text == str(i)
@@ -10,18 +10,21 @@ import integration_tests.common
 pytestmark = pytest.mark.needs_build
 
 
-@pytest.fixture(scope='function', params=[2, 3, 4])
+@pytest.fixture(
+    scope='function', params=[(1, 2), (1, 3), (1, 4), (.1, .5)],
+    ids=['2', '3', '4', 'subsecond'])
 def get_connections_and_wait(request):
+    check_interval, idle_timeout = request.param
     server, process = integration_tests.common.start_server([
-        'integration_tests/reaper.py', '1', str(request.param)], path='.test',
-        return_process=True)
+        'integration_tests/reaper.py', str(check_interval), str(idle_timeout)],
+        path='.test', return_process=True)
 
     def connection_num():
         return len(
             set(c.fd for c in process.connections()) |
             set(c.fd for p in process.children() for c in p.connections()))
 
-    yield connection_num, partial(time.sleep, request.param)
+    yield connection_num, partial(time.sleep, idle_timeout)
 
     server.terminate()
     assert server.wait() == 0
@@ -58,3 +61,90 @@ def test_request(get_connections_and_wait):
     time.sleep(1)
 
     assert get_connections() == 1
+
+
+@pytest.fixture(scope='module')
+def timeouts_server():
+    server = integration_tests.common.start_server([
+        'integration_tests/reaper.py', '.1', '10',
+        'header_timeout=1', 'body_timeout=1'], path='.test')
+
+    yield server
+
+    server.terminate()
+    assert server.wait() == 0
+
+
+def is_closed(sock):
+    sock.setblocking(False)
+    try:
+        while sock.recv(65536):
+            pass
+    except BlockingIOError:
+        return False
+    except ConnectionResetError:
+        pass
+
+    return True
+
+
+def trickle(sock, data, interval):
+    for b in data:
+        if is_closed(sock):
+            return False
+        sock.sendall(bytes([b]))
+        time.sleep(interval)
+
+    return True
+
+
+def test_slow_headers(timeouts_server):
+    conn = client.Connection('localhost:8080')
+    sock = conn.maybe_connect()
+
+    # reading the headers takes longer than header_timeout even though
+    # every read is well within it
+    assert not trickle(sock, b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n', .3)
+
+    conn.close()
+
+
+def test_trickled_headers(timeouts_server):
+    conn = client.Connection('localhost:8080')
+    sock = conn.maybe_connect()
+
+    # parsing continues where the previous read left off
+    assert trickle(sock, b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n', .001)
+    assert client.Response(sock).status == 404
+
+    conn.close()
+
+
+def test_slow_body(timeouts_server):
+    conn = client.Connection('localhost:8080')
+    sock = conn.maybe_connect()
+    sock.sendall(b'POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\n')
+
+    # body_timeout is between reads
+    assert trickle(sock, b'x' * 8, .3)
+    assert not is_closed(sock)
+
+    time.sleep(1.5)
+
+    assert is_closed(sock)
+
+    conn.close()
+
+
+def test_keepalive(timeouts_server):
+    conn = client.Connection('localhost:8080')
+    conn.request('GET', '/')
+    assert conn.getresponse().status == 404
+
+    time.sleep(2)
+
+    # keepalive_timeout defaults to idle_timeout
+    conn.request('GET', '/')
+    assert conn.getresponse().status == 404
+
+    conn.close()
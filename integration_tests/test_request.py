@@ -356,3 +356,130 @@ def test_async_pipeline(requests):
         assert json_body['query_string'] == request['query_string']
 
     connection.close()
+
+
+def test_async_recycled(connect):
+    # requests kept by suspended coroutine handlers are recycled, every one
+    # has to see only its own data
+    connection = connect()
+    requests = [
+        (str(i), 'x' * (i * 97 % 1500 + 1), b'b' * (i * 131 % 2000 + 1))
+        for i in range(30)]
+
+    for i, (param, header, body) in enumerate(requests):
+        connection.putrequest(
+            'GET', '/async/dump/{}/p'.format(param),
+            'sleep=0.01' if i % 3 else None)
+        connection.putheader('X-Pad', header)
+        connection.putheader('Content-Length', str(len(body)))
+        connection.endheaders(body)
+
+    for param, header, body in requests:
+        json_body = connection.getresponse().json
+        assert json_body['match_dict'] == {'p1': param, 'p2': 'p'}
+        assert json_body['headers']['X-Pad'] == header
+        assert base64.b64decode(json_body['body']) == body
+
+    connection.close()
+
+
+def test_context(connect):
+    # coroutine handlers run in a copy of the context whether they suspend
+    # or not, nothing they set is seen by later requests
+    connection = connect()
+
+    for value, query_string in [('a', 'value=a'), ('b', 'value=b&sleep=0.01')]:
+        connection.request('GET', '/context/get')
+        assert connection.getresponse().text == 'unset'
+
+        connection.request('GET', '/context/set', query_string)
+        assert connection.getresponse().text == value
+
+        connection.request('GET', '/context/get')
+        assert connection.getresponse().text == 'unset'
+
+    connection.close()
+
+
+def test_header(connect):
+    connection = connect()
+    connection.putrequest('GET', '/header/x-forwarded-for')
+    connection.putheader('X-Forwarded-For', '10.0.0.1')
+    connection.putheader('Cookie', 'a=1')
+    connection.putheader('x-forwarded-for', '10.0.0.2')
+    connection.putheader('cookie', 'b=2')
+    connection.endheaders()
+    json_body = connection.getresponse().json
+
+    # the last of repeated headers wins everywhere
+    assert json_body['get_header'] == '10.0.0.2'
+    assert json_body['multi_headers'] == '10.0.0.2'
+    assert json_body['headers'] == '10.0.0.2'
+    assert json_body['getall'] == ['10.0.0.1', '10.0.0.2']
+    assert json_body['cookies'] == {'a': '1', 'b': '2'}
+
+    connection.request('GET', '/header/Authorization')
+    json_body = connection.getresponse().json
+
+    assert json_body['get_header'] is None
+    assert json_body['multi_headers'] is None
+    assert json_body['headers'] is None
+    assert json_body['getall'] == []
+    assert json_body['cookies'] == {}
+
+    connection.close()
+
+
+def test_extension(connect):
+    connection = connect()
+    connection.request(
+        'GET', '/extension', headers=[('Authorization', 'secret')])
+    json_body = connection.getresponse().json
+
+    # properties are computed once per request
+    assert json_body == {
+        'tokens': ['secret', 'secret'], 'computed': 1,
+        'greet': 'Hello world from /extension', 'has_header': True,
+        'bound': True}
+
+    connection.request('GET', '/extension')
+    json_body = connection.getresponse().json
+
+    assert json_body['tokens'] == [None, None]
+    assert json_body['computed'] == 1
+    assert json_body['has_header'] is False
+
+    connection.close()
+
+
+def test_query(connect):
+    connection = connect()
+    connection.putline('GET /query?a=1&b=x+y&a=%26%3D&c=&d=%C5%BC HTTP/1.1')
+    connection.putline()
+    json_body = connection.getresponse().json
+
+    assert json_body['query_string'] == 'a=1&b=x+y&a=&=&c=&d=ż'
+    assert json_body['query'] == \
+        [['a', '1'], ['b', 'x y'], ['a', '&='], ['d', 'ż']]
+    assert json_body['query_dict'] == {'a': '&=', 'b': 'x y', 'd': 'ż'}
+    assert json_body['form'] is None
+
+    connection.request(
+        'POST', '/query', body=b'a=1&a=2&b=%C5%BC',
+        headers=[('Content-Type', 'application/x-www-form-urlencoded')])
+    json_body = connection.getresponse().json
+
+    assert json_body['query'] == []
+    assert json_body['form'] == [['a', '1'], ['a', '2'], ['b', 'ż']]
+    assert json_body['form_dict'] == {'a': '2', 'b': 'ż'}
+
+    connection.request(
+        'POST', '/query', body=b'a=\xbf%E9&b=x+y',
+        headers=[(
+            'Content-Type',
+            'application/x-www-form-urlencoded; charset=ISO-8859-1')])
+    json_body = connection.getresponse().json
+
+    assert json_body['form'] == [['a', '¿é'], ['b', 'x y']]
+
+    connection.close()
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import socket
+import time
+from email.utils import parsedate_to_datetime
+
+import pytest
+
+from misc import client
+import integration_tests.common
+
+
+pytestmark = pytest.mark.needs_build
+
+
+@pytest.fixture(scope='module')
+def directory(tmpdir_factory):
+    directory = tmpdir_factory.mktemp('static')
+    directory.join('index.html').write('<h1>Hello</h1>')
+    directory.mkdir('img').join('logo.png').write_binary(os.urandom(1024 * 1024))
+    directory.join('empty.txt').write('')
+    # larger than the socket buffers
+    directory.join('large.bin').write_binary(os.urandom(16 * 1024 * 1024))
+    tmpdir_factory.getbasetemp().join('secret.txt').write('secret')
+
+    return directory
+
+
+@pytest.fixture(autouse=True, scope='module')
+def server(directory):
+    server = integration_tests.common.start_server(
+        ['integration_tests/static.py', str(directory)], path='.test')
+
+    yield server
+
+    server.terminate()
+    assert server.wait() == 0
+
+
+@pytest.fixture()
+def connection():
+    connection = client.Connection('localhost:8080')
+
+    yield connection
+
+    connection.close()
+
+
+def test_get(connection, directory):
+    connection.request('GET', '/static/index.html')
+    response = connection.getresponse()
+
+    assert response.status == 200
+    assert response.headers['Content-Type'] == 'text/html; charset=utf-8'
+    assert response.headers['Content-Length'] == '14'
+    assert response.body == b'<h1>Hello</h1>'
+    assert response.headers['Etag']
+    assert response.headers['Last-Modified']
+
+    connection.request('GET', '/static/img/logo.png')
+    response = connection.getresponse()
+
+    assert response.status == 200
+    assert hashlib.md5(response.body).digest() == \
+        hashlib.md5(directory.join('img', 'logo.png').read_binary()).digest()
+
+    connection.request('GET', '/static/empty.txt')
+    response = connection.getresponse()
+
+    assert response.status == 200
+    assert response.body == b''
+
+
+@pytest.mark.parametrize('path', [
+    '/static/missing.html', '/static/img', '/static/../secret.txt',
+    '/static/img/../../secret.txt'])
+def test_not_found(connection, path):
+    connection.request('GET', path)
+    response = connection.getresponse()
+
+    assert response.status == 404
+
+
+def test_not_modified(connection):
+    connection.request('GET', '/static/index.html')
+    response = connection.getresponse()
+    etag = response.headers['Etag']
+    last_modified = response.headers['Last-Modified']
+
+    connection.request(
+        'GET', '/static/index.html', headers=[('If-None-Match', etag)])
+    response = connection.getresponse()
+
+    assert response.status == 304
+    assert response.body == b''
+
+    connection.request(
+        'GET', '/static/index.html',
+        headers=[('If-Modified-Since', last_modified)])
+    response = connection.getresponse()
+
+    assert response.status == 304
+
+    connection.request(
+        'GET', '/static/index.html', headers=[('If-None-Match', '"other"')])
+    response = connection.getresponse()
+
+    assert response.status == 200
+    assert response.body == b'<h1>Hello</h1>'
+
+
+@pytest.mark.parametrize('value,body,content_range', [
+    ('bytes=0-3', b'<h1>', 'bytes 0-3/14'),
+    ('bytes=4-', b'Hello</h1>', 'bytes 4-13/14'),
+    ('bytes=-5', b'</h1>', 'bytes 9-13/14')
+])
+def test_range(connection, value, body, content_range):
+    connection.request(
+        'GET', '/static/index.html', headers=[('Range', value)])
+    response = connection.getresponse()
+
+    assert response.status == 206
+    assert response.headers['Content-Range'] == content_range
+    assert response.body == body
+
+
+def test_range_unsatisfiable(connection):
+    connection.request(
+        'GET', '/static/index.html', headers=[('Range', 'bytes=100-')])
+    response = connection.getresponse()
+
+    assert response.status == 416
+    assert response.headers['Content-Range'] == 'bytes */14'
+
+
+def test_pipeline(connection):
+    for path in ['/static/img/logo.png', '/', '/static/index.html']:
+        connection.request('GET', path)
+
+    assert len(connection.getresponse().body) == 1024 * 1024
+    assert connection.getresponse().body == b''
+    assert connection.getresponse().body == b'<h1>Hello</h1>'
+
+
+def test_slow_reader(directory):
+    # the socket fills up while the client doesn't read, the rest of the
+    # file goes through the transport once it does
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(('localhost', 8080))
+    sock.sendall(
+        b'GET /static/large.bin HTTP/1.1\r\n\r\n'
+        b'GET /static/index.html HTTP/1.1\r\n\r\n')
+    time.sleep(.5)
+
+    large = client.Response(sock)
+    assert large.status == 200
+    assert hashlib.md5(large.body).digest() == \
+        hashlib.md5(directory.join('large.bin').read_binary()).digest()
+    assert client.Response(sock).body == b'<h1>Hello</h1>'
+
+    sock.close()
+
+
+def test_static_response(connection):
+    connection.request('GET', '/health')
+    response = connection.getresponse()
+
+    assert response.status == 200
+    assert response.headers['Content-Type'] == \
+        'application/json; charset=utf-8'
+    assert response.json == {'status': 'ok'}
+
+    connection.request('GET', '/robots.txt')
+    connection.request('POST', '/robots.txt', body=b'')
+    connection.request('GET', '/health')
+
+    assert connection.getresponse().text == 'User-agent: *\nDisallow: /\n'
+    assert connection.getresponse().status == 404
+    assert connection.getresponse().json == {'status': 'ok'}
+
+
+def test_static_response_http10():
+    connection = client.Connection('localhost:8080')
+    connection.putline('GET /health HTTP/1.0')
+    connection.putline('Connection: keep-alive')
+    connection.putline()
+    response = client.Response(connection.sock)
+
+    assert response.headers['Connection'] == 'keep-alive'
+    assert response.json == {'status': 'ok'}
+
+    connection.putline('GET /health HTTP/1.0')
+    connection.putline()
+    response = client.Response(connection.sock)
+
+    assert 'Connection' not in response.headers
+    assert response.json == {'status': 'ok'}
+    # the connection is closed after the response
+    assert connection.sock.recv(1) == b''
+
+    connection.close()
+
+
+def test_static_response_close(connection):
+    connection.request('GET', '/health', headers=[('Connection', 'close')])
+    response = connection.getresponse()
+
+    assert response.headers['Connection'] == 'close'
+    assert response.json == {'status': 'ok'}
+    assert connection.sock.recv(1) == b''
+
+
+def test_default_headers(connection):
+    connection.request('GET', '/static/index.html')
+    response = connection.getresponse()
+
+    assert response.headers['Server'] == 'japronto'
+    assert abs(parsedate_to_datetime(response.headers['Date']).timestamp()
+               - time.time()) < 2
+
+    connection.request('GET', '/health')
+    first = connection.getresponse().headers['Date']
+    time.sleep(1.1)
+    connection.request('GET', '/health')
+    second = connection.getresponse().headers['Date']
+
+    # pre-rendered responses get the current date too
+    assert parsedate_to_datetime(second) > parsedate_to_datetime(first)
@@ -0,0 +1,212 @@
+import hashlib
+import os
+
+import pytest
+
+from misc import client
+import integration_tests.common
+
+
+pytestmark = pytest.mark.needs_build
+
+
+@pytest.fixture(autouse=True, scope='module')
+def server_process():
+    # memory freed under ASan sits in its quarantine and would count as
+    # growth in test_upload
+    os.putenv('ASAN_OPTIONS', 'quarantine_size_mb=0')
+    server, process = integration_tests.common.start_server(
+        'integration_tests/streaming.py', path='.test', return_process=True)
+    os.unsetenv('ASAN_OPTIONS')
+
+    yield process
+
+    server.terminate()
+    assert server.wait() == 0
+
+
+def worker_rss(process):
+    return sum(p.memory_info().rss for p in process.children())
+
+
+@pytest.mark.parametrize('chunked', [False, True], ids=['identity', 'chunked'])
+def test_upload(server_process, chunked):
+    chunk = os.urandom(1024 * 1024)
+    count = 16
+    rss_before = worker_rss(server_process)
+
+    connection = client.Connection('localhost:8080')
+    connection.putrequest('POST', '/upload')
+    if chunked:
+        connection.putheader('Transfer-Encoding', 'chunked')
+        connection.endheaders([chunk] * count)
+    else:
+        connection.putheader('Content-Length', str(len(chunk) * count))
+        connection.endheaders(chunk * count)
+    response = connection.getresponse()
+
+    # a buffered 16MB body would show up in the worker
+    assert worker_rss(server_process) - rss_before < 8 * 1024 * 1024
+    assert response.status == 200
+    assert response.json == {
+        'length': len(chunk) * count,
+        'md5': hashlib.md5(chunk * count).hexdigest()}
+
+    connection.close()
+
+
+def test_reject():
+    body = b'x' * 8 * 1024 * 1024
+
+    connection = client.Connection('localhost:8080')
+    connection.request('POST', '/reject', body=body)
+    response = connection.getresponse()
+    assert response.status == 413
+
+    # the unread body was dropped and the connection is still usable
+    connection.request('POST', '/buffered', body=b'hello')
+    response = connection.getresponse()
+    assert response.status == 200
+    assert response.json == {'length': 5}
+
+    connection.close()
+
+
+def test_pipeline():
+    connection = client.Connection('localhost:8080')
+    for path in ['/upload', '/buffered', '/upload', '/buffered']:
+        connection.request('POST', path, body=b'hello')
+    connection.request('POST', '/upload', body=b'')
+
+    for length in [5, 5, 5, 5, 0]:
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.json['length'] == length
+
+    connection.close()
+
+
+def multipart_body(boundary, fields, files):
+    body = b''
+    for name, value in fields:
+        body += b'--' + boundary + b'\r\n'
+        body += 'Content-Disposition: form-data; name="{}"\r\n\r\n'.format(
+            name).encode('utf-8')
+        body += value.encode('utf-8') + b'\r\n'
+    for name, filename, content in files:
+        body += b'--' + boundary + b'\r\n'
+        body += 'Content-Disposition: form-data; name="{}"; filename="{}"' \
+            '\r\n'.format(name, filename).encode('utf-8')
+        body += b'Content-Type: application/octet-stream\r\n\r\n'
+        body += content + b'\r\n'
+
+    return body + b'--' + boundary + b'--\r\n'
+
+
+@pytest.mark.parametrize('path', ['/form', '/buffered-form'])
+def test_multipart(path):
+    boundary = b'japronto-boundary'
+    fields = [('a', '1'), ('text', 'zażółć'), ('a', '2')]
+    files = [
+        ('upload', 'big.bin', os.urandom(3 * 1024 * 1024)),
+        ('upload', 'small.txt', b'small\r\n--')]
+    body = multipart_body(boundary, fields, files)
+
+    connection = client.Connection('localhost:8080')
+    connection.putrequest('POST', path)
+    connection.putheader(
+        'Content-Type', 'multipart/form-data; boundary=japronto-boundary')
+    connection.putheader('Content-Length', str(len(body)))
+    connection.endheaders(body)
+    response = connection.getresponse()
+
+    assert response.status == 200
+    assert response.json == {
+        'form': [list(f) for f in fields],
+        'files': [
+            [name, filename, len(content), hashlib.md5(content).hexdigest()]
+            for name, filename, content in files]}
+
+    connection.close()
+
+
+@pytest.mark.parametrize('path', ['/form', '/buffered-form'])
+def test_urlencoded(path):
+    connection = client.Connection('localhost:8080')
+    connection.request(
+        'POST', path, body=b'a=1&b=%C5%BC&a=2',
+        headers=[('Content-Type', 'application/x-www-form-urlencoded')])
+    response = connection.getresponse()
+
+    assert response.status == 200
+    assert response.json == {
+        'form': [['a', '1'], ['b', 'ż'], ['a', '2']], 'files': None}
+
+    connection.close()
+
+
+def expected_download(count, size):
+    return b''.join(bytes([ord('a') + i % 26]) * size for i in range(count))
+
+
+@pytest.mark.parametrize('count,size', [(0, 1), (4, 1024), (64, 64 * 1024)])
+def test_download(count, size):
+    connection = client.Connection('localhost:8080')
+    connection.request(
+        'GET', '/download', query_string='count={}&size={}'.format(count, size))
+    response = connection.getresponse()
+
+    assert response.status == 200
+    assert response.headers['Transfer-Encoding'] == 'chunked'
+    assert 'Content-Length' not in response.headers
+    assert response.body == expected_download(count, size)
+
+    # the connection is kept alive after the last chunk
+    connection.request('POST', '/buffered', body=b'hello')
+    assert connection.getresponse().json == {'length': 5}
+
+    connection.close()
+
+
+def test_download_http10():
+    connection = client.Connection('localhost:8080')
+    connection.putline('GET /download HTTP/1.0')
+    connection.putline()
+    response = client.Response(connection.sock)
+
+    # without chunked encoding the body ends when the connection closes
+    assert response.status == 200
+    assert 'Transfer-Encoding' not in response.headers
+    assert 'Content-Length' not in response.headers
+    assert response.body == expected_download(4, 1024)
+
+    connection.close()
+
+
+def test_download_pipeline():
+    connection = client.Connection('localhost:8080')
+    connection.request('POST', '/buffered', body=b'hi')
+    connection.request('GET', '/download')
+    connection.request('POST', '/upload', body=b'hello')
+    connection.request('GET', '/download', query_string='count=2&size=10')
+    connection.request('POST', '/buffered', body=b'hello!')
+
+    assert connection.getresponse().json == {'length': 2}
+    assert connection.getresponse().body == expected_download(4, 1024)
+    assert connection.getresponse().json['length'] == 5
+    assert connection.getresponse().body == expected_download(2, 10)
+    assert connection.getresponse().json == {'length': 6}
+
+    connection.close()
+
+
+def test_broken():
+    connection = client.Connection('localhost:8080')
+    connection.putline('GET /broken HTTP/1.1')
+    connection.putline()
+    data = client.readall(connection.sock)
+
+    # the body is cut short by closing the connection
+    assert data.endswith(b'7\r\npartial\r\n')
+
+    connection.close()
@@ -21,6 +21,15 @@ def readexact(sock, size):
     return data
 
 
+def readall(sock):
+    data = b''
+    while 1:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return data
+        data += chunk
+
+
 class Response:
     def __init__(self, sock):
         self.sock = sock
@@ -44,7 +53,7 @@ class Response:
             if not line:
                 break
 
-            name, value = line.split(b':')
+            name, value = line.split(b':', 1)
             name = name.strip().decode('ascii').title()
             value = value.strip().decode('latin1')
             self.headers[name] = value
@@ -62,9 +71,24 @@ class Response:
         return rest.get('charset', 'iso-8859-1')
 
     def read_body(self):
-        self.body = readexact(self.sock, int(self.headers['Content-Length']))
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            self.body = self.read_chunked()
+        elif 'Content-Length' in self.headers:
+            self.body = readexact(
+                self.sock, int(self.headers['Content-Length']))
+        else:
+            self.body = readall(self.sock)
         self.text = self.body.decode(self.encoding)
 
+    def read_chunked(self):
+        body = b''
+        while 1:
+            size = int(readline(self.sock).strip(), 16)
+            body += readexact(self.sock, size)
+            readexact(self.sock, 2)
+            if not size:
+                return body
+
     @property
     def json(self):
         return json.loads(self.text)
@@ -105,7 +129,8 @@ class Connection:
     def putrequest(self, method, path, query_string=None):
         url = urllib.parse.quote(path)
         if query_string is not None:
-            url += '?' + urllib.parse.quote(query_string)
+            # keep the separators, the server splits the raw query string
+            url += '?' + urllib.parse.quote(query_string, safe='/&=')
 
         request_line = "{method} {url} HTTP/1.1" \
             .format(method=method, url=url)
@@ -3,16 +3,21 @@ import asyncio
 import traceback
 import socket
 import sys
+import time
+from json import loads as json_loads
 
 from os import set_inheritable as os_set_inheritable, environ as os_environ
 from multiprocessing import Process as mult_process
 from faulthandler import enable as enablefaulthandler
 from uvloop import new_event_loop as uv_new_event_loop
-from inspect import iscoroutinefunction
 
 from japronto.router import Router, RouteNotFoundException
+from japronto.response.cache import ResponseCache
+from japronto.response.cresponse import set_default_headers, \
+    set_json_encoder, update_date
 from japronto.protocol.cprotocol import Protocol
 from japronto.protocol.creaper import Reaper
+from japronto.request.crequest import Request
 from japronto import helpers
 
 
@@ -21,15 +26,51 @@ signames = {
     if isinstance(v, signal.Signals)
 }
 
+# headers are parsed into an array on the stack
+MAX_HEADERS_LIMIT = 1024
+
+# answers to requests over the limits, written before the rest of the
+# request is read and followed by closing the connection
+limit_responses = {
+    'headers_too_large':
+        b'HTTP/1.1 431 Request Header Fields Too Large\r\n'
+        b'Connection: close\r\n'
+        b'Content-Length: 0\r\n\r\n',
+    'body_too_large':
+        b'HTTP/1.1 413 Payload Too Large\r\n'
+        b'Connection: close\r\n'
+        b'Content-Length: 0\r\n\r\n'
+}
+
 class Application:
-    def __init__(self, *, reaper_settings=None, log_request=None, protocol_factory=None, debug=False):
+    def __init__(self, *, reaper_settings=None, gather_settings=None, max_pipeline_depth=128, write_buffer_settings=None, stream_buffer_size=65536, max_header_size=65536, max_headers=100, max_body_size=1048576, response_cache_settings=None, date_header=False, server_header=None, json_encoder=None, json_decoder=None, log_request=None, protocol_factory=None, debug=False):
         self._router = None
         self._loop = None
         self._connections = set()
         self._reaper_settings = reaper_settings or {}
+        self._gather_settings = gather_settings or {}
+        self._max_pipeline_depth = max_pipeline_depth
+        self._write_buffer_settings = write_buffer_settings or {}
+        self._stream_buffer_size = stream_buffer_size
+        if not 0 < max_headers <= MAX_HEADERS_LIMIT:
+            raise ValueError(
+                'max_headers must be between 1 and {}'.format(
+                    MAX_HEADERS_LIMIT))
+        if max_header_size < 1 \
+           or (max_body_size is not None and max_body_size < 0):
+            raise ValueError('Request size limits must be positive')
+        self._request_limits = (max_header_size, max_headers, max_body_size)
+        self._response_cache = ResponseCache(**(response_cache_settings or {}))
+        self._date_header = date_header
+        self._server_header = server_header
+        self._date_handle = None
+        # may return str or UTF-8 bytes
+        self._json_encoder = json_encoder
+        self._json_decoder = json_decoder or json_loads
         self._error_handlers = []
         self._log_request = log_request
         self._request_extensions = {}
+        self._request_extension_table = {}
         self._protocol_factory = protocol_factory or Protocol
         self._debug = debug
         self._on_startup = []
@@ -48,6 +89,14 @@ class Application:
 
         return self._router
 
+    @property
+    def response_cache(self):
+        return self._response_cache
+
+    @property
+    def json_decoder(self):
+        return self._json_decoder
+
     @property
     def on_startup(self):
         return self._on_startup
@@ -61,35 +110,75 @@ class Application:
         self.loop
         self.router
 
+        # before the matcher pre-renders constant responses, both are global
+        # so only the application being served installs them
+        set_default_headers(
+            date=self._date_header, server=self._server_header)
+        set_json_encoder(self._json_encoder)
+        if self._date_header:
+            self._update_date()
+
         self._reaper = Reaper(self, **self._reaper_settings)
+        # the table protocols hand to every request, resolved once here
+        self._request_extension_table = {
+            name: (handler, bool(property))
+            for name, (handler, property) in self._request_extensions.items()}
         self._matcher = self._router.get_matcher()
 
-    def route(self, path: str = '/', methods: list = []):
+    def _update_date(self):
+        # the cached Date header changes on the second boundary
+        update_date()
+        self._date_handle = self.loop.call_later(
+            1 - time.time() % 1, self._update_date)
+
+    def route(self, path: str = '/', methods: list = [], stream: bool = False,
+              cache_ttl: float = None, cache_vary: list = (),
+              max_body_size: int = None):
         '''
         Shorthand route decorator. Avoids need to register
         handlers to the router directly with `app.router.add_route()`.
+
+        With `stream` the handler is called as soon as the headers arrive
+        and reads the body with `request.stream()`.
+
+        With `cache_ttl` responses to GET requests are kept in
+        `app.response_cache` for that many seconds, keyed by path, query
+        string and the `cache_vary` request headers.
+
+        With `max_body_size` the route accepts bodies up to that many bytes
+        instead of the application's `max_body_size`, larger ones are
+        answered with 413.
         '''
         def decorator(handler):
-            async def wrapper(*args, **kwargs):
-                # check awaitable handler
-                if iscoroutinefunction(handler):
-                    return await handler(*args, **kwargs)
-                return handler(*args, **kwargs)
-            self.router.add_route(path, wrapper, methods=methods)
-            return wrapper
+            # register the handler itself so plain functions stay on the
+            # synchronous path
+            self.router.add_route(
+                path, handler, methods=methods, stream=stream,
+                cache_ttl=cache_ttl, cache_vary=cache_vary,
+                max_body_size=max_body_size)
+            return handler
         return decorator
 
-    def get(self, path: str = '/'):
-        return self.route(path, methods=["GET"])
+    def get(self, path: str = '/', cache_ttl: float = None,
+            cache_vary: list = ()):
+        return self.route(
+            path, methods=["GET"], cache_ttl=cache_ttl, cache_vary=cache_vary)
 
-    def post(self, path: str = '/'):
-        return self.route(path, methods=["POST"])
+    def post(self, path: str = '/', stream: bool = False,
+             max_body_size: int = None):
+        return self.route(
+            path, methods=["POST"], stream=stream, max_body_size=max_body_size)
 
-    def put(self, path: str = '/'):
-        return self.route(path, methods=["PUT"])
+    def put(self, path: str = '/', stream: bool = False,
+            max_body_size: int = None):
+        return self.route(
+            path, methods=["PUT"], stream=stream, max_body_size=max_body_size)
 
-    def patch(self, path: str = '/'):
-        return self.route(path, methods=["PATCH"])
+    def patch(self, path: str = '/', stream: bool = False,
+              max_body_size: int = None):
+        return self.route(
+            path, methods=["PATCH"], stream=stream,
+            max_body_size=max_body_size)
 
     def options(self, path: str = '/'):
         return self.route(path, methods=["OPTIONS"])
@@ -98,6 +187,10 @@ class Application:
         return self.route(path, methods=["DELETE"])
 
     def protocol_error_handler(self, error):
+        response = limit_responses.get(error)
+        if response:
+            return response
+
         print(error)
 
         error = error.encode('utf-8')
@@ -205,21 +298,24 @@ class Application:
         '''
         Shorthand `set_req_extension` decorator for `app.extend_request`.
         '''
-        if not name:
-            name = handler.__name__
+        self.extend_request(handler, name=name, property=property)
         def decorator(f):
-                # check awaitable handler
-                if iscoroutinefunction(f):
-                    return await f
-                return handler(*args, **kwargs)
             return f
-        self._request_extensions[name] = (handler, property)
         return decorator
 
     def extend_request(self, handler, *, name=None, property=False):
+        '''
+        Makes `handler` available on every request as a method called with
+        the request or, with `property`, as an attribute holding
+        `handler(request)`, computed once per request on first access.
+        '''
         if not name:
             name = handler.__name__
 
+        if hasattr(Request, name):
+            raise ValueError(
+                'Request already has an attribute named {!r}'.format(name))
+
         self._request_extensions[name] = (handler, property)
 
     def serve(self, *, sock, host, port, reloader_pid):
@@ -258,6 +354,8 @@ class Application:
         finally:
             loop.run_until_complete(self.drain())
             self._reaper.stop()
+            if self._date_handle:
+                self._date_handle.cancel()
             for finalize in self.on_cleanup:
                 loop.run_until_complete(finalize(self))
             loop.close()
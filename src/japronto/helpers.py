@@ -5,6 +5,7 @@ from inspect import CO_COROUTINE
 
 PY_37 = version_info > (3, 7)
 PY_38 = version_info > (3, 8)
+PY_310 = version_info >= (3, 10)
 
 if PY_37:
     all_tasks = all_tasks
@@ -1,4 +1,4 @@
 header_errors = [
     'malformed_headers', 'incomplete_headers', 'invalid_headers',
-    'excessive_data']
-body_errors = ['malformed_body', 'incomplete_body']
+    'excessive_data', 'headers_too_large']
+body_errors = ['malformed_body', 'incomplete_body', 'body_too_large']
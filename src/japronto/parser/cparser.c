@@ -1,8 +1,11 @@
+#include <alloca.h>
+#include <errno.h>
 #include <strings.h>
 #include <sys/param.h>
 
 #include "cparser.h"
 #include "cpu_features.h"
+#include "pool.h"
 
 #ifndef PARSER_STANDALONE
 #include "cprotocol.h"
@@ -14,38 +17,28 @@ static PyObject* incomplete_headers;
 static PyObject* invalid_headers;
 static PyObject* incomplete_body;
 static PyObject* excessive_data;
+static PyObject* headers_too_large;
+static PyObject* body_too_large;
 //static PyObject* empty_body;
 
-const char zero_body[] = "";
-
-/*static PyObject* GET;
-static PyObject* POST;
-static PyObject* DELETE;
-static PyObject* HEAD;
-static PyObject* Host;
-static PyObject* User_Agent;
-static PyObject* Accept;
-static PyObject* Accept_Language;
-static PyObject* Accept_Encoding;
-static PyObject* Accept_Charset;
-static PyObject* Connection;
-static PyObject* Cookie;
-static PyObject* Content_Length;
-static PyObject* Transfer_Encoding;
-static PyObject* val_close;
-static PyObject* keep_alive;*/
+static Pool buffer_pool = POOL_INIT(PARSER_INITIAL_BUFFER_SIZE, PARSER_POOL_LEN);
 
+const char zero_body[] = "";
 
-static unsigned long const CONTENT_LENGTH_UNSET = ULONG_MAX;
+// str objects for common methods and headers are interned in
+// request/intern.c
 
 
 static void _reset_state(Parser* self, bool disconnect) {
     self->state = PARSER_HEADERS;
+    self->headers_len = 0;
     self->transfer = PARSER_TRANSFER_UNSET;
     self->content_length = CONTENT_LENGTH_UNSET;
+    self->body_limit = self->max_body_size;
     memset(&self->chunked_decoder, 0, sizeof(struct phr_chunked_decoder));
     self->chunked_decoder.consume_trailer = 1;
     self->chunked_offset = 0;
+    self->stream = false;
     if(disconnect) {
       self->connection = PARSER_CONNECTION_UNSET;
       self->buffer_start = 0;
@@ -105,10 +98,16 @@ Parser_init(Parser* self, void* protocol)
     self->protocol = protocol;
 #endif
 
+    self->max_header_size = 64 * 1024;
+    self->max_headers = 100;
+    self->max_body_size = CONTENT_LENGTH_UNSET;
+
     _reset_state(self, true);
 
-    self->buffer_capacity = PARSER_INITIAL_BUFFER_SIZE;
-    self->buffer = self->inline_buffer;
+    self->paused = false;
+    self->parsing = false;
+    self->buffer_capacity = 0;
+    self->buffer = NULL;
 
     return 0;
 }
@@ -127,7 +126,9 @@ Parser_dealloc(Parser* self)
 #endif
 #endif
 
-    if(self->buffer != self->inline_buffer)
+    if(self->buffer_capacity == PARSER_INITIAL_BUFFER_SIZE)
+      Pool_give(&buffer_pool, self->buffer);
+    else
       free(self->buffer);
 
 #ifdef PARSER_STANDALONE
@@ -143,6 +144,24 @@ static int
   const char *, size_t, const char **, size_t *, const char **, size_t *,
   int *, struct phr_header *, size_t *, size_t);
 
+/* Tells if picohttpparser failed because there are more than max_headers
+   headers rather than because they are malformed. */
+static bool _too_many_headers(const char* buffer, size_t len, size_t max_headers) {
+  const char* end = buffer + len;
+  size_t count = 0;
+
+  // every header starts on a new line, an empty one ends them
+  for(const char* c = buffer; (c = memchr(c, '\n', end - c)); c++) {
+    if(c + 1 < end && (c[1] == '\r' || c[1] == '\n'))
+      break;
+    if(++count > max_headers)
+      return true;
+  }
+
+  return false;
+}
+
+
 static int _parse_headers(Parser* self) {
 #ifdef PARSER_STANDALONE
   PyObject* method_view = NULL;
@@ -163,25 +182,45 @@ static int _parse_headers(Parser* self) {
   char* path;
   size_t path_len;
   int minor_version;
-  struct phr_header headers[50];
-  size_t num_headers = sizeof(headers) / sizeof(struct phr_header);
+  struct phr_header* headers = alloca(
+    sizeof(struct phr_header) * self->max_headers);
+  size_t num_headers = self->max_headers;
 
+  size_t len = self->buffer_end - self->buffer_start;
   result = _phr_parse_request(
-    self->buffer + self->buffer_start, self->buffer_end - self->buffer_start,
+    self->buffer + self->buffer_start, len,
     (const char**)&method, &method_len,
     (const char**)&path, &path_len,
-    &minor_version, headers, &num_headers, 0);
+    &minor_version, headers, &num_headers, self->headers_len);
 
   // FIXME: More than 10 headers
 #ifdef DEBUG_PRINT
   printf("result: %d\n", result);
 #endif
 
-  if(result == -2)
+  if(result == -2) {
+    if(len > self->max_header_size) {
+      error = headers_too_large;
+      goto on_error;
+    }
+
+    // a client sending the headers a byte at a time doesn't make
+    // them parsed from the start on every read
+    self->headers_len = len;
     goto finally;
+  }
+
+  self->headers_len = 0;
 
   if(result == -1) {
-    error = malformed_headers;
+    error = _too_many_headers(
+      self->buffer + self->buffer_start, len, self->max_headers) ?
+      headers_too_large : malformed_headers;
+    goto on_error;
+  }
+
+  if((size_t)result > self->max_header_size) {
+    error = headers_too_large;
     goto on_error;
   }
 
@@ -195,25 +234,11 @@ static int _parse_headers(Parser* self) {
   header->name_len == strlen(val) && strncasecmp(header->name, val, header->name_len) == 0
 #define header_value_equal(val) \
   header->value_len == strlen(val) && strncasecmp(header->value, val, header->value_len) == 0
-/*#define cmp_and_set_header_name(name, val) \
-  if(header_name_equal(val)) { \
-      py_header_name = name; \
-      Py_INCREF(name); \
-  }
-#define cmp_and_set_header_value(name, val) \
-  if(header_value_equal(val)) { \
-      py_header_value = name; \
-      Py_INCREF(name); \
-  }*/
 
   for(struct phr_header* header = headers;
       header < headers + num_headers;
       header++) {
 
-    // TODO: common names and values static
-    /*PyObject* py_header_name = NULL;
-    PyObject* py_header_value = NULL;*/
-
     if(header_name_equal("Transfer-Encoding")) {
       if(header_value_equal("chunked"))
         self->transfer = PARSER_CHUNKED;
@@ -221,9 +246,6 @@ static int _parse_headers(Parser* self) {
         self->transfer = PARSER_IDENTITY;
       else
         /*TODO: handle incorrept values for protocol version, also comma sep*/;
-
-      /*py_header_name = Transfer_Encoding;
-      Py_INCREF(Transfer_Encoding);*/
     } else if(header_name_equal("Content-Length")) {
       if(!header->value_len) {
         error = invalid_headers;
@@ -236,8 +258,12 @@ static int _parse_headers(Parser* self) {
       }
 
       char * endptr = (char *)header->value + header->value_len;
+      errno = 0;
       self->content_length = strtol(header->value, &endptr, 10);
-      // FIXME: overflow?
+      if(errno == ERANGE) {
+        error = body_too_large;
+        goto on_error;
+      }
 
       if(endptr != (char*)header->value + header->value_len) {
         error = invalid_headers;
@@ -250,67 +276,7 @@ static int _parse_headers(Parser* self) {
         self->connection = PARSER_KEEP_ALIVE;
       else
         /* FIXME: on_error*/;
-      /*py_header_name = Content_Length;
-      Py_INCREF(Content_Length);*/
     }
-    /*else cmp_and_set_header_name(Host, "Host")
-    else cmp_and_set_header_name(User_Agent, "User-Agent")
-    else cmp_and_set_header_name(Accept, "Accept")
-    else cmp_and_set_header_name(Accept_Language, "Accept-Language")
-    else cmp_and_set_header_name(Accept_Encoding, "Accept-Encoding")
-    else cmp_and_set_header_name(Accept_Charset, "Accept-Charset")
-    else cmp_and_set_header_name(Connection, "Connection")
-    else cmp_and_set_header_name(Cookie, "Cookie")
-    else {
-      bool prev_alpha = false;
-      for(char* c = (char*)header.name; c < header.name + header.name_len; c++) {
-        if(*c >= 'A' && *c <= 'Z') {
-          if(prev_alpha)
-            *c |= 0x20;
-          prev_alpha = true;
-        } else if (*c >= 'a' && *c <= 'z')
-          prev_alpha = true;
-        else
-          prev_alpha = false;
-      }
-
-      // FIXME this should accept only ascii
-      py_header_name = PyUnicode_FromStringAndSize(
-        header.name, header.name_len);
-      if(!py_header_name) {
-        result = -3;
-        goto finally_loop;
-      }
-    }
-
-    if(py_header_name == Connection) {
-      cmp_and_set_header_value(keep_alive, "keep-alive")
-      else cmp_and_set_header_value(val_close, "close")
-      else FIXME: invalid Connection value;
-    } else {
-      // FIXME: this can return NULL on codec error
-      py_header_value = PyUnicode_DecodeLatin1(
-        header.value, header.value_len, NULL);
-      if(!py_header_value) {
-        result = -3;
-        goto finally_loop;
-      }
-    }
-
-    if(PyDict_SetItem(py_headers, py_header_name, py_header_value) == -1)
-      result = -3;
-
-#ifdef DEBUG_PRINT
-    PyObject_Print(py_header_name, stdout, 0); printf(": ");
-    PyObject_Print(py_header_value, stdout, 0); printf("\n");
-#endif
-
-    finally_loop:
-    Py_XDECREF(py_header_value);
-    Py_XDECREF(py_header_name);
-
-    if(result == -3)
-      goto finally;*/
   }
 
 #ifdef DEBUG_PRINT
@@ -340,6 +306,13 @@ static int _parse_headers(Parser* self) {
     goto error;
 #endif
 
+  // the protocol knows the route and its limit by now
+  if(self->content_length != CONTENT_LENGTH_UNSET
+     && self->content_length > self->body_limit) {
+    error = body_too_large;
+    goto on_error;
+  }
+
   self->buffer_start += (size_t)result;
 
   goto finally;
@@ -378,6 +351,56 @@ static int _parse_headers(Parser* self) {
   return result;
 }
 
+#ifndef PARSER_STANDALONE
+/* Hands whatever part of the body arrived to the protocol and drops it
+   from the buffer. Returns 1 once the body is complete, -2 when more data
+   is needed, -1 on malformed chunked encoding, -4 when the body is over
+   the limit and -3 on error. */
+static int _stream_body(Parser* self) {
+  int result;
+  size_t len;
+
+  if(self->content_length != CONTENT_LENGTH_UNSET) {
+    len = MIN(self->content_length, self->buffer_end - self->buffer_start);
+    result = len == self->content_length ? 1 : -2;
+  } else if(self->transfer == PARSER_CHUNKED) {
+    // the decoder keeps its state between calls so everything passed
+    // in is consumed, len becomes the length of the decoded data
+    len = self->buffer_end - self->buffer_start;
+    result = phr_decode_chunked(
+      &self->chunked_decoder, self->buffer + self->buffer_start, &len);
+    if(result == -1)
+      return -1;
+
+    // unused otherwise, counts the streamed body
+    self->chunked_offset += len;
+    if(self->chunked_offset > self->body_limit)
+      return -4;
+
+    if(result >= 0)
+      self->buffer_end = self->buffer_start + len + (size_t)result;
+    else
+      self->buffer_end = self->buffer_start + len;
+
+    result = result >= 0 ? 1 : -2;
+  } else
+    return -2;
+
+  if(len) {
+    if(!Protocol_on_body_chunk(
+        self->protocol, self->buffer + self->buffer_start, len))
+      return -3;
+
+    self->buffer_start += len;
+    if(self->content_length != CONTENT_LENGTH_UNSET)
+      self->content_length -= len;
+  }
+
+  return result;
+}
+#endif
+
+
 static int _parse_body(Parser* self) {
 #ifdef PARSER_STANDALONE
   PyObject* body_view = NULL;
@@ -386,6 +409,7 @@ static int _parse_body(Parser* self) {
   char* body = NULL;
   size_t body_len = 0;
   int result = -2;
+  PyObject* error = malformed_body;
   if(self->content_length == CONTENT_LENGTH_UNSET
      && self->transfer == PARSER_TRANSFER_UNSET) {
     result = 0;
@@ -398,6 +422,22 @@ static int _parse_body(Parser* self) {
     goto on_body;
   }
 
+#ifndef PARSER_STANDALONE
+  if(self->stream) {
+    result = _stream_body(self);
+    if(result == 1)
+      goto on_body;
+
+    if(result == -4)
+      error = body_too_large;
+
+    if(result == -1 || result == -4)
+      goto on_error;
+
+    goto finally;
+  }
+#endif
+
   if(self->content_length != CONTENT_LENGTH_UNSET) {
     if(self->content_length > self->buffer_end - self->buffer_start) {
       result = -2;
@@ -424,6 +464,11 @@ static int _parse_body(Parser* self) {
       &self->chunked_offset);
     self->chunked_offset = self->chunked_offset + chunked_offset_start;
 
+    if(self->chunked_offset > self->body_limit) {
+      error = body_too_large;
+      goto on_error;
+    }
+
     if(result == -2) {
       self->buffer_end = self->buffer_start + self->chunked_offset;
       goto finally;
@@ -476,7 +521,11 @@ static int _parse_body(Parser* self) {
     goto error;
   Py_DECREF(on_body_result);
 #else
-  if(!Protocol_on_body(self->protocol, body, body_len, self->buffer_end - self->buffer_start))
+  if(self->stream) {
+    if(!Protocol_on_body_end(self->protocol))
+      goto error;
+  } else if(!Protocol_on_body(
+      self->protocol, body, body_len, self->buffer_end - self->buffer_start))
     goto error;
 #endif
 
@@ -488,13 +537,13 @@ static int _parse_body(Parser* self) {
   PyObject* on_error_result;
   on_error:
   on_error_result = PyObject_CallFunctionObjArgs(
-    self->on_error, malformed_body, NULL);
+    self->on_error, error, NULL);
   if(!on_error_result)
     goto error;
   Py_DECREF(on_error_result);
 #else
   on_error:
-  if(!Protocol_on_error(self->protocol, malformed_body))
+  if(!Protocol_on_error(self->protocol, error))
     goto error;
 #endif
 
@@ -515,60 +564,76 @@ static int _parse_body(Parser* self) {
 }
 
 
-#ifdef PARSER_STANDALONE
-static PyObject *
-Parser_feed(Parser* self, PyObject *args)
-#else
-Parser*
-Parser_feed(Parser* self, PyObject* py_data)
-#endif
-{
-  char* data;
-  int iresult = 0;
-#ifdef PARSER_STANDALONE
-  PyObject* result = Py_None;
-  // FIXME: can be called without __init__
-#ifdef DEBUG_PRINT
-  printf("feed\n");
-#endif
-  int data_len;
-  if(!PyArg_ParseTuple(args, "y#", &data, &data_len))
-    goto error;
-#else
-  Parser* result = self;
-  Py_ssize_t data_len;
-  if(PyBytes_AsStringAndSize(py_data, &data, &data_len) == -1)
-    goto error;
-#endif
-
+/* Makes room for at least len bytes after buffer_end. Unparsed data is
+   first moved to the front of the buffer, only if that is not enough
+   the buffer grows. */
+static int _reserve(Parser* self, size_t len) {
   if(self->buffer_start == self->buffer_end) {
     self->buffer_start = 0;
     self->buffer_end = 0;
-  } else if((size_t)data_len > self->buffer_capacity - self->buffer_end) {
+  } else if(len > self->buffer_capacity - self->buffer_end) {
     memmove(self->buffer, self->buffer + self->buffer_start, self->buffer_end - self->buffer_start);
     self->buffer_end -= self->buffer_start;
     self->buffer_start = 0;
   }
 
-  if((size_t)data_len > self->buffer_capacity - (self->buffer_end - self->buffer_start)) {
-    self->buffer_capacity = MAX(
+  if(!self->buffer) {
+    if(!(self->buffer = Pool_take(&buffer_pool)))
+      goto error;
+    self->buffer_capacity = PARSER_INITIAL_BUFFER_SIZE;
+  }
+
+  if(len > self->buffer_capacity - (self->buffer_end - self->buffer_start)) {
+    size_t capacity = MAX(
       self->buffer_capacity * 2,
-      self->buffer_end - self->buffer_start + data_len);
-    if(self->buffer == self->inline_buffer) {
-      self->buffer = malloc(self->buffer_capacity);
-      memcpy(self->buffer + self->buffer_start,
-             self->inline_buffer + self->buffer_start,
+      self->buffer_end - self->buffer_start + len);
+    char* buffer;
+    if(self->buffer_capacity == PARSER_INITIAL_BUFFER_SIZE) {
+      if(!(buffer = malloc(capacity)))
+        goto error;
+      memcpy(buffer + self->buffer_start,
+             self->buffer + self->buffer_start,
              self->buffer_end - self->buffer_start);
-    } else
-      self->buffer = realloc(self->buffer, self->buffer_capacity);
-    if(!self->buffer)
+      Pool_give(&buffer_pool, self->buffer);
+    } else if(!(buffer = realloc(self->buffer, capacity)))
       goto error;
+    self->buffer = buffer;
+    self->buffer_capacity = capacity;
   }
 
-  memcpy(self->buffer + self->buffer_end, data, (size_t)data_len);
-  self->buffer_end += (size_t)data_len;
+  return 0;
+
+  error:
+  PyErr_NoMemory();
+  return -1;
+}
+
+
+/* Gives the buffer back once everything in it was parsed, an idle
+   connection holds no buffer. Buffers that grew for a large request are
+   freed. */
+static void _release(Parser* self) {
+  if(!self->buffer || self->buffer_start != self->buffer_end)
+    return;
+
+  if(self->buffer_capacity == PARSER_INITIAL_BUFFER_SIZE)
+    Pool_give(&buffer_pool, self->buffer);
+  else
+    free(self->buffer);
+
+  self->buffer = NULL;
+  self->buffer_capacity = 0;
+  self->buffer_start = 0;
+  self->buffer_end = 0;
+}
 
-  while(self->buffer_start != self->buffer_end) {
+
+static int _parse(Parser* self) {
+  int iresult = 0;
+
+  self->parsing = true;
+
+  while(self->buffer_start != self->buffer_end && !self->paused) {
     if(self->state == PARSER_HEADERS) {
       iresult = _parse_headers(self);
       if(iresult == -3)
@@ -592,11 +657,58 @@ Parser_feed(Parser* self, PyObject* py_data)
     }
   }
 
+  self->parsing = false;
+
 #ifndef PARSER_STANDALONE
   if(iresult == -2)
     Protocol_on_incomplete(self->protocol);
 #endif
 
+  _release(self);
+
+  return 0;
+
+  error:
+  self->parsing = false;
+  _release(self);
+  return -1;
+}
+
+
+#ifdef PARSER_STANDALONE
+static PyObject *
+Parser_feed(Parser* self, PyObject *args)
+#else
+Parser*
+Parser_feed(Parser* self, PyObject* py_data)
+#endif
+{
+  char* data;
+#ifdef PARSER_STANDALONE
+  PyObject* result = Py_None;
+  // FIXME: can be called without __init__
+#ifdef DEBUG_PRINT
+  printf("feed\n");
+#endif
+  int data_len;
+  if(!PyArg_ParseTuple(args, "y#", &data, &data_len))
+    goto error;
+#else
+  Parser* result = self;
+  Py_ssize_t data_len;
+  if(PyBytes_AsStringAndSize(py_data, &data, &data_len) == -1)
+    goto error;
+#endif
+
+  if(_reserve(self, (size_t)data_len) == -1)
+    goto error;
+
+  memcpy(self->buffer + self->buffer_end, data, (size_t)data_len);
+  self->buffer_end += (size_t)data_len;
+
+  if(_parse(self) == -1)
+    goto error;
+
   goto finally;
 
   error:
@@ -610,6 +722,90 @@ Parser_feed(Parser* self, PyObject* py_data)
   return result;
 }
 
+#ifndef PARSER_STANDALONE
+/* Hands out the free space after buffer_end so the event loop can read
+   straight into it, at least sizehint bytes when it's non zero. */
+char*
+Parser_get_buffer(Parser* self, size_t sizehint, size_t* len)
+{
+  if(_reserve(self, MAX(sizehint, PARSER_MIN_READ)) == -1)
+    return NULL;
+
+  *len = self->buffer_capacity - self->buffer_end;
+  return self->buffer + self->buffer_end;
+}
+
+
+/* Parses nbytes the event loop read into the space from Parser_get_buffer. */
+Parser*
+Parser_buffer_updated(Parser* self, size_t nbytes)
+{
+  self->buffer_end += nbytes;
+
+  if(_parse(self) == -1)
+    return NULL;
+
+  return self;
+}
+
+
+/* Called by the protocol from on_headers for streaming routes. */
+void
+Parser_stream_body(Parser* self)
+{
+  self->stream = true;
+}
+
+
+void
+Parser_set_limits(Parser* self, size_t max_header_size, size_t max_headers,
+                  unsigned long max_body_size)
+{
+  self->max_header_size = max_header_size;
+  self->max_headers = max_headers;
+  self->max_body_size = max_body_size;
+  self->body_limit = max_body_size;
+}
+
+
+/* Called by the protocol from on_headers with the limit of the route.
+   Tells if the request is over it, the parser rejects it then once
+   on_headers returns. */
+bool
+Parser_limit_body(Parser* self, unsigned long body_limit)
+{
+  self->body_limit = body_limit;
+
+  return self->content_length != CONTENT_LENGTH_UNSET
+    && self->content_length > body_limit;
+}
+
+
+Parser*
+Parser_pause(Parser* self)
+{
+  self->paused = true;
+
+  return self;
+}
+
+
+/* Continues with the requests that arrived while paused. */
+Parser*
+Parser_resume(Parser* self)
+{
+  self->paused = false;
+
+  if(self->parsing)
+    return self;
+
+  if(_parse(self) == -1)
+    return NULL;
+
+  return self;
+}
+#endif
+
 #ifdef PARSER_STANDALONE
 static PyObject *
 Parser_feed_disconnect(Parser* self)
@@ -805,6 +1001,8 @@ cparser_init(void)
     alloc_static(invalid_headers)
     alloc_static(incomplete_body)
     alloc_static(excessive_data)
+    alloc_static(headers_too_large)
+    alloc_static(body_too_large)
 
     /*empty_body = PyBytes_FromString("");
     if(!empty_body)
@@ -25,7 +25,14 @@ enum Parser_connection {
   PARSER_KEEP_ALIVE
 };
 
+static unsigned long const CONTENT_LENGTH_UNSET = ULONG_MAX;
+
+// buffers of this size come from a pool shared by the connections of the
+// worker, they are given back once everything read was parsed
 #define PARSER_INITIAL_BUFFER_SIZE 4096
+#define PARSER_POOL_LEN 256
+// smallest free space handed out to the event loop for a single read
+#define PARSER_MIN_READ 1024
 
 typedef struct {
 #ifdef PARSER_STANDALONE
@@ -36,15 +43,34 @@ typedef struct {
     enum Parser_transfer transfer;
     enum Parser_connection connection;
 
+    // how much of the headers was there on the last parse attempt,
+    // picohttpparser only looks for the end of the headers past it
+    size_t headers_len;
     unsigned long content_length;
+    // requests over the limits are answered with 431 or 413 as soon as
+    // that is known, without buffering the rest
+    size_t max_header_size;
+    size_t max_headers;
+    unsigned long max_body_size;
+    // max_body_size or the limit of the route of the current request
+    unsigned long body_limit;
     struct phr_chunked_decoder chunked_decoder;
     size_t chunked_offset;
-
+    // set while the protocol can't take more requests, parsing the
+    // buffered data continues from Parser_resume
+    bool paused;
+    // Parser_resume can be called from callbacks of the parse loop, the
+    // loop itself continues then
+    bool parsing;
+    // the body of the current request goes to the protocol chunk by
+    // chunk as it arrives instead of being buffered
+    bool stream;
+
+    // NULL while there is nothing to parse
     char* buffer;
     size_t buffer_start;
     size_t buffer_end;
     size_t buffer_capacity;
-    char inline_buffer[PARSER_INITIAL_BUFFER_SIZE];
 
 #ifdef PARSER_STANDALONE
     PyObject* on_headers;
@@ -68,6 +94,28 @@ Parser_dealloc(Parser* self);
 Parser*
 Parser_feed(Parser* self, PyObject* py_data);
 
+char*
+Parser_get_buffer(Parser* self, size_t sizehint, size_t* len);
+
+Parser*
+Parser_buffer_updated(Parser* self, size_t nbytes);
+
+Parser*
+Parser_pause(Parser* self);
+
+Parser*
+Parser_resume(Parser* self);
+
+void
+Parser_stream_body(Parser* self);
+
+void
+Parser_set_limits(Parser* self, size_t max_header_size, size_t max_headers,
+                  unsigned long max_body_size);
+
+bool
+Parser_limit_body(Parser* self, unsigned long body_limit);
+
 Parser*
 Parser_feed_disconnect(Parser* self);
 
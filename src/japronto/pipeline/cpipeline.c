@@ -1,3 +1,5 @@
+#include <sys/param.h>
+
 #include <Python.h>
 #include "structmember.h"
 
@@ -26,6 +28,10 @@ Pipeline_new(Pipeline* self)
 
   self->ready = NULL;
   self->task_done = NULL;
+  self->queue = self->inline_queue;
+  self->queue_start = 0;
+  self->queue_len = 0;
+  self->queue_capacity = PIPELINE_INITIAL_CAPACITY;
 
 #ifdef PIPELINE_OPAQUE
   finally:
@@ -45,6 +51,9 @@ Pipeline_dealloc(Pipeline* self)
 #endif
   Py_XDECREF(self->task_done);
 
+  if(self->queue != self->inline_queue)
+    free(self->queue);
+
 #ifdef PIPELINE_OPAQUE
   Py_TYPE(self)->tp_free((PyObject*)self);
 #endif
@@ -74,7 +83,7 @@ Pipeline_init(Pipeline* self, void* (*ready)(PipelineEntry, PyObject*), PyObject
     goto error;
 
   self->queue_start = 0;
-  self->queue_end = 0;
+  self->queue_len = 0;
 
   goto finally;
 
@@ -91,15 +100,19 @@ Pipeline__task_done(Pipeline* self, PyObject* task)
 {
   PyObject* result = Py_True;
 
-  PipelineEntry *queue_entry;
-  for(queue_entry = self->queue + self->queue_start;
-      queue_entry < self->queue + self->queue_end; queue_entry++) {
+  if(PIPELINE_EMPTY(self))
+    // an earlier callback already flushed this task together with it's own
+    goto finally;
+
+  while(!PIPELINE_EMPTY(self)) {
+    // ready can queue more entries and move the queue, don't keep pointers
+    PipelineEntry queue_entry = self->queue[self->queue_start];
     PyObject* done = NULL;
     PyObject* done_result = NULL;
     result = Py_True;
 
-    if(PipelineEntry_is_task(*queue_entry)) {
-      task = PipelineEntry_get_task(*queue_entry);
+    if(PipelineEntry_is_task(queue_entry)) {
+      task = PipelineEntry_get_task(queue_entry);
 
       if(!(done = PyObject_GetAttrString(task, "done")))
         goto loop_error;
@@ -115,15 +128,18 @@ Pipeline__task_done(Pipeline* self, PyObject* task)
 
 #ifdef PIPELINE_OPAQUE
     PyObject* tmp;
-    if(!(tmp = PyObject_CallFunctionObjArgs(self->ready, *queue_entry, NULL)))
+    if(!(tmp = PyObject_CallFunctionObjArgs(self->ready, queue_entry, NULL)))
       goto loop_error;
     Py_DECREF(tmp);
 #else
-    if(!self->ready(*queue_entry, self->protocol))
+    if(!self->ready(queue_entry, self->protocol))
       goto loop_error;
 #endif
 
-    PipelineEntry_DECREF(*queue_entry);
+    self->queue_start = (self->queue_start + 1) % self->queue_capacity;
+    self->queue_len--;
+
+    PipelineEntry_DECREF(queue_entry);
 
     goto loop_finally;
 
@@ -139,8 +155,6 @@ Pipeline__task_done(Pipeline* self, PyObject* task)
       break;
   }
 
-  self->queue_start = queue_entry - self->queue;
-
 #ifndef PIPELINE_OPAQUE
   if(PIPELINE_EMPTY(self))
     // we became empty so release protocol
@@ -157,31 +171,62 @@ Pipeline__task_done(Pipeline* self, PyObject* task)
   return result;
 }
 
-#ifdef PIPELINE_OPAQUE
+static Pipeline*
+Pipeline_grow(Pipeline* self)
+{
+  size_t capacity = self->queue_capacity * 2;
+  PipelineEntry* queue;
+
+  if(!(queue = malloc(capacity * sizeof(PipelineEntry))))
+    return (Pipeline*)PyErr_NoMemory();
+
+  // unwrap the ring so it starts at the beginning of the new queue
+  size_t head_len = MIN(self->queue_len, self->queue_capacity - self->queue_start);
+  memcpy(queue, self->queue + self->queue_start,
+         head_len * sizeof(PipelineEntry));
+  memcpy(queue + head_len, self->queue,
+         (self->queue_len - head_len) * sizeof(PipelineEntry));
+
+  if(self->queue != self->inline_queue)
+    free(self->queue);
+
+  self->queue = queue;
+  self->queue_start = 0;
+  self->queue_capacity = capacity;
+
+  return self;
+}
+
+
+/* Puts entry at position index of the queue, index is either the length
+   of the queue or 1 to go right behind the entry at the front. */
 static PyObject*
-#else
-PyObject*
-#endif
-Pipeline_queue(Pipeline* self, PipelineEntry entry)
+_queue(Pipeline* self, PipelineEntry entry, size_t index)
 {
   PyObject* result = Py_None;
   PyObject* add_done_callback = NULL;
 
+  if(self->queue_len == self->queue_capacity && !Pipeline_grow(self))
+    goto error;
+
   if(PIPELINE_EMPTY(self)) {
-    self->queue_start = self->queue_end = 0;
+    self->queue_start = 0;
 #ifndef PIPELINE_OPAQUE
     // we will become non empty so hold a reference to protocol
     Py_INCREF(self->protocol);
 #endif
   }
 
-  assert(self->queue_end < sizeof(self->queue) / sizeof(self->queue[0]));
+  for(size_t i = self->queue_len; i > index; i--)
+    self->queue[(self->queue_start + i) % self->queue_capacity] =
+      self->queue[(self->queue_start + i - 1) % self->queue_capacity];
 
-  PipelineEntry* queue_entry = self->queue + self->queue_end;
+  PipelineEntry* queue_entry = self->queue +
+    (self->queue_start + index) % self->queue_capacity;
   *queue_entry = entry;
   PipelineEntry_INCREF(*queue_entry);
 
-  self->queue_end++;
+  self->queue_len++;
 
   if(PipelineEntry_is_task(entry)) {
     PyObject* task = PipelineEntry_get_task(entry);
@@ -201,6 +246,18 @@ Pipeline_queue(Pipeline* self, PipelineEntry entry)
 
   finally:
   Py_XDECREF(add_done_callback);
+  return result;
+}
+
+
+#ifdef PIPELINE_OPAQUE
+static PyObject*
+#else
+PyObject*
+#endif
+Pipeline_queue(Pipeline* self, PipelineEntry entry)
+{
+  PyObject* result = _queue(self, entry, self->queue_len);
 #ifdef PIPELINE_OPAQUE
   Py_XINCREF(result);
 #endif
@@ -208,19 +265,31 @@ Pipeline_queue(Pipeline* self, PipelineEntry entry)
 }
 
 
+#ifndef PIPELINE_OPAQUE
+/* Queues entry ahead of everything but the entry at the front. Called
+   while the front entry is being written to keep the entries behind it
+   waiting for entry as well. */
+PyObject*
+Pipeline_queue_next(Pipeline* self, PipelineEntry entry)
+{
+  return _queue(self, entry, MIN(self->queue_len, 1));
+}
+#endif
+
+
 #ifndef PIPELINE_OPAQUE
 void*
 Pipeline_cancel(Pipeline* self)
 {
   void* result = self;
 
-  PipelineEntry *queue_entry;
-  for(queue_entry = self->queue + self->queue_start;
-      queue_entry < self->queue + self->queue_end; queue_entry++) {
-    if(!PipelineEntry_is_task(*queue_entry))
+  for(size_t i = 0; i < self->queue_len; i++) {
+    PipelineEntry queue_entry =
+      self->queue[(self->queue_start + i) % self->queue_capacity];
+    if(!PipelineEntry_is_task(queue_entry))
       continue;
 
-    PyObject* task = PipelineEntry_get_task(*queue_entry);
+    PyObject* task = PipelineEntry_get_task(queue_entry);
     PyObject* cancel = NULL;
 
     if(!(cancel = PyObject_GetAttrString(task, "cancel")))
@@ -21,11 +21,10 @@ PipelineEntry_is_task(PipelineEntry entry)
 static inline void
 PipelineEntry_DECREF(PipelineEntry entry)
 {
+    // if not real task this is response, it can be embedded in request
+    // so release it first
+    Py_XDECREF(entry.task);
     Py_DECREF(entry.request);
-    // if not real task this was response,
-    // that was inside request that was already freed above
-    if(entry.is_task)
-      Py_XDECREF(entry.task);
 }
 
 static inline void
@@ -69,6 +68,8 @@ PipelineEntry_get_task(PipelineEntry entry)
 #endif
 
 
+#define PIPELINE_INITIAL_CAPACITY 16
+
 typedef struct {
   PyObject_HEAD
 #ifdef PIPELINE_OPAQUE
@@ -78,13 +79,17 @@ typedef struct {
   PyObject* protocol;
 #endif
   PyObject* task_done;
-  PipelineEntry queue[10];
+  // ring buffer, starts inline and moves to the heap when it grows
+  PipelineEntry* queue;
   size_t queue_start;
-  size_t queue_end;
+  size_t queue_len;
+  size_t queue_capacity;
+  PipelineEntry inline_queue[PIPELINE_INITIAL_CAPACITY];
 } Pipeline;
 
 
-#define PIPELINE_EMPTY(p) ((p)->queue_start == (p)->queue_end)
+#define PIPELINE_EMPTY(p) (!(p)->queue_len)
+#define PIPELINE_LEN(p) ((p)->queue_len)
 
 #ifndef PIPELINE_OPAQUE
 PyObject*
@@ -99,6 +104,9 @@ Pipeline_init(Pipeline* self, void* (*ready)(PipelineEntry, PyObject*), PyObject
 PyObject*
 Pipeline_queue(Pipeline* self, PipelineEntry entry);
 
+PyObject*
+Pipeline_queue_next(Pipeline* self, PipelineEntry entry);
+
 void*
 Pipeline_cancel(Pipeline* self);
 
@@ -155,6 +155,33 @@ def test_fake_future(make_pipeline, case):
     assert FakeFuture.cnt == 0
 
 
+@parametrize_make_pipeline()
+def test_deep(make_pipeline):
+    pipeline, results = make_pipeline()
+
+    pending = []
+    for i in range(100):
+        fut = FakeFuture()
+        pipeline.queue(fut)
+        pending.append((i, fut))
+
+        # resolve slower than queueing so the queue wraps around and grows
+        if i % 3 == 2:
+            for value, fut in pending[:2]:
+                fut.set_result(value)
+            del pending[:2]
+
+    for value, fut in pending:
+        fut.set_result(value)
+    del pending, fut
+
+    assert pipeline.empty
+    assert results == list(range(100))
+
+    gc.collect()
+    assert FakeFuture.cnt == 0
+
+
 def parametrize_loop():
     return pytest.mark.parametrize(
         'loop', [uvloop.new_event_loop(), asyncio.new_event_loop()],
@@ -0,0 +1,51 @@
+#pragma once
+
+#include <stdlib.h>
+
+// Free list of equally sized blocks shared by the connections of a worker.
+// Connections waiting for their next request give their buffers back and
+// take them again on the next read, at most max_len blocks are kept and
+// the rest is freed. Workers run a single event loop so there is no
+// locking.
+
+typedef struct PoolBlock {
+  struct PoolBlock* next;
+} PoolBlock;
+
+typedef struct {
+  PoolBlock* free;
+  size_t len;
+  size_t max_len;
+  size_t block_size;
+} Pool;
+
+#define POOL_INIT(block_size, max_len) {NULL, 0, max_len, block_size}
+
+
+static inline void*
+Pool_take(Pool* self)
+{
+  PoolBlock* block = self->free;
+
+  if(!block)
+    return malloc(self->block_size);
+
+  self->free = block->next;
+  self->len--;
+
+  return block;
+}
+
+
+static inline void
+Pool_give(Pool* self, void* block)
+{
+  if(self->len == self->max_len) {
+    free(block);
+    return;
+  }
+
+  ((PoolBlock*)block)->next = self->free;
+  self->free = block;
+  self->len++;
+}
@@ -0,0 +1,38 @@
+class Resume:
+    """Awaitable continuing a coroutine that was already stepped once.
+
+       The protocol runs coroutine handlers eagerly until they first
+       suspend. The value the coroutine yielded (usually a future it
+       awaits) has to be handed to the task that takes over, otherwise
+       the task would resume the coroutine before the future is done."""
+    __slots__ = ('coro', 'yielded')
+
+    def __init__(self, coro, yielded):
+        self.coro = coro
+        self.yielded = yielded
+
+    def __await__(self):
+        coro = self.coro
+        yielded = self.yielded
+        self.coro = self.yielded = None
+
+        while True:
+            try:
+                value = yield yielded
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as e:
+                try:
+                    yielded = coro.throw(e)
+                except StopIteration as stop:
+                    return stop.value
+            else:
+                try:
+                    yielded = coro.send(value)
+                except StopIteration as stop:
+                    return stop.value
+
+
+async def resume(coro, yielded):
+    return await Resume(coro, yielded)
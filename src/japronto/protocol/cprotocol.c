@@ -8,11 +8,27 @@
 #include "capsule.h"
 #include "match_dict.h"
 
+#if PY_VERSION_HEX < 0x030900a4
+#define Py_SET_SIZE(o, size) (Py_SIZE(o) = (size))
+#endif
+
 #ifdef PARSER_STANDALONE
 static PyObject* Parser;
 #endif
 static PyObject* PyRequest;
 static PyObject* RouteNotFoundException;
+static PyObject* resume_coro;
+static PyObject* BodyStream;
+static PyObject* write_body;
+#if PY_VERSION_HEX >= 0x030b0000
+// ("context",) for passing the context to create_task
+static PyObject* context_kwnames;
+#endif
+
+static PyBytesObject* gather_pool[GATHER_POOL_LEN];
+static size_t gather_pool_len = 0;
+// the max_length of the pooled gather buffers
+static size_t gather_pool_capacity = 0;
 
 static Request_CAPI* request_capi;
 static Matcher_CAPI* matcher_capi;
@@ -35,16 +51,33 @@ Protocol_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
   Parser_new(&self->parser);
 #endif
   Pipeline_new(&self->pipeline);
-  Request_new(request_capi->RequestType, &self->static_request);
+  self->static_request = NULL;
   self->app = NULL;
   self->matcher = NULL;
+  self->request_extensions = NULL;
   self->error_handler = NULL;
   self->transport = NULL;
   self->write = NULL;
   self->create_task = NULL;
+  self->create_future = NULL;
+  self->drain_waiter = NULL;
+  self->cache_lookup = NULL;
+  self->cache_store = NULL;
   self->request_logger = NULL;
+#ifdef REAPER_ENABLED
+  self->reaper = NULL;
+  Timer_init(&self->timer);
+#endif
 
+  self->gather.responses = NULL;
+  self->gather.responses_end = 0;
   self->gather.prev_buffer = NULL;
+  self->pipeline_full = false;
+  self->writing_paused = false;
+  self->stream_full = false;
+  self->reading_paused = false;
+  self->matcher_entry = NULL;
+  self->stream = NULL;
 
   finally:
   return (PyObject*)self;
@@ -54,16 +87,29 @@ Protocol_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 static void
 Protocol_dealloc(Protocol* self)
 {
+  for(size_t i = 0; i < self->gather.responses_end; i++)
+    Py_DECREF(self->gather.responses[i]);
+  PyMem_Free(self->gather.responses);
   Py_XDECREF(self->gather.prev_buffer);
+  Py_XDECREF(self->stream);
   Py_XDECREF(self->request_logger);
+  Py_XDECREF(self->cache_store);
+  Py_XDECREF(self->cache_lookup);
+  Py_XDECREF(self->drain_waiter);
+  Py_XDECREF(self->create_future);
   Py_XDECREF(self->create_task);
   Py_XDECREF(self->write);
   Py_XDECREF(self->writelines);
   Py_XDECREF(self->transport);
   Py_XDECREF(self->error_handler);
+  Py_XDECREF(self->request_extensions);
   Py_XDECREF(self->matcher);
   Py_XDECREF(self->app);
-  Request_dealloc(&self->static_request);
+#ifdef REAPER_ENABLED
+  Timer_cancel(&self->timer);
+  Py_XDECREF(self->reaper);
+#endif
+  Py_XDECREF(self->static_request);
   Pipeline_dealloc(&self->pipeline);
 #ifdef PARSER_STANDALONE
   Py_XDECREF(self->feed_disconnect);
@@ -85,8 +131,17 @@ Protocol_init(Protocol* self, PyObject *args, PyObject *kw)
   int result = 0;
   PyObject* loop = NULL;
   PyObject* log_request = NULL;
+  PyObject* gather_settings = NULL;
+  PyObject* no_args = NULL;
+  PyObject* max_pipeline_depth = NULL;
+  PyObject* stream_buffer_size = NULL;
+  PyObject* response_cache = NULL;
 #ifdef PARSER_STANDALONE
   PyObject* parser = NULL;
+#else
+  PyObject* request_limits = NULL;
+#endif
+#ifdef PARSER_STANDALONE
 
   PyObject* on_headers = PyObject_GetAttrString((PyObject*)self, "on_headers");
   if(!on_headers) // FIXME leak
@@ -126,6 +181,18 @@ Protocol_init(Protocol* self, PyObject *args, PyObject *kw)
   if(!self->matcher)
     goto error;
 
+#ifdef REAPER_ENABLED
+  if(!(self->reaper = (Reaper*)PyObject_GetAttrString(self->app, "_reaper")))
+    goto error;
+#endif
+
+  if(!(self->request_extensions = PyObject_GetAttrString(
+       self->app, "_request_extension_table")))
+    goto error;
+
+  if(!PyDict_Size(self->request_extensions))
+    Py_CLEAR(self->request_extensions);
+
   self->error_handler = PyObject_GetAttrString(self->app, "error_handler");
   if(!self->error_handler)
     goto error;
@@ -138,6 +205,18 @@ Protocol_init(Protocol* self, PyObject *args, PyObject *kw)
   if(!self->create_task)
     goto error;
 
+  if(!(self->create_future = PyObject_GetAttrString(loop, "create_future")))
+    goto error;
+
+  if(!(response_cache = PyObject_GetAttrString(self->app, "_response_cache")))
+    goto error;
+
+  if(!(self->cache_lookup = PyObject_GetAttrString(response_cache, "lookup")))
+    goto error;
+
+  if(!(self->cache_store = PyObject_GetAttrString(response_cache, "store")))
+    goto error;
+
   if(!(log_request = PyObject_GetAttrString(self->app, "_log_request")))
     goto error;
 
@@ -146,18 +225,108 @@ Protocol_init(Protocol* self, PyObject *args, PyObject *kw)
       goto error;
   }
 
+  if(!(gather_settings = PyObject_GetAttrString(self->app, "_gather_settings")))
+    goto error;
+
+  if(!(no_args = PyTuple_New(0)))
+    goto error;
+
+  static char* gather_kwlist[] = {
+    "max_responses", "max_length", "writelines", NULL};
+  Py_ssize_t max_responses = GATHER_MAX_RESP;
+  Py_ssize_t max_len = GATHER_MAX_LEN;
+  int writelines = false;
+
+  if(!PyArg_ParseTupleAndKeywords(
+      no_args, gather_settings, "|nnp", gather_kwlist,
+      &max_responses, &max_len, &writelines))
+    goto error;
+
+  if(max_responses < 1 || max_len < 1) {
+    PyErr_SetString(
+      PyExc_ValueError, "max_responses and max_length must be positive");
+    goto error;
+  }
+
+  if(!(self->gather.responses = PyMem_New(PyObject*, max_responses + 1))) {
+    PyErr_NoMemory();
+    goto error;
+  }
+
   self->gather.responses_end = 0;
   self->gather.len = 0;
+  self->gather.max_responses = (size_t)max_responses;
+  self->gather.max_len = (size_t)max_len;
+  self->gather.writelines = writelines;
+
+  if(!(max_pipeline_depth = PyObject_GetAttrString(self->app, "_max_pipeline_depth")))
+    goto error;
+
+  if((self->max_pipeline_depth = PyLong_AsSize_t(max_pipeline_depth)) == (size_t)-1)
+    goto error;
+
+  if(!self->max_pipeline_depth) {
+    PyErr_SetString(PyExc_ValueError, "max_pipeline_depth must be positive");
+    goto error;
+  }
+
+  if(!(stream_buffer_size = PyObject_GetAttrString(self->app, "_stream_buffer_size")))
+    goto error;
+
+  if((self->stream_buffer_size = PyLong_AsSsize_t(stream_buffer_size)) == -1
+     && PyErr_Occurred())
+    goto error;
+
+  if(self->stream_buffer_size < 1) {
+    PyErr_SetString(PyExc_ValueError, "stream_buffer_size must be positive");
+    goto error;
+  }
+
+#ifndef PARSER_STANDALONE
+  if(!(request_limits = PyObject_GetAttrString(self->app, "_request_limits")))
+    goto error;
+
+  Py_ssize_t max_header_size;
+  Py_ssize_t max_headers;
+  PyObject* max_body_size;
+  unsigned long body_limit = CONTENT_LENGTH_UNSET;
+
+  if(!PyArg_ParseTuple(
+      request_limits, "nnO", &max_header_size, &max_headers, &max_body_size))
+    goto error;
+
+  if(max_body_size != Py_None) {
+    if((body_limit = PyLong_AsUnsignedLong(max_body_size)) == (unsigned long)-1
+       && PyErr_Occurred())
+      goto error;
+  }
+
+  if(max_header_size < 1 || max_headers < 1) {
+    PyErr_SetString(
+      PyExc_ValueError, "max_header_size and max_headers must be positive");
+    goto error;
+  }
+
+  Parser_set_limits(
+    &self->parser, (size_t)max_header_size, (size_t)max_headers, body_limit);
+#endif
 
   goto finally;
 
   error:
   result = -1;
   finally:
+  Py_XDECREF(response_cache);
+  Py_XDECREF(stream_buffer_size);
+  Py_XDECREF(max_pipeline_depth);
+  Py_XDECREF(no_args);
+  Py_XDECREF(gather_settings);
   Py_XDECREF(log_request);
   Py_XDECREF(loop);
 #ifdef PARSER_STANDALONE
   Py_XDECREF(parser);
+#else
+  Py_XDECREF(request_limits);
 #endif
   return result;
 }
@@ -174,7 +343,11 @@ Protocol_connection_made(Protocol* self, PyObject* transport)
   self->false_cnt = Py_REFCNT(Py_False);
 #endif
 
+  PyObject* result = Py_None;
   PyObject* connections = NULL;
+  PyObject* write_buffer_settings = NULL;
+  PyObject* set_write_buffer_limits = NULL;
+  PyObject* no_args = NULL;
   self->transport = transport;
   Py_INCREF(self->transport);
 
@@ -184,13 +357,34 @@ Protocol_connection_made(Protocol* self, PyObject* transport)
   if(!(self->writelines = PyObject_GetAttrString(transport, "writelines")))
     goto error;
 
+  if(!(write_buffer_settings = PyObject_GetAttrString(
+       self->app, "_write_buffer_settings")))
+    goto error;
+
+  if(PyObject_IsTrue(write_buffer_settings)) {
+    // the transport calls pause_writing once it buffers more than high
+    if(!(set_write_buffer_limits = PyObject_GetAttrString(
+         transport, "set_write_buffer_limits")))
+      goto error;
+
+    if(!(no_args = PyTuple_New(0)))
+      goto error;
+
+    PyObject* tmp;
+    if(!(tmp = PyObject_Call(
+         set_write_buffer_limits, no_args, write_buffer_settings)))
+      goto error;
+    Py_DECREF(tmp);
+  }
+
   if(!(connections = PyObject_GetAttrString(self->app, "_connections")))
     goto error;
 
 #ifdef REAPER_ENABLED
-  self->idle_time = 0;
-  self->read_ops = 0;
-  self->last_read_ops = 0;
+  self->last_active = self->reaper->wheel.tick;
+  self->request_start = self->last_active;
+  TimerWheel_add(
+    &self->reaper->wheel, &self->timer, Protocol_deadline(self));
 #endif
 
   if(PySet_Add(connections, (PyObject*)self) == -1)
@@ -201,11 +395,15 @@ Protocol_connection_made(Protocol* self, PyObject* transport)
   goto finally;
 
   error:
-  return NULL;
+  result = NULL;
 
   finally:
+  Py_XDECREF(no_args);
+  Py_XDECREF(set_write_buffer_limits);
+  Py_XDECREF(write_buffer_settings);
   Py_XDECREF(connections);
-  Py_RETURN_NONE;
+  Py_XINCREF(result);
+  return result;
 }
 
 
@@ -234,6 +432,259 @@ Protocol_close(Protocol* self)
 }
 
 
+static inline Protocol*
+Protocol_call_transport(Protocol* self, const char* name)
+{
+  Protocol* result = self;
+  PyObject* method = NULL;
+  PyObject* tmp;
+
+  if(!(method = PyObject_GetAttrString(self->transport, name)))
+    goto error;
+
+  if(!(tmp = PyObject_CallFunctionObjArgs(method, NULL)))
+    goto error;
+  Py_DECREF(tmp);
+
+  goto finally;
+
+  error:
+  result = NULL;
+
+  finally:
+  Py_XDECREF(method);
+  return result;
+}
+
+
+/* Stops reading and parsing requests once max_pipeline_depth responses
+   are waiting to be written or the transport buffers too much. */
+static inline void Gather_release(Gather* gather);
+
+#ifndef PARSER_STANDALONE
+/* Called after a read was parsed. A connection waiting for its next
+   request gives its buffers back to the worker's pools, the parser took
+   its buffer back already. */
+static inline void
+Protocol_idle(Protocol* self)
+{
+  if(self->parser.buffer || self->parser.state != PARSER_HEADERS)
+    return;
+
+  // goes back to the freelist of crequest
+  Py_CLEAR(self->static_request);
+
+  Gather_release(&self->gather);
+}
+#endif
+
+
+static inline Protocol*
+Protocol_pause_reading(Protocol* self)
+{
+  if(self->reading_paused)
+    return self;
+
+  self->reading_paused = true;
+#ifndef PARSER_STANDALONE
+  Parser_pause(&self->parser);
+#endif
+
+  return Protocol_call_transport(self, "pause_reading");
+}
+
+
+static inline Protocol*
+Protocol_resume_reading(Protocol* self)
+{
+  if(!self->reading_paused || self->pipeline_full || self->writing_paused
+     || self->stream_full || self->closed)
+    return self;
+
+  self->reading_paused = false;
+
+  if(!Protocol_call_transport(self, "resume_reading"))
+    return NULL;
+
+#ifndef PARSER_STANDALONE
+  if(!Parser_resume(&self->parser))
+    return NULL;
+
+  Protocol_idle(self);
+#endif
+
+  return self;
+}
+
+
+static inline Protocol*
+Protocol_pipeline_queued(Protocol* self)
+{
+  if(self->pipeline_full
+     || PIPELINE_LEN(&self->pipeline) < self->max_pipeline_depth)
+    return self;
+
+  self->pipeline_full = true;
+
+  return Protocol_pause_reading(self);
+}
+
+
+static inline Protocol*
+Protocol_pipeline_queue(Protocol* self, PipelineEntry entry)
+{
+  if(!Pipeline_queue(&self->pipeline, entry))
+    return NULL;
+
+  return Protocol_pipeline_queued(self);
+}
+
+
+/* Starts writing the body of a streaming response. The writer goes into
+   the pipeline right behind the response being written, entries without
+   a request are writers and later responses wait for them. */
+static inline Protocol*
+Protocol_write_stream(Protocol* self, Response* response)
+{
+  Protocol* result = self;
+  PyObject* writer = NULL;
+  PyObject* task = NULL;
+
+  // a body of unknown length is delimited by closing the connection
+  // unless the client understands chunked encoding
+  bool chunked = Response_chunked(response) && response->minor_version == 1;
+  bool close = (Response_chunked(response) && !chunked)
+    || response->keep_alive == KEEP_ALIVE_FALSE;
+
+  if(!(writer = PyObject_CallFunctionObjArgs(
+       write_body, self, self->transport, response->stream,
+       chunked ? Py_True : Py_False, close ? Py_True : Py_False, NULL)))
+    goto error;
+
+  if(!(task = PyObject_CallFunctionObjArgs(self->create_task, writer, NULL)))
+    goto error;
+
+  if(!Pipeline_queue_next(&self->pipeline, (PipelineEntry){true, Py_None, task}))
+    goto error;
+
+  if(!Protocol_pipeline_queued(self))
+    goto error;
+
+  goto finally;
+
+  error:
+  result = NULL;
+
+  finally:
+  Py_XDECREF(task);
+  Py_XDECREF(writer);
+  return result;
+}
+
+
+static PyObject*
+Protocol_pause_writing(Protocol* self)
+{
+  self->writing_paused = true;
+
+  if(!Protocol_pause_reading(self))
+    return NULL;
+
+  Py_RETURN_NONE;
+}
+
+
+static PyObject*
+Protocol_resume_writing(Protocol* self)
+{
+  PyObject* drain_waiter = self->drain_waiter;
+
+  self->writing_paused = false;
+
+  if(drain_waiter) {
+    self->drain_waiter = NULL;
+
+    PyObject* tmp;
+    if(!(tmp = PyObject_CallMethod(drain_waiter, "set_result", "O", Py_None))) {
+      Py_DECREF(drain_waiter);
+      return NULL;
+    }
+    Py_DECREF(tmp);
+    Py_DECREF(drain_waiter);
+  }
+
+  if(!Protocol_resume_reading(self))
+    return NULL;
+
+  Py_RETURN_NONE;
+}
+
+
+/* Returns a future done once writing resumes or None when writing isn't
+   paused. */
+static PyObject*
+Protocol_drain(Protocol* self)
+{
+  if(!self->writing_paused || self->closed)
+    Py_RETURN_NONE;
+
+  if(!self->drain_waiter && !(self->drain_waiter =
+       PyObject_CallFunctionObjArgs(self->create_future, NULL)))
+    return NULL;
+
+  Py_INCREF(self->drain_waiter);
+  return self->drain_waiter;
+}
+
+
+/* Called by the stream of a streaming route when the handler falls
+   behind, calls of streams whose body was already read are ignored. */
+static PyObject*
+Protocol_pause_stream(Protocol* self, PyObject* stream)
+{
+  if(stream != self->stream)
+    Py_RETURN_NONE;
+
+  self->stream_full = true;
+
+  if(!Protocol_pause_reading(self))
+    return NULL;
+
+  Py_RETURN_NONE;
+}
+
+
+static PyObject*
+Protocol_resume_stream(Protocol* self, PyObject* stream)
+{
+  if(stream != self->stream)
+    Py_RETURN_NONE;
+
+  self->stream_full = false;
+
+  if(!Protocol_resume_reading(self))
+    return NULL;
+
+  Py_RETURN_NONE;
+}
+
+
+/* Forgets the stream once the body was read or the handler responded
+   without reading all of it, the rest is dropped in that case. */
+static inline Protocol*
+Protocol_end_stream(Protocol* self)
+{
+  Py_CLEAR(self->stream);
+
+  if(!self->stream_full)
+    return self;
+
+  self->stream_full = false;
+
+  return Protocol_resume_reading(self);
+}
+
+
 static PyObject*
 Protocol_connection_lost(Protocol* self, PyObject* args)
 {
@@ -252,6 +703,10 @@ Protocol_connection_lost(Protocol* self, PyObject* args)
     goto error;
 #endif
 
+#ifdef REAPER_ENABLED
+  Timer_cancel(&self->timer);
+#endif
+
   if(!(connections = PyObject_GetAttrString(self->app, "_connections")))
     goto error;
 
@@ -261,6 +716,11 @@ Protocol_connection_lost(Protocol* self, PyObject* args)
   if(!Pipeline_cancel(&self->pipeline))
     goto error;
 
+  // breaks the cycle between the protocol and the stream
+  Py_CLEAR(self->stream);
+  // the body writer waiting for it was cancelled with the pipeline
+  Py_CLEAR(self->drain_waiter);
+
 #ifdef PROTOCOL_TRACK_REFCNT
 printf("lost: %ld, %ld, %ld\n",
   (size_t)Py_REFCNT(Py_None), (size_t)Py_REFCNT(Py_True), (size_t)Py_REFCNT(Py_False));
@@ -281,11 +741,41 @@ printf("lost: %ld, %ld, %ld\n",
 }
 
 
+#ifdef REAPER_ENABLED
+/* Records a read, called before the data is parsed. */
+static inline void
+Protocol_touch(Protocol* self)
+{
+  self->last_active = self->reaper->wheel.tick;
+#ifndef PARSER_STANDALONE
+  // nothing is buffered so the headers of the next request start here
+  if(self->parser.buffer_start == self->parser.buffer_end)
+    self->request_start = self->last_active;
+#endif
+}
+
+
+/* Called after the data is parsed. Reads only move deadlines further
+   which the reaper catches up with once the timer expires, a state with
+   a shorter timeout has to bring the timer forward. */
+static inline void
+Protocol_rearm(Protocol* self)
+{
+  if(!Timer_armed(&self->timer))
+    return;
+
+  unsigned long deadline = Protocol_deadline(self);
+  if(deadline < self->timer.deadline)
+    TimerWheel_add(&self->reaper->wheel, &self->timer, deadline);
+}
+#endif
+
+
 static PyObject*
 Protocol_data_received(Protocol* self, PyObject* data)
 {
 #ifdef REAPER_ENABLED
-  self->read_ops++;
+  Protocol_touch(self);
 #endif
 
 #ifdef PARSER_STANDALONE
@@ -297,6 +787,12 @@ Protocol_data_received(Protocol* self, PyObject* data)
 #else
   if(!Parser_feed(&self->parser, data))
     goto error;
+
+  Protocol_idle(self);
+#endif
+
+#ifdef REAPER_ENABLED
+  Protocol_rearm(self);
 #endif
 
   goto finally;
@@ -308,34 +804,69 @@ Protocol_data_received(Protocol* self, PyObject* data)
 }
 
 
-static inline PyObject* Gather_flush(Gather* gather);
-
 #ifndef PARSER_STANDALONE
-Protocol*
-Protocol_on_incomplete(Protocol* self)
+static PyObject*
+Protocol_get_buffer(Protocol* self, PyObject* sizehint)
 {
-  Gather* gather = &self->gather;
-  PyObject* gather_buffer = NULL;
+  char* buffer;
+  size_t len;
 
-  if(!gather->len)
-    goto finally;
+  Py_ssize_t hint = PyLong_AsSsize_t(sizehint);
+  if(hint == -1 && PyErr_Occurred())
+    return NULL;
 
-  if(!(gather_buffer = Gather_flush(gather)))
+  // the loop reads straight into the parser buffer, the view is gone
+  // before the buffer can be moved by the next call
+  if(!(buffer = Parser_get_buffer(&self->parser, hint > 0 ? hint : 0, &len)))
+    return NULL;
+
+  return PyMemoryView_FromMemory(buffer, len, PyBUF_WRITE);
+}
+
+
+static PyObject*
+Protocol_buffer_updated(Protocol* self, PyObject* nbytes)
+{
+#ifdef REAPER_ENABLED
+  Protocol_touch(self);
+#endif
+
+  Py_ssize_t len = PyLong_AsSsize_t(nbytes);
+  if(len == -1 && PyErr_Occurred())
     goto error;
 
-  PyObject* tmp;
-  if(!(tmp = PyObject_CallFunctionObjArgs(self->write, gather_buffer, NULL)))
+  if(!Parser_buffer_updated(&self->parser, (size_t)len))
     goto error;
-  Py_DECREF(tmp);
+
+  Protocol_idle(self);
+
+#ifdef REAPER_ENABLED
+  Protocol_rearm(self);
+#endif
 
   goto finally;
 
   error:
-  self = NULL;
-
+  return NULL;
   finally:
-  Py_XDECREF(gather_buffer);
-  return self;
+  Py_RETURN_NONE;
+}
+#endif
+
+
+static inline Protocol* Protocol_write_gather(Protocol* self);
+#ifndef PARSER_STANDALONE
+static inline Protocol* Protocol_on_stream(Protocol* self);
+#endif
+
+#ifndef PARSER_STANDALONE
+Protocol*
+Protocol_on_incomplete(Protocol* self)
+{
+  if(!self->gather.len)
+    return self;
+
+  return Protocol_write_gather(self);
 }
 #endif
 
@@ -353,16 +884,47 @@ Protocol_on_headers(Protocol* self, char* method, size_t method_len,
                     void* headers, size_t num_headers)
 {
   Protocol* result = self;
+  MatchDictEntry* entries;
+  size_t entries_length;
 
-  Request_dealloc(&self->static_request);
-  Request_new(request_capi->RequestType, &self->static_request);
+  if(!self->static_request) {
+    if(!(self->static_request = (Request*)PyObject_CallFunctionObjArgs(
+         (PyObject*)request_capi->RequestType, NULL)))
+      goto error;
+  } else {
+    Request_dealloc(self->static_request);
+    Request_new(request_capi->RequestType, self->static_request);
+  }
 
   request_capi->Request_from_raw(
-    &self->static_request, method, method_len, path, path_len, minor_version,
+    self->static_request, method, method_len, path, path_len, minor_version,
     headers, num_headers);
 
+  self->matcher_entry = matcher_capi->Matcher_match_request(
+    (Matcher*)self->matcher, (PyObject*)self->static_request,
+    &entries, &entries_length);
+
+  request_capi->Request_set_match_dict_entries(
+    self->static_request, entries, entries_length);
+
+  unsigned long body_limit = self->parser.max_body_size;
+  if(self->matcher_entry && self->matcher_entry->max_body_size != SIZE_MAX)
+    body_limit = self->matcher_entry->max_body_size;
+
+  // the parser answers with 413 as soon as this returns
+  if(Parser_limit_body(&self->parser, body_limit))
+    goto finally;
+
+  if(self->matcher_entry && self->matcher_entry->stream) {
+    if(!Protocol_on_stream(self))
+      goto error;
+  }
+
   goto finally;
 
+  error:
+  result = NULL;
+
   finally:
   return result;
 }
@@ -388,10 +950,10 @@ Protocol_on_headers(Protocol* self, char* method, size_t method_len,
 
 
 static inline PyBytesObject*
-Bytes_FromSize(size_t size)
+Bytes_FromSize(size_t size, size_t capacity)
 {
   PyBytesObject* result;
-  if(!(result = malloc(sizeof(PyBytesObject) + GATHER_MAX_LEN)))
+  if(!(result = malloc(sizeof(PyBytesObject) + capacity)))
     return (PyBytesObject*)PyErr_NoMemory();
 
   result->ob_base.ob_base.ob_refcnt = 1;
@@ -402,6 +964,28 @@ Bytes_FromSize(size_t size)
 }
 
 
+/* Gives the buffer back to the pool unless the transport still holds it. */
+static inline void
+Gather_release(Gather* gather)
+{
+  PyBytesObject* buffer = gather->prev_buffer;
+
+  if(!buffer)
+    return;
+
+  gather->prev_buffer = NULL;
+
+  if(Py_REFCNT(buffer) == 1 && gather_pool_len < GATHER_POOL_LEN
+     && (!gather_pool_len || gather_pool_capacity == gather->max_len)) {
+    gather_pool_capacity = gather->max_len;
+    gather_pool[gather_pool_len++] = buffer;
+    return;
+  }
+
+  Py_DECREF(buffer);
+}
+
+
 static inline
 PyObject* Gather_flush(Gather* gather)
 {
@@ -412,17 +996,38 @@ PyObject* Gather_flush(Gather* gather)
     goto reset;
   }
 
+  if(gather->writelines) {
+    // hand the responses over as they are, the transport writes them
+    // with a single writev
+    PyObject* responses;
+    if(!(responses = PyList_New((Py_ssize_t)gather->responses_end)))
+      goto error;
+
+    for(size_t i = 0; i < gather->responses_end; i++)
+      PyList_SET_ITEM(responses, (Py_ssize_t)i, gather->responses[i]);
+
+    gather->responses_end = 0;
+    gather->len = 0;
+
+    return responses;
+  }
+
+  if(!gather->prev_buffer && gather_pool_len
+     && gather_pool_capacity == gather->max_len)
+    gather->prev_buffer = gather_pool[--gather_pool_len];
+
   if(gather->prev_buffer) {
     if(Py_REFCNT(gather->prev_buffer) == 1) {
       gather_buffer = gather->prev_buffer;
-      Py_SIZE(gather_buffer) = (ssize_t)gather->len;
+      Py_SET_SIZE(gather_buffer, (ssize_t)gather->len);
     } else {
       Py_DECREF(gather->prev_buffer);
       gather->prev_buffer = NULL;
     }
   }
 
-  if(!gather_buffer && !(gather_buffer = Bytes_FromSize(gather->len)))
+  if(!gather_buffer &&
+     !(gather_buffer = Bytes_FromSize(gather->len, gather->max_len)))
     goto error;
 
   size_t gather_offset = 0;
@@ -453,13 +1058,58 @@ PyObject* Gather_flush(Gather* gather)
 }
 
 
+static inline Protocol*
+Protocol_write_gather(Protocol* self)
+{
+  Protocol* result = self;
+  PyObject* gather_buffer = NULL;
+  PyObject* write;
+
+  if(!(gather_buffer = Gather_flush(&self->gather)))
+    goto error;
+
+  write = PyList_CheckExact(gather_buffer) ? self->writelines : self->write;
+
+  PyObject* tmp;
+  if(!(tmp = PyObject_CallFunctionObjArgs(write, gather_buffer, NULL)))
+    goto error;
+  Py_DECREF(tmp);
+
+  goto finally;
+
+  error:
+  result = NULL;
+
+  finally:
+  Py_XDECREF(gather_buffer);
+  return result;
+}
+
+
+/* Only plain successful responses are cached, cookies are likely meant
+   for a single client. */
+#define Response_cacheable(r) \
+  (!(r)->stream && !(r)->cookies \
+   && (!(r)->code || PyLong_AsLong((r)->code) == 200))
+
+
 static inline Protocol*
 Protocol_write_response_or_err(Protocol* self, PyObject* request, Response* response)
 {
     Protocol* result = self;
     PyObject* response_bytes = NULL;
     PyObject* error_result = NULL;
-    PyObject* gather_buffer = NULL;
+    PyObject* tmp;
+    Gather* gather = &self->gather;
+
+    if(response && ((Request*)request)->prerendered) {
+      // a constant response or a hit in the response cache
+      response_bytes = (PyObject*)response;
+      Py_INCREF(response_bytes);
+      response = NULL;
+
+      goto write;
+    }
 
     if(response && Py_TYPE(response) != response_capi->ResponseType)
     {
@@ -469,12 +1119,14 @@ Protocol_write_response_or_err(Protocol* self, PyObject* request, Response* resp
     }
 
     if(!response) {
+      // errors are not cached
+      Py_CLEAR(((Request*)request)->cache_key);
+
       error_result = PyObject_CallFunctionObjArgs(
         self->error_handler, request, ((Request*)request)->exception, NULL);
       if(!error_result)
         goto error;
 
-      ((Request*)request)->simple = false;
       if(!Protocol_write_response_or_err(self, request, (Response*)error_result))
         goto error;
 
@@ -482,10 +1134,16 @@ Protocol_write_response_or_err(Protocol* self, PyObject* request, Response* resp
     }
 
     if(!(response_bytes =
-         response_capi->Response_render(response, ((Request*)request)->simple)))
+         response_capi->Response_render(response)))
       goto error;
 
-    PyObject* tmp;
+    PyObject* cache_key = ((Request*)request)->cache_key;
+    if(cache_key && Response_cacheable(response)) {
+      if(!(tmp = PyObject_CallFunctionObjArgs(
+           self->cache_store, cache_key, response_bytes, NULL)))
+        goto error;
+      Py_DECREF(tmp);
+    }
 
     PyObject* done_callbacks = ((Request*)request)->done_callbacks;
     for(Py_ssize_t i = 0; done_callbacks && i < PyList_GET_SIZE(done_callbacks); i++) {
@@ -496,15 +1154,14 @@ Protocol_write_response_or_err(Protocol* self, PyObject* request, Response* resp
       Py_DECREF(tmp);
     }
 
-    Gather* gather = &self->gather;
-
-    if(!gather->enabled)
+    write:
+    if(!gather->enabled || (response && response->stream))
       goto maybe_flush;
 
-    if(gather->responses_end == GATHER_MAX_RESP)
+    if(gather->responses_end == gather->max_responses)
       goto maybe_flush;
 
-    if(gather->len + Py_SIZE(response_bytes) > GATHER_MAX_LEN)
+    if(gather->len + Py_SIZE(response_bytes) > gather->max_len)
       goto maybe_flush;
 
     gather->responses[gather->responses_end] = response_bytes;
@@ -518,12 +1175,16 @@ Protocol_write_response_or_err(Protocol* self, PyObject* request, Response* resp
     if(!gather->len)
       goto dont_flush;
 
-    if(!(gather_buffer = Gather_flush(gather)))
-      goto error;
+    if(gather->writelines) {
+      // the response that didn't fit goes out together with the gathered
+      gather->responses[gather->responses_end] = response_bytes;
+      gather->responses_end++;
+      gather->len += Py_SIZE(response_bytes);
+      response_bytes = NULL;
+    }
 
-    if(!(tmp = PyObject_CallFunctionObjArgs(self->write, gather_buffer, NULL)))
+    if(!Protocol_write_gather(self))
       goto error;
-    Py_DECREF(tmp);
 
     dont_flush:
 
@@ -533,13 +1194,27 @@ Protocol_write_response_or_err(Protocol* self, PyObject* request, Response* resp
       Py_DECREF(tmp);
     }
 
+    if(response && response->stream) {
+      if(!Protocol_write_stream(self, response))
+        goto error;
+    }
+
+    if(self->stream && ((Request*)request)->stream == self->stream) {
+      if(!Protocol_end_stream(self))
+        goto error;
+    }
+
     if(self->request_logger) {
       if(!(tmp = PyObject_CallFunctionObjArgs(self->request_logger, request, NULL)))
         goto error;
       Py_DECREF(tmp);
     }
 
-    if(response->keep_alive == KEEP_ALIVE_FALSE) {
+    bool close = response
+      ? response->keep_alive == KEEP_ALIVE_FALSE && !response->stream
+      : ((Request*)request)->keep_alive == KEEP_ALIVE_FALSE;
+
+    if(close) {
       if(!Protocol_close(self))
         goto error;
     }
@@ -550,7 +1225,6 @@ Protocol_write_response_or_err(Protocol* self, PyObject* request, Response* resp
     result = NULL;
 
     finally:
-    Py_XDECREF(gather_buffer);
     Py_XDECREF(error_result);
     Py_XDECREF(response_bytes);
     return result;
@@ -565,6 +1239,10 @@ static void* Protocol_pipeline_ready(PipelineEntry entry, PyObject* protocol)
   PyObject* request = entry.request;
   PyObject* task = entry.task;
 
+  if(request == Py_None)
+    // the writer of a streaming response finished, nothing to write
+    goto resume;
+
   if(PipelineEntry_is_task(entry)) {
     if(!(get_result = PyObject_GetAttrString(task, "result")))
       goto error;
@@ -586,6 +1264,17 @@ static void* Protocol_pipeline_ready(PipelineEntry entry, PyObject* protocol)
   // important: this breaks a cycle in case of an exception
   Py_CLEAR(((Request*)request)->exception);
 
+  resume:
+  // the entry being written is still in the pipeline, resume once it
+  // drained to half of max_pipeline_depth
+  if(self->pipeline_full &&
+     PIPELINE_LEN(&self->pipeline) - 1 <= self->max_pipeline_depth / 2) {
+    self->pipeline_full = false;
+
+    if(!Protocol_resume_reading(self))
+      goto error;
+  }
+
   goto finally;
 
   error:
@@ -599,75 +1288,126 @@ static void* Protocol_pipeline_ready(PipelineEntry entry, PyObject* protocol)
 }
 
 
-static inline Protocol*
-Protocol_handle_coro(Protocol* self, PyObject* request, PyObject* coro)
+/* Steps the coroutine once, this way handlers that never suspend
+   (cache hits, validation errors) don't pay for a Task and a round trip
+   through the pipeline. Returns 1 and sets response when the coroutine
+   finished, 0 when it suspended and was handed over to a Task or -1 on
+   error. */
+static inline int
+Protocol_handle_coro(Protocol* self, PyObject* request, PyObject* coro,
+                     PyObject** response)
 {
-  Protocol* result = self;
+  int result = 1;
+  PyObject* context = NULL;
+  PyObject* yielded = NULL;
+  PyObject* resumed = NULL;
   PyObject* task = NULL;
 
-  if(!(task = PyObject_CallFunctionObjArgs(self->create_task, coro, NULL)))
+  if(!PyCoro_CheckExact(coro)) {
+    if(!(task = PyObject_CallFunctionObjArgs(self->create_task, coro, NULL)))
+      goto error;
+
+    goto queue;
+  }
+
+  // as in a task the coroutine runs in a copy of the context, otherwise
+  // context variables it sets would leak into later requests
+  if(!(context = PyContext_CopyCurrent()))
     goto error;
 
-  if(!Pipeline_queue(&self->pipeline, (PipelineEntry){true, request, task}))
+  if(PyContext_Enter(context) == -1)
     goto error;
 
-  goto finally;
+#if PY_VERSION_HEX >= 0x030a0000
+  PySendResult sent = PyIter_Send(coro, Py_None, &yielded);
+#else
+  yielded = _PyGen_Send((PyGenObject*)coro, Py_None);
+#endif
 
-  error:
-  result = NULL;
+  if(PyContext_Exit(context) == -1)
+    goto error;
 
-  finally:
-  Py_XDECREF(task);
-  return result;
-}
+#if PY_VERSION_HEX >= 0x030a0000
+  switch(sent) {
+    case PYGEN_RETURN:
+    *response = yielded;
+    yielded = NULL;
+    goto finally;
 
+    case PYGEN_ERROR:
+    Protocol_catch_exception(request);
+    goto finally;
 
-#ifdef PARSER_STANDALONE
-static PyObject*
-Protocol_on_body(Protocol* self, PyObject *args)
+    case PYGEN_NEXT:
+    break;
+  }
 #else
-Protocol*
-Protocol_on_body(Protocol* self, char* body, size_t body_len, size_t tail_len)
+  if(!yielded) {
+    if(!PyErr_ExceptionMatches(PyExc_StopIteration)) {
+      Protocol_catch_exception(request);
+      goto finally;
+    }
+
+    if(_PyGen_FetchStopIterationValue(response) == -1)
+      goto error;
+
+    goto finally;
+  }
 #endif
-{
-#ifdef PARSER_STANDALONE
-  PyObject* result = Py_None;
+
+  // the coroutine suspended, it's response will be written from the
+  // pipeline so nothing can stay in gather
+  self->gather.enabled = false;
+
+  if(!(resumed = PyObject_CallFunctionObjArgs(
+       resume_coro, coro, yielded, NULL)))
+    goto error;
+
+  // the task continues in the same context
+#if PY_VERSION_HEX >= 0x030b0000
+  PyObject* args[] = {resumed, context};
+  if(!(task = PyObject_Vectorcall(
+       self->create_task, args, 1, context_kwnames)))
+    goto error;
 #else
-  Protocol* result = self;
-#endif
-  PyObject* request = NULL;
-  PyObject* handler_result = NULL;
-  MatchDictEntry* entries;
-  MatcherEntry* matcher_entry;
-  size_t entries_length;
-#ifdef PARSER_STANDALONE
-/*  PyObject* request;
-  if(!PyArg_ParseTuple(args, "O", &request))
+  // the task takes a copy of the current one
+  if(PyContext_Enter(context) == -1)
+    goto error;
+
+  task = PyObject_CallFunctionObjArgs(self->create_task, resumed, NULL);
+
+  if(PyContext_Exit(context) == -1 || !task)
     goto error;
-*/ // FIXME implement body setting
 #endif
 
-  matcher_entry = matcher_capi->Matcher_match_request(
-    (Matcher*)self->matcher, (PyObject*)&self->static_request,
-    &entries, &entries_length);
+  queue:
+  if(!Protocol_pipeline_queue(self, (PipelineEntry){true, request, task}))
+    goto error;
 
-  request_capi->Request_set_match_dict_entries(
-    &self->static_request, entries, entries_length);
+  result = 0;
 
-  request_capi->Request_set_body(
-    &self->static_request, body, body_len);
+  goto finally;
 
-  self->static_request.simple = matcher_entry && matcher_entry->simple;
+  error:
+  result = -1;
 
-  request = (PyObject*)&self->static_request;
-  if((matcher_entry && matcher_entry->coro_func) || !PIPELINE_EMPTY(&self->pipeline)) {
-    self->gather.enabled = false;
+  finally:
+  Py_XDECREF(task);
+  Py_XDECREF(resumed);
+  Py_XDECREF(yielded);
+  Py_XDECREF(context);
+  return result;
+}
 
-    if(!(request = request_capi->Request_clone(&self->static_request)))
-      goto error;
-  } else
-    // TODO: should be tweaked to minimal request length
-    self->gather.enabled = tail_len > 0;
+
+/* Calls the handler and writes the response or queues it behind the ones
+   still in the pipeline. */
+static inline Protocol*
+Protocol_handle_request(Protocol* self, PyObject* request,
+                        MatcherEntry* matcher_entry)
+{
+  Protocol* result = self;
+  PyObject* handler_result = NULL;
 
   ((Request*)request)->transport = self->transport;
   Py_INCREF(self->transport);
@@ -675,6 +1415,9 @@ Protocol_on_body(Protocol* self, char* body, size_t body_len, size_t tail_len)
   ((Request*)request)->app = self->app;
   Py_INCREF(self->app);
 
+  ((Request*)request)->extensions = self->request_extensions;
+  Py_XINCREF(self->request_extensions);
+
   ((Request*)request)->matcher_entry = matcher_entry;
 
   if(!matcher_entry) {
@@ -685,6 +1428,49 @@ Protocol_on_body(Protocol* self, char* body, size_t body_len, size_t tail_len)
     goto queue_or_write;
   }
 
+  if(matcher_entry->rendered) {
+    KEEP_ALIVE keep_alive =
+      request_capi->Request_get_keep_alive((Request*)request);
+
+    Py_ssize_t variant = ((Request*)request)->minor_version * 2
+      + (keep_alive == KEEP_ALIVE_FALSE);
+    PyObject* rendered = PyList_GET_ITEM(matcher_entry->rendered, variant);
+
+    if(!(handler_result = response_capi->Response_refresh_date(rendered)))
+      goto error;
+
+    if(handler_result != rendered) {
+      // keep the copy with the current date for the rest of the second
+      Py_INCREF(handler_result);
+      PyList_SetItem(matcher_entry->rendered, variant, handler_result);
+    }
+    ((Request*)request)->prerendered = true;
+
+    goto queue_or_write;
+  }
+
+  if(matcher_entry->cache) {
+    PyObject* cached;
+    if(!(cached = PyObject_CallFunctionObjArgs(
+         self->cache_lookup, request, NULL)))
+      goto error;
+
+    if(PyBytes_CheckExact(cached)) {
+      // written as it is, the handler is not called
+      handler_result = response_capi->Response_refresh_date(cached);
+      Py_DECREF(cached);
+      if(!handler_result)
+        goto error;
+      ((Request*)request)->prerendered = true;
+      goto queue_or_write;
+    }
+
+    if(cached == Py_None)
+      Py_DECREF(cached);
+    else
+      ((Request*)request)->cache_key = cached;
+  }
+
   if(!(handler_result = PyObject_CallFunctionObjArgs(
        matcher_entry->handler, request, NULL))) {
     Protocol_catch_exception(request);
@@ -692,35 +1478,124 @@ Protocol_on_body(Protocol* self, char* body, size_t body_len, size_t tail_len)
   }
 
   if(matcher_entry->coro_func) {
-    if(!Protocol_handle_coro(self, request, handler_result))
+    PyObject* coro = handler_result;
+    handler_result = NULL;
+
+    int finished = Protocol_handle_coro(self, request, coro, &handler_result);
+    Py_DECREF(coro);
+    if(finished == -1)
       goto error;
 
-    goto finally;
+    if(!finished)
+      goto finally;
   }
 
   queue_or_write:
 
   if(!PIPELINE_EMPTY(&self->pipeline))
   {
-    if(!Pipeline_queue(&self->pipeline, (PipelineEntry){false, request, handler_result}))
+    if(!Protocol_pipeline_queue(self, (PipelineEntry){false, request, handler_result}))
       goto error;
 
     goto finally;
   }
 
   if(!Protocol_write_response_or_err(
-      self, (PyObject*)&self->static_request, (Response*)handler_result))
+      self, request, (Response*)handler_result))
     goto error;
 
+  // important: this breaks a cycle in case of an exception
+  Py_CLEAR(((Request*)request)->exception);
+
   goto finally;
 
   error:
   result = NULL;
 
   finally:
-  if(request != (PyObject*)&self->static_request)
-    Py_XDECREF(request);
   Py_XDECREF(handler_result);
+  return result;
+}
+
+
+/* Leaves the static request to whoever kept it and the next request gets
+   a new one. This way coroutine handlers don't need a clone unless they
+   suspend. The embedded response is turned into the one of a heap
+   allocated request, see Request_clone and Request_Response. */
+static inline void
+Protocol_detach_request(Protocol* self)
+{
+  Request* request = self->static_request;
+  PyObject* response = (PyObject*)&request->response;
+
+  // the reference of the request itself, references handed out keep the
+  // request alive
+  response->ob_refcnt--;
+  if(Py_REFCNT(response)) {
+    request->response.owner = (PyObject*)request;
+    Py_INCREF(request);
+  }
+
+  Py_CLEAR(self->static_request);
+}
+
+
+#ifdef PARSER_STANDALONE
+static PyObject*
+Protocol_on_body(Protocol* self, PyObject *args)
+#else
+Protocol*
+Protocol_on_body(Protocol* self, char* body, size_t body_len, size_t tail_len)
+#endif
+{
+#ifdef PARSER_STANDALONE
+  PyObject* result = Py_None;
+#else
+  Protocol* result = self;
+#endif
+  PyObject* request = NULL;
+  MatcherEntry* matcher_entry = self->matcher_entry;
+#ifdef PARSER_STANDALONE
+/*  PyObject* request;
+  if(!PyArg_ParseTuple(args, "O", &request))
+    goto error;
+*/ // FIXME implement body setting
+#endif
+
+#ifdef REAPER_ENABLED
+  // pipelined data past the body arrived with the last read
+  self->request_start = self->last_active;
+#endif
+
+  request_capi->Request_set_body(
+    self->static_request, body, body_len);
+
+  request = (PyObject*)self->static_request;
+  if(!PIPELINE_EMPTY(&self->pipeline)) {
+    if(!(request = request_capi->Request_clone(self->static_request)))
+      goto error;
+  }
+
+  if(PIPELINE_EMPTY(&self->pipeline))
+    // TODO: should be tweaked to minimal request length
+    self->gather.enabled = tail_len > 0;
+  else
+    self->gather.enabled = false;
+
+  if(!Protocol_handle_request(self, request, matcher_entry))
+    goto error;
+
+  goto finally;
+
+  error:
+  result = NULL;
+
+  finally:
+  if(request != (PyObject*)self->static_request)
+    Py_XDECREF(request);
+  else if(Py_REFCNT(request) > 1)
+    // a coroutine handler that suspended kept it
+    Protocol_detach_request(self);
 #ifdef PARSER_STANDALONE
   if(result)
     Py_INCREF(result);
@@ -728,6 +1603,94 @@ Protocol_on_body(Protocol* self, char* body, size_t body_len, size_t tail_len)
   return result;
 }
 
+#ifndef PARSER_STANDALONE
+/* Streaming routes get their handler called right after the headers,
+   the body is fed to request.stream() as it arrives. */
+static inline Protocol*
+Protocol_on_stream(Protocol* self)
+{
+  Protocol* result = self;
+  PyObject* request = NULL;
+
+  request_capi->Request_set_body(self->static_request, NULL, 0);
+
+  if(!(request = request_capi->Request_clone(self->static_request)))
+    goto error;
+
+  if(!(self->stream = PyObject_CallFunction(
+       BodyStream, "On", self, self->stream_buffer_size)))
+    goto error;
+
+  ((Request*)request)->stream = self->stream;
+  Py_INCREF(self->stream);
+
+  // the response can't wait in gather until the body is read
+  self->gather.enabled = false;
+
+  Parser_stream_body(&self->parser);
+
+  if(!Protocol_handle_request(self, request, self->matcher_entry))
+    goto error;
+
+  goto finally;
+
+  error:
+  result = NULL;
+
+  finally:
+  Py_XDECREF(request);
+  return result;
+}
+
+
+Protocol*
+Protocol_on_body_chunk(Protocol* self, char* data, size_t len)
+{
+  Protocol* result = self;
+  PyObject* chunk = NULL;
+
+  // the handler already responded
+  if(!self->stream)
+    return self;
+
+  if(!(chunk = PyBytes_FromStringAndSize(data, (Py_ssize_t)len)))
+    goto error;
+
+  PyObject* tmp;
+  if(!(tmp = PyObject_CallMethod(self->stream, "feed", "O", chunk)))
+    goto error;
+  Py_DECREF(tmp);
+
+  goto finally;
+
+  error:
+  result = NULL;
+
+  finally:
+  Py_XDECREF(chunk);
+  return result;
+}
+
+
+Protocol*
+Protocol_on_body_end(Protocol* self)
+{
+#ifdef REAPER_ENABLED
+  self->request_start = self->last_active;
+#endif
+
+  if(self->stream) {
+    PyObject* tmp;
+    if(!(tmp = PyObject_CallMethod(self->stream, "feed_eof", NULL)))
+      return NULL;
+    Py_DECREF(tmp);
+  }
+
+  return Protocol_end_stream(self);
+}
+#endif
+
+
 #ifdef PARSER_STANDALONE
 static PyObject*
 Protocol_on_error(Protocol* self, PyObject *args)
@@ -784,6 +1747,15 @@ static PyMethodDef Protocol_methods[] = {
   {"connection_made", (PyCFunction)Protocol_connection_made, METH_O, ""},
   {"connection_lost", (PyCFunction)Protocol_connection_lost, METH_VARARGS, ""},
   {"data_received", (PyCFunction)Protocol_data_received, METH_O, ""},
+  {"pause_writing", (PyCFunction)Protocol_pause_writing, METH_NOARGS, ""},
+  {"resume_writing", (PyCFunction)Protocol_resume_writing, METH_NOARGS, ""},
+  {"drain", (PyCFunction)Protocol_drain, METH_NOARGS, ""},
+  {"pause_stream", (PyCFunction)Protocol_pause_stream, METH_O, ""},
+  {"resume_stream", (PyCFunction)Protocol_resume_stream, METH_O, ""},
+#ifndef PARSER_STANDALONE
+  {"get_buffer", (PyCFunction)Protocol_get_buffer, METH_O, ""},
+  {"buffer_updated", (PyCFunction)Protocol_buffer_updated, METH_O, ""},
+#endif
   {"pipeline_cancel", (PyCFunction)Protocol_pipeline_cancel, METH_NOARGS, ""},
 #ifdef PARSER_STANDALONE
   {"on_headers", (PyCFunction)Protocol_on_headers, METH_VARARGS, ""},
@@ -840,7 +1812,7 @@ static PyTypeObject ProtocolType = {
   0,                         /* tp_getattro */
   0,                         /* tp_setattro */
   0,                         /* tp_as_buffer */
-  Py_TPFLAGS_DEFAULT,        /* tp_flags */
+  Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /* tp_flags */
   "Protocol",                /* tp_doc */
   0,                         /* tp_traverse */
   0,                         /* tp_clear */
@@ -882,6 +1854,14 @@ PyInit_cprotocol(void)
   PyObject* api_capsule = NULL;
   PyObject* crequest = NULL;
   PyObject* route = NULL;
+  PyObject* coro = NULL;
+  PyObject* stream = NULL;
+  PyObject* response_stream = NULL;
+#ifndef PARSER_STANDALONE
+  PyObject* asyncio = NULL;
+  PyObject* buffered_protocol = NULL;
+#endif
+  PyObject* protocol = NULL;
 
   if (PyType_Ready(&ProtocolType) < 0)
     goto error;
@@ -924,6 +1904,29 @@ PyInit_cprotocol(void)
        route, "RouteNotFoundException")))
     goto error;
 
+  if(!(coro = PyImport_ImportModule("japronto.protocol.coro")))
+    goto error;
+
+  if(!(resume_coro = PyObject_GetAttrString(coro, "resume")))
+    goto error;
+
+#if PY_VERSION_HEX >= 0x030b0000
+  if(!(context_kwnames = Py_BuildValue("(s)", "context")))
+    goto error;
+#endif
+
+  if(!(stream = PyImport_ImportModule("japronto.request.stream")))
+    goto error;
+
+  if(!(BodyStream = PyObject_GetAttrString(stream, "BodyStream")))
+    goto error;
+
+  if(!(response_stream = PyImport_ImportModule("japronto.response.stream")))
+    goto error;
+
+  if(!(write_body = PyObject_GetAttrString(response_stream, "write_body")))
+    goto error;
+
   request_capi = import_capi("japronto.request.crequest");
   if(!request_capi)
     goto error;
@@ -936,8 +1939,27 @@ PyInit_cprotocol(void)
   if(!response_capi)
     goto error;
 
-  Py_INCREF(&ProtocolType);
-  PyModule_AddObject(m, "Protocol", (PyObject*)&ProtocolType);
+#ifdef PARSER_STANDALONE
+  protocol = (PyObject*)&ProtocolType;
+  Py_INCREF(protocol);
+#else
+  if(!(asyncio = PyImport_ImportModule("asyncio")))
+    goto error;
+
+  if(!(buffered_protocol = PyObject_GetAttrString(asyncio, "BufferedProtocol")))
+    goto error;
+
+  // asyncio only reads into get_buffer() of BufferedProtocol instances
+  if(!(protocol = PyObject_CallFunction(
+       (PyObject*)&PyType_Type, "s(OO){s:(),s:s}", "Protocol",
+       &ProtocolType, buffered_protocol,
+       "__slots__", "__module__", "japronto.protocol.cprotocol")))
+    goto error;
+#endif
+
+  if(PyModule_AddObject(m, "Protocol", protocol) == -1)
+    goto error;
+  protocol = NULL;
 
   static Protocol_CAPI capi = {
     Protocol_close
@@ -958,6 +1980,14 @@ PyInit_cprotocol(void)
   Py_XDECREF(api_capsule);
   Py_XDECREF(crequest);
   Py_XDECREF(route);
+  Py_XDECREF(coro);
+  Py_XDECREF(stream);
+  Py_XDECREF(response_stream);
+#ifndef PARSER_STANDALONE
+  Py_XDECREF(buffered_protocol);
+  Py_XDECREF(asyncio);
+#endif
+  Py_XDECREF(protocol);
 #ifdef PARSER_STANDALONE
   Py_XDECREF(cparser);
 #endif
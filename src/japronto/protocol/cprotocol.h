@@ -6,14 +6,23 @@
 
 #include "cpipeline.h"
 #include "crequest.h"
+#include "creaper.h"
 #include <stdbool.h>
 
 #define GATHER_MAX_RESP 24
+// idle connections give their gather buffer back to a pool shared by the
+// worker
+#define GATHER_POOL_LEN 64
 
 typedef struct {
-  PyObject* responses[GATHER_MAX_RESP];
+  // one slot more than max_responses so a response that doesn't fit
+  // can go out in the same writelines call
+  PyObject** responses;
   size_t responses_end;
   size_t len;
+  size_t max_responses;
+  size_t max_len;
+  bool writelines;
   PyBytesObject* prev_buffer;
   bool enabled;
 } Gather;
@@ -28,20 +37,32 @@ typedef struct {
 #else
   Parser parser;
 #endif
-  Request static_request;
+  // request being parsed, NULL while the connection is idle
+  Request* static_request;
   Pipeline pipeline;
 #ifdef REAPER_ENABLED
-  unsigned long idle_time;
-  unsigned long read_ops;
-  unsigned long last_read_ops;
+  Reaper* reaper;
+  // armed in the reaper's wheel while the connection is open
+  Timer timer;
+  // the reaper's tick of the last read
+  unsigned long last_active;
+  // the reaper's tick of the read that started the headers being parsed
+  unsigned long request_start;
 #endif
   PyObject* app;
   PyObject* matcher;
+  // the application's compiled request extensions or NULL if there are none
+  PyObject* request_extensions;
   PyObject* error_handler;
   PyObject* transport;
   PyObject* write;
   PyObject* writelines;
   PyObject* create_task;
+  PyObject* create_future;
+  // done once the transport resumes writing, streamed bodies wait for it
+  PyObject* drain_waiter;
+  PyObject* cache_lookup;
+  PyObject* cache_store;
   PyObject* request_logger;
 #ifdef PROTOCOL_TRACK_REFCNT
   Py_ssize_t none_cnt;
@@ -50,8 +71,49 @@ typedef struct {
 #endif
   bool closed;
   Gather gather;
+  size_t max_pipeline_depth;
+  // reading is paused while the pipeline is full, the transport
+  // asked to pause writing or the handler didn't keep up with the stream
+  bool pipeline_full;
+  bool writing_paused;
+  bool stream_full;
+  bool reading_paused;
+  MatcherEntry* matcher_entry;
+  // body of the request to a streaming route that is being read
+  PyObject* stream;
+  Py_ssize_t stream_buffer_size;
 } Protocol;
 
+#ifdef REAPER_ENABLED
+#define PROTOCOL_FROM_TIMER(t) \
+  ((Protocol*)((char*)(t) - offsetof(Protocol, timer)))
+
+/* The tick by which the connection is reaped unless the client makes
+   progress. The headers of a request have to arrive within header_timeout
+   of their first byte, the body can stall for body_timeout between reads
+   and otherwise the connection can stay idle for keepalive_timeout. */
+static inline unsigned long
+Protocol_deadline(Protocol* self)
+{
+  Reaper* reaper = self->reaper;
+#ifndef PARSER_STANDALONE
+  Parser* parser = &self->parser;
+
+  // the connection waits for the application, not for the client
+  if(parser->paused || self->reading_paused)
+    return self->last_active + reaper->keepalive_timeout;
+
+  if(parser->state == PARSER_BODY)
+    return self->last_active + reaper->body_timeout;
+
+  if(parser->buffer_start != parser->buffer_end)
+    return self->request_start + reaper->header_timeout;
+#endif
+
+  return self->last_active + reaper->keepalive_timeout;
+}
+#endif
+
 #define GATHER_MAX_LEN (4096 - sizeof(PyBytesObject))
 
 #ifndef PARSER_STANDALONE
@@ -60,6 +122,8 @@ Protocol* Protocol_on_headers(Protocol*, char* method, size_t method_len,
                               char* path, size_t path_len, int minor_version,
                               void* headers, size_t num_headers);
 Protocol* Protocol_on_body(Protocol*, char* body, size_t body_len, size_t tail_len);
+Protocol* Protocol_on_body_chunk(Protocol*, char* data, size_t len);
+Protocol* Protocol_on_body_end(Protocol*);
 Protocol* Protocol_on_error(Protocol*, PyObject*);
 #endif
 
@@ -1,19 +1,10 @@
 #include <Python.h>
+#include <time.h>
 
+#include "creaper.h"
 #include "cprotocol.h"
 #include "capsule.h"
 
-typedef struct {
-  PyObject_HEAD
-
-  PyObject* connections;
-  PyObject* call_later;
-  PyObject* check_idle;
-  PyObject* check_idle_handle;
-  PyObject* check_interval;
-  unsigned long idle_timeout;
-} Reaper;
-
 #ifdef REAPER_DEBUG_PRINT
 #define debug_print(format, ...) printf("reaper: " format "\n", __VA_ARGS__)
 #else
@@ -22,10 +13,11 @@ typedef struct {
 
 static Protocol_CAPI* protocol_capi;
 
-const long DEFAULT_CHECK_INTERVAL = 10;
-const unsigned long DEFAULT_IDLE_TIMEOUT = 60;
+const double DEFAULT_CHECK_INTERVAL = 0.1;
+const double DEFAULT_IDLE_TIMEOUT = 60;
 
 static PyObject* default_check_interval;
+static PyObject* default_idle_timeout;
 
 static PyObject*
 Reaper_new(PyTypeObject* type, PyObject* args, PyObject* kwds)
@@ -36,11 +28,11 @@ Reaper_new(PyTypeObject* type, PyObject* args, PyObject* kwds)
   if(!self)
     goto finally;
 
-  self->connections = NULL;
   self->call_later = NULL;
   self->check_idle = NULL;
   self->check_idle_handle = NULL;
   self->check_interval = NULL;
+  TimerWheel_init(&self->wheel);
 
   finally:
   return (PyObject*)self;
@@ -54,11 +46,20 @@ Reaper_dealloc(Reaper* self)
   Py_XDECREF(self->check_idle_handle);
   Py_XDECREF(self->check_idle);
   Py_XDECREF(self->call_later);
-  Py_XDECREF(self->connections);
 
   Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
+
+static inline double
+monotonic(void)
+{
+  struct timespec now;
+  clock_gettime(CLOCK_MONOTONIC, &now);
+
+  return now.tv_sec + now.tv_nsec / 1e9;
+}
+
 #ifdef REAPER_ENABLED
 static inline void*
 Reaper_schedule_check_idle(Reaper* self)
@@ -102,6 +103,29 @@ Reaper_stop(Reaper* self)
 }
 
 
+/* Converts a timeout in seconds to ticks. Reads are recorded with the last
+   tick, so like before a connection is reaped within check_interval before
+   its timeout. */
+static int
+Reaper_ticks(Reaper* self, PyObject* timeout, unsigned long* ticks)
+{
+  double seconds = PyFloat_AsDouble(timeout);
+  if(seconds == -1.0 && PyErr_Occurred())
+    return -1;
+
+  if(seconds < 0) {
+    PyErr_SetString(PyExc_ValueError, "Timeouts can't be negative");
+    return -1;
+  }
+
+  *ticks = (unsigned long)(seconds / self->interval);
+  if(*ticks * self->interval < seconds)
+    (*ticks)++;
+
+  return 0;
+}
+
+
 static int
 Reaper_init(Reaper* self, PyObject* args, PyObject* kwds)
 {
@@ -110,11 +134,17 @@ Reaper_init(Reaper* self, PyObject* args, PyObject* kwds)
 
   PyObject* app = NULL;
   PyObject* idle_timeout = NULL;
+  PyObject* header_timeout = NULL;
+  PyObject* body_timeout = NULL;
+  PyObject* keepalive_timeout = NULL;
 
-  static char* kwlist[] = {"app", "check_interval", "idle_timeout", NULL};
+  static char* kwlist[] = {
+    "app", "check_interval", "idle_timeout", "header_timeout",
+    "body_timeout", "keepalive_timeout", NULL};
 
   if (!PyArg_ParseTupleAndKeywords(
-      args, kwds, "|OOO", kwlist, &app, &self->check_interval, &idle_timeout))
+      args, kwds, "|OOOOOO", kwlist, &app, &self->check_interval,
+      &idle_timeout, &header_timeout, &body_timeout, &keepalive_timeout))
       goto error;
 
   assert(app);
@@ -123,25 +153,45 @@ Reaper_init(Reaper* self, PyObject* args, PyObject* kwds)
     self->check_interval = default_check_interval;
   Py_INCREF(self->check_interval);
 
-  assert(PyLong_AsLong(self->check_interval) >= 0);
+  self->interval = PyFloat_AsDouble(self->check_interval);
+  if(self->interval == -1.0 && PyErr_Occurred())
+    goto error;
+
+  if(self->interval <= 0) {
+    PyErr_SetString(PyExc_ValueError, "check_interval must be positive");
+    goto error;
+  }
 
+  // idle_timeout is the default for the others
   if(!idle_timeout)
-    self->idle_timeout = DEFAULT_IDLE_TIMEOUT;
-  else
-    self->idle_timeout = PyLong_AsLong(idle_timeout);
+    idle_timeout = default_idle_timeout;
 
-  assert(self->idle_timeout >= 0);
+  if(Reaper_ticks(
+     self, header_timeout ? header_timeout : idle_timeout,
+     &self->header_timeout) == -1)
+    goto error;
 
-  debug_print("check_interval %ld", PyLong_AsLong(self->check_interval));
-  debug_print("idle_timeout %ld", self->idle_timeout);
+  if(Reaper_ticks(
+     self, body_timeout ? body_timeout : idle_timeout,
+     &self->body_timeout) == -1)
+    goto error;
 
-  if(!(loop = PyObject_GetAttrString(app, "_loop")))
+  if(Reaper_ticks(
+     self, keepalive_timeout ? keepalive_timeout : idle_timeout,
+     &self->keepalive_timeout) == -1)
     goto error;
 
-  if(!(self->call_later = PyObject_GetAttrString(loop, "call_later")))
+  self->start = monotonic();
+
+  debug_print("check_interval %f", self->interval);
+  debug_print(
+    "header_timeout %ld, body_timeout %ld, keepalive_timeout %ld ticks",
+    self->header_timeout, self->body_timeout, self->keepalive_timeout);
+
+  if(!(loop = PyObject_GetAttrString(app, "_loop")))
     goto error;
 
-  if(!(self->connections = PyObject_GetAttrString(app, "_connections")))
+  if(!(self->call_later = PyObject_GetAttrString(loop, "call_later")))
     goto error;
 
 #ifdef REAPER_ENABLED
@@ -164,35 +214,50 @@ Reaper_init(Reaper* self, PyObject* args, PyObject* kwds)
 
 
 #ifdef REAPER_ENABLED
+/* Advances the wheel to the current tick. Connections whose timer expired
+   are closed unless they made progress since it was armed, then their
+   timer is armed again for the deadline of their state, see
+   Protocol_deadline. Reads only record the tick, so a connection is
+   visited about once per timeout instead of every check. */
 static PyObject*
 Reaper__check_idle(Reaper* self, PyObject* args)
 {
   PyObject* result = Py_None;
-  PyObject* iterator = NULL;
-  Protocol* conn = NULL;
-
-  if(!(iterator = PyObject_GetIter(self->connections)))
-    goto error;
-
-  unsigned long check_interval = PyLong_AsLong(self->check_interval);
-  while((conn = (Protocol*)PyIter_Next(iterator))) {
-    debug_print(
-      "conn %p, idle_time %ld, read_ops %ld, last_read_ops %ld",
-      conn, conn->idle_time, conn->read_ops, conn->last_read_ops);
+  Timer expired;
+  Timer_init(&expired);
+
+  unsigned long now = (unsigned long)((monotonic() - self->start) / self->interval);
+  unsigned long tick = self->wheel.tick;
+  // after a long stall every slot is visited once
+  if(now - tick > TIMER_WHEEL_SIZE)
+    tick = now - TIMER_WHEEL_SIZE;
+
+  while(tick < now) {
+    tick++;
+    TimerWheel_take(&self->wheel, tick, &expired);
+
+    while(Timer_armed(&expired)) {
+      Timer* timer = expired.next;
+      Protocol* conn = PROTOCOL_FROM_TIMER(timer);
+      unsigned long deadline = Protocol_deadline(conn);
+
+      debug_print(
+        "conn %p, last_active %ld, deadline %ld, tick %ld",
+        conn, conn->last_active, deadline, tick);
+
+      if(deadline > tick) {
+        TimerWheel_add(&self->wheel, timer, deadline);
+        continue;
+      }
 
-    if(conn->read_ops == conn->last_read_ops) {
-      conn->idle_time += check_interval;
+      Timer_cancel(timer);
 
-      if(conn->idle_time >= self->idle_timeout) {
-        if(!protocol_capi->Protocol_close(conn))
-          goto error;
-      }
-    } else {
-      conn->idle_time = 0;
-      conn->last_read_ops = conn->read_ops;
+      Py_INCREF(conn);
+      void* closed = protocol_capi->Protocol_close(conn);
+      Py_DECREF(conn);
+      if(!closed)
+        goto error;
     }
-
-    Py_DECREF(conn);
   }
 
   if(!Reaper_schedule_check_idle(self))
@@ -202,10 +267,11 @@ Reaper__check_idle(Reaper* self, PyObject* args)
 
   error:
   result = NULL;
+  // the connections that weren't checked yet are checked on the next tick
+  while(Timer_armed(&expired))
+    TimerWheel_add(&self->wheel, expired.next, tick + 1);
 
   finally:
-  Py_XDECREF(conn);
-  Py_XDECREF(iterator);
   Py_XINCREF(result);
   return result;
 }
@@ -277,6 +343,7 @@ PyInit_creaper(void)
 {
   PyObject* m = NULL;
   default_check_interval = NULL;
+  default_idle_timeout = NULL;
 
   if (PyType_Ready(&ReaperType) < 0)
     goto error;
@@ -288,7 +355,10 @@ PyInit_creaper(void)
   Py_INCREF(&ReaperType);
   PyModule_AddObject(m, "Reaper", (PyObject*)&ReaperType);
 
-  if(!(default_check_interval = PyLong_FromLong(DEFAULT_CHECK_INTERVAL)))
+  if(!(default_check_interval = PyFloat_FromDouble(DEFAULT_CHECK_INTERVAL)))
+    goto error;
+
+  if(!(default_idle_timeout = PyFloat_FromDouble(DEFAULT_IDLE_TIMEOUT)))
     goto error;
 
   protocol_capi = import_capi("japronto.protocol.cprotocol");
@@ -298,6 +368,7 @@ PyInit_creaper(void)
   goto finally;
 
   error:
+  Py_XDECREF(default_idle_timeout);
   Py_XDECREF(default_check_interval);
   m = NULL;
 
@@ -0,0 +1,21 @@
+#pragma once
+
+#include <Python.h>
+
+#include "timerwheel.h"
+
+typedef struct {
+  PyObject_HEAD
+
+  PyObject* call_later;
+  PyObject* check_idle;
+  PyObject* check_idle_handle;
+  PyObject* check_interval;
+  double interval;
+  double start;
+  // in ticks of check_interval
+  unsigned long header_timeout;
+  unsigned long body_timeout;
+  unsigned long keepalive_timeout;
+  TimerWheel wheel;
+} Reaper;
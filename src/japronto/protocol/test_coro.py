@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from japronto.protocol.coro import resume
+
+
+async def sleeper(delay, result):
+    await asyncio.sleep(delay)
+    await asyncio.sleep(delay)
+    return result
+
+
+async def raiser():
+    await asyncio.sleep(0)
+    raise ValueError('raised')
+
+
+async def eager(coro):
+    yielded = coro.send(None)
+
+    return await resume(coro, yielded)
+
+
+def test_resume():
+    loop = asyncio.new_event_loop()
+    coro = sleeper(0.01, 'result')
+
+    task = loop.create_task(eager(coro))
+
+    assert loop.run_until_complete(task) == 'result'
+    loop.close()
+
+
+def test_resume_exception():
+    loop = asyncio.new_event_loop()
+    coro = raiser()
+
+    task = loop.create_task(eager(coro))
+
+    with pytest.raises(ValueError):
+        loop.run_until_complete(task)
+    loop.close()
+
+
+def test_resume_cancel():
+    loop = asyncio.new_event_loop()
+    coro = sleeper(10, 'result')
+
+    task = loop.create_task(eager(coro))
+    loop.call_soon(task.cancel)
+
+    with pytest.raises(asyncio.CancelledError):
+        loop.run_until_complete(task)
+    assert coro.cr_frame is None
+    loop.close()
@@ -0,0 +1,107 @@
+#pragma once
+
+#include <stdbool.h>
+#include <stddef.h>
+
+// Hashed timing wheel, timers are kept in doubly linked lists embedded in
+// the objects they belong to, one list per slot. A timer due on tick t sits
+// in slot t % TIMER_WHEEL_SIZE so advancing the wheel by a tick only visits
+// the timers in a single slot. Timers due more than a full turn ahead stay
+// in their slot until the turn they are due on.
+
+#define TIMER_WHEEL_SIZE 1024
+
+typedef struct Timer {
+  struct Timer* prev;
+  struct Timer* next;
+  unsigned long deadline;
+} Timer;
+
+typedef struct {
+  Timer slots[TIMER_WHEEL_SIZE];
+  // the last tick whose timers have expired
+  unsigned long tick;
+} TimerWheel;
+
+
+static inline void
+Timer_init(Timer* self)
+{
+  self->prev = self;
+  self->next = self;
+}
+
+
+static inline bool
+Timer_armed(Timer* self)
+{
+  return self->next != self;
+}
+
+
+// removing a timer that is not armed does nothing
+static inline void
+Timer_cancel(Timer* self)
+{
+  self->prev->next = self->next;
+  self->next->prev = self->prev;
+  Timer_init(self);
+}
+
+
+static inline void
+Timer_append(Timer* list, Timer* timer)
+{
+  timer->prev = list->prev;
+  timer->next = list;
+  list->prev->next = timer;
+  list->prev = timer;
+}
+
+
+static inline void
+TimerWheel_init(TimerWheel* self)
+{
+  for(Timer* slot = self->slots; slot < self->slots + TIMER_WHEEL_SIZE; slot++)
+    Timer_init(slot);
+  self->tick = 0;
+}
+
+
+// arms or re-arms the timer, deadlines that already passed are due on the
+// next tick
+static inline void
+TimerWheel_add(TimerWheel* self, Timer* timer, unsigned long deadline)
+{
+  Timer_cancel(timer);
+
+  if(deadline <= self->tick)
+    deadline = self->tick + 1;
+
+  timer->deadline = deadline;
+  Timer_append(&self->slots[deadline % TIMER_WHEEL_SIZE], timer);
+}
+
+
+// moves the timers from the slot of the tick to `list` and advances the
+// wheel to it, timers that are due on a later turn are left in place
+static inline void
+TimerWheel_take(TimerWheel* self, unsigned long tick, Timer* list)
+{
+  Timer* slot = &self->slots[tick % TIMER_WHEEL_SIZE];
+  Timer* timer = slot->next;
+
+  Timer_init(list);
+  while(timer != slot) {
+    Timer* next = timer->next;
+
+    if(timer->deadline <= tick) {
+      Timer_cancel(timer);
+      Timer_append(list, timer);
+    }
+
+    timer = next;
+  }
+
+  self->tick = tick;
+}
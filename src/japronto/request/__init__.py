@@ -1,10 +1,12 @@
 import urllib.parse
-from json import loads as json_loads
-import cgi
 import encodings.idna
-import collections
 from http.cookies import _unquote as unquote_cookie
 
+from .headers import MultiHeaders, parse_header
+from .multidict import MultiDict
+from .multipart import File, MultipartParser
+from .stream import BodyStream
+
 
 class HttpRequest(object):
     __slots__ = ('path', 'method', 'version', 'headers', 'body')
@@ -57,15 +59,17 @@ def json(request):
     if request.body is None:
         return None
 
-    return json_loads(request.text)
+    encoding = request.encoding
+    if encoding and encoding.lower() not in ('utf-8', 'utf8'):
+        return request.app.json_decoder(request.text)
 
+    # both stdlib and third party decoders accept UTF-8 bytes, which saves
+    # decoding the body to str first
+    return request.app.json_decoder(request.body)
 
-@memoize
-def query(request):
-    qs = request.query_string
-    if not qs:
-        return {}
-    return dict(urllib.parse.parse_qsl(qs))
+
+def body_stream(request):
+    return BodyStream.from_body(request.body)
 
 
 def remote_addr(request):
@@ -78,7 +82,7 @@ def parsed_content_type(request):
     if not content_type:
         return None, {}
 
-    return cgi.parse_header(content_type)
+    return parse_header(content_type)
 
 
 def mime_type(request):
@@ -89,23 +93,47 @@ def encoding(request):
     return parsed_content_type(request)[1].get('charset')
 
 
-@memoize
+def multipart_parser(request):
+    boundary = parsed_content_type(request)[1]['boundary'].encode('utf-8')
+
+    return MultipartParser(boundary)
+
+
+def parse_form(body, encoding):
+    # imported here since crequest imports this module when initialized
+    from .crequest import parse_urlencoded
+
+    if encoding and encoding.lower() not in ('utf-8', 'utf8'):
+        return MultiDict(urllib.parse.parse_qsl(
+            body.decode(encoding), encoding=encoding, errors='replace'))
+
+    return MultiDict(parse_urlencoded(body))
+
+
 def parsed_form_and_files(request):
     if request.mime_type == 'application/x-www-form-urlencoded':
-        return dict(urllib.parse.parse_qsl(request.text)), None
+        return parse_form(request.body or b'', request.encoding), None
     elif request.mime_type == 'multipart/form-data':
-        boundary = parsed_content_type(request)[1]['boundary'].encode('utf-8')
-        return parse_multipart_form(request.body, boundary)
+        parser = multipart_parser(request)
+        parser.feed(request.body or b'')
+        return parser.close()
 
     return None, None
 
 
-def form(request):
-    return parsed_form_and_files(request)[0]
-
+async def read_form(request):
+    """Returns form and files parsed from `request.stream()` as the body
+       arrives, for routes registered with `stream=True`."""
+    if request.mime_type == 'application/x-www-form-urlencoded':
+        body = await request.stream().read()
+        return parse_form(body, request.encoding), None
+    elif request.mime_type == 'multipart/form-data':
+        parser = multipart_parser(request)
+        async for chunk in request.stream():
+            parser.feed(chunk)
+        return parser.close()
 
-def files(request):
-    return parsed_form_and_files(request)[1]
+    return None, None
 
 
 @memoize
@@ -150,59 +178,21 @@ def parse_cookie(cookie):
     return cookiedict
 
 
+@memoize
+def multi_headers(request):
+    return MultiHeaders(request.header_items)
+
+
 @memoize
 def cookies(request):
-    if 'Cookie' not in request.headers:
+    values = request.multi_headers.getall('Cookie')
+    if not values:
         return {}
 
     try:
-        cookies = parse_cookie(request.headers['Cookie'])
+        # clients and proxies may split cookies over several headers
+        cookies = parse_cookie('; '.join(values))
     except Exception:
         return {}
 
     return {k: urllib.parse.unquote(v) for k, v in cookies.items()}
-
-
-File = collections.namedtuple('File', ['type', 'body', 'name'])
-
-
-def parse_multipart_form(body, boundary):
-    files = {}
-    fields = {}
-
-    form_parts = body.split(boundary)
-    for form_part in form_parts[1:-1]:
-        file_name = None
-        file_type = None
-        field_name = None
-        line_index = 2
-        line_end_index = 0
-        while not line_end_index == -1:
-            line_end_index = form_part.find(b'\r\n', line_index)
-            form_line = form_part[line_index:line_end_index].decode('utf-8')
-            line_index = line_end_index + 2
-
-            if not form_line:
-                break
-
-            colon_index = form_line.index(':')
-            form_header_field = form_line[0:colon_index]
-            form_header_value, form_parameters = cgi.parse_header(
-                form_line[colon_index + 2:])
-
-            if form_header_field == 'Content-Disposition':
-                if 'filename' in form_parameters:
-                    file_name = form_parameters['filename']
-                field_name = form_parameters.get('name')
-            elif form_header_field == 'Content-Type':
-                file_type = form_header_value
-
-        post_data = form_part[line_index:-4]
-        if file_name or file_type:
-            file = File(type=file_type, name=file_name, body=post_data)
-            files[field_name] = file
-        else:
-            value = post_data.decode('utf-8')
-            fields[field_name] = value
-
-    return fields, files
@@ -8,6 +8,7 @@
 #include "cresponse.h"
 #ifdef REQUEST_OPAQUE
 #include "picohttpparser.h"
+#include "intern.h"
 #endif
 #include "capsule.h"
 
@@ -19,11 +20,21 @@ static PyObject* partial;
 static PyObject* HTTP10;
 static PyObject* HTTP11;
 static PyObject* request;
+static PyObject* MultiDict;
 #endif
 
 static Response_CAPI* response_capi;
 
 #ifdef REQUEST_OPAQUE
+static PyTypeObject RequestType;
+
+// requests kept by suspended coroutine handlers or cloned for pipelining
+// are new for every request, their memory is recycled instead of going
+// back to the allocator
+static Request* freelist[REQUEST_FREELIST_LEN];
+static size_t freelist_len = 0;
+
+
 static PyObject*
 Request_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 #else
@@ -34,28 +45,37 @@ Request_new(PyTypeObject* type, Request* self)
 #ifdef REQUEST_OPAQUE
   Request* self = NULL;
 
-  self = (Request*)type->tp_alloc(type, 0);
-  if(!self)
+  if(type == &RequestType && freelist_len) {
+    self = freelist[--freelist_len];
+    PyObject_Init((PyObject*)self, type);
+  } else if(!(self = (Request*)type->tp_alloc(type, 0)))
     goto finally;
 #else
   ((PyObject*)self)->ob_refcnt = 1;
   ((PyObject*)self)->ob_type = type;
 #endif
   self->response_called = false;
+  self->prerendered = false;
 
   self->matcher_entry = NULL;
   self->exception = NULL;
   self->app = NULL;
+  self->extensions = NULL;
 
   self->transport = NULL;
   self->py_method = NULL;
   self->py_path = NULL;
   self->py_qs = NULL;
+  self->py_query = NULL;
   self->py_headers = NULL;
   self->py_match_dict = NULL;
   self->py_body = NULL;
+  self->py_form = NULL;
   self->extra = NULL;
+  self->py_extensions = NULL;
   self->done_callbacks = NULL;
+  self->stream = NULL;
+  self->cache_key = NULL;
 
   Response_new(response_capi->ResponseType, &self->response);
 
@@ -80,11 +100,17 @@ Request_dealloc(Request* self)
 
   Response_dealloc(&self->response);
   Py_XDECREF(self->app);
+  Py_XDECREF(self->extensions);
+  Py_XDECREF(self->cache_key);
+  Py_XDECREF(self->stream);
   Py_XDECREF(self->done_callbacks);
   Py_XDECREF(self->extra);
+  Py_XDECREF(self->py_extensions);
+  Py_XDECREF(self->py_form);
   Py_XDECREF(self->py_body);
   Py_XDECREF(self->py_match_dict);
   Py_XDECREF(self->py_headers);
+  Py_XDECREF(self->py_query);
   Py_XDECREF(self->py_qs);
   Py_XDECREF(self->py_path);
   Py_XDECREF(self->py_method);
@@ -92,6 +118,11 @@ Request_dealloc(Request* self)
 
   Py_XDECREF(self->exception);
 #ifdef REQUEST_OPAQUE
+  if(Py_TYPE(self) == &RequestType && freelist_len < REQUEST_FREELIST_LEN) {
+    freelist[freelist_len++] = self;
+    return;
+  }
+
   Py_TYPE(self)->tp_free((PyObject*)self);
 #endif
 }
@@ -111,7 +142,18 @@ Request_init(Request* self)
 
 #ifdef REQUEST_OPAQUE
 
-static PyTypeObject RequestType;
+/* The end of the data in the buffer, the headers are followed by the match
+   dict entries and then the body, see bfrcpy. */
+static inline size_t
+_Request_buffer_used(Request* self)
+{
+  char* end = (char*)(self->match_dict_entries + self->match_dict_length);
+  if(self->body)
+    end = self->body + self->body_length;
+
+  return (size_t)(end - self->buffer);
+}
+
 
 static PyObject*
 Request_clone(Request* original)
@@ -121,15 +163,28 @@ Request_clone(Request* original)
   if(!(clone = (Request*)Request_new(&RequestType, NULL, NULL)))
     goto error;
 
+  // the embedded response of a heap allocated request starts without
+  // references, once handed out it keeps the request alive, see
+  // Request_Response
+  ((PyObject*)&clone->response)->ob_refcnt = 0;
+
   if(Request_init(clone, NULL, NULL) == -1)
     goto error;
 
+  // the fields from method to transport except for the unused part of
+  // the inline buffer
   const size_t offset = offsetof(Request, method);
-  const size_t length = offsetof(Request, transport) - offset;
+  const size_t buffer_offset = offsetof(Request, inline_buffer);
+  const size_t tail_offset = buffer_offset + REQUEST_INITIAL_BUFFER_LEN;
 
-  memcpy((char*)clone + offset, (char*)original + offset, length);
+  memcpy((char*)clone + offset, (char*)original + offset,
+         buffer_offset - offset);
+  memcpy((char*)clone + tail_offset, (char*)original + tail_offset,
+         offsetof(Request, transport) - tail_offset);
 
   if(original->buffer == original->inline_buffer) {
+    memcpy(clone->inline_buffer, original->inline_buffer,
+           _Request_buffer_used(original));
     clone->buffer = clone->inline_buffer;
 
     ptrdiff_t shift = (char*)clone - (char*)original;
@@ -192,6 +247,13 @@ Request_Response(Request* self, PyObject *args, PyObject* kw)
   result->minor_version = self->minor_version;
   result->keep_alive = _Request_get_keep_alive(self);
 
+  if(!Py_REFCNT(result)) {
+    // a task can hold on to the response longer than the pipeline holds
+    // on to the request
+    result->owner = (PyObject*)self;
+    Py_INCREF(self);
+  }
+
   goto finally;
 
   error:
@@ -361,7 +423,6 @@ Request_from_raw(Request* self, char* method, size_t method_len, char* path, siz
   self->path_decoded = false;
   self->path_len = path_len;
   self->qs_len = 0;
-  self->qs_decoded = false;
   self->minor_version = minor_version;
   self->headers = headers;
   self->num_headers = num_headers;
@@ -397,7 +458,8 @@ Request_set_body(Request* self, char* body, size_t body_len)
 
 #define hex_to_dec(x) \
   ((x <= '9' ? 0 : 9) + (x & 0x0f))
-#define is_hex(x) ((x >= '0' && x <= '9') || (x >= 'A' && x <= 'F'))
+#define is_hex(x) \
+  ((x >= '0' && x <= '9') || (x >= 'A' && x <= 'F') || (x >= 'a' && x <= 'f'))
 static inline size_t percent_decode(char* data, ssize_t length, size_t* shifted_bytes, const char* stopchr) {
   if(shifted_bytes)
     *shifted_bytes = 0;
@@ -423,6 +485,28 @@ static inline size_t percent_decode(char* data, ssize_t length, size_t* shifted_
 
   return length;
 }
+
+
+/* Like percent_decode but into dst, which must fit len bytes, so the
+   source stays intact. With plus + is decoded to space as in forms. */
+static inline size_t
+url_decode(char* dst, const char* src, size_t len, bool plus)
+{
+  char* start = dst;
+
+  for(const char* end = src + len; src < end; src++, dst++) {
+    if(*src == '%' && end - src >= 3 && is_hex(src[1]) && is_hex(src[2])) {
+      *dst = (hex_to_dec(src[1]) << 4) + hex_to_dec(src[2]);
+      src += 2;
+    } else if(plus && *src == '+') {
+      *dst = ' ';
+    } else {
+      *dst = *src;
+    }
+  }
+
+  return dst - start;
+}
 #undef hex_to_dec
 #undef is_hex
 
@@ -445,22 +529,95 @@ Request_get_decoded_path(Request* self, size_t* path_len) {
 }
 
 
+/* The query string as it was sent, without the ? char. */
 static char*
-Request_get_decoded_qs(Request* self, size_t* qs_len) {
+Request_get_raw_qs(Request* self, size_t* qs_len) {
+  size_t path_len;
+  // splits the query string from the path
+  Request_get_decoded_path(self, &path_len);
+
   if(!self->qs_len) {
     *qs_len = 0;
     return NULL;
   }
 
-  char* qs = self->path + self->path_len;
+  *qs_len = self->qs_len - 1;
+  return self->path + self->path_len + 1;
+}
+
+
+/* Splits an application/x-www-form-urlencoded string into a list of
+   (name, value) tuples. Like urllib.parse.parse_qsl fields without a
+   value are skipped and invalid UTF-8 is replaced. */
+static PyObject*
+parse_urlencoded(const char* data, size_t len)
+{
+  PyObject* items = NULL;
+  char* buffer = NULL;
+
+  if(!(items = PyList_New(0)))
+    goto error;
 
-  if(!self->qs_decoded) {
-    self->qs_len = percent_decode(qs, self->qs_len, NULL, NULL);
-    self->qs_decoded = true;
+  if(!len)
+    goto finally;
+
+  if(!(buffer = PyMem_Malloc(len))) {
+    PyErr_NoMemory();
+    goto error;
+  }
+
+  const char* end = data + len;
+  for(const char* field = data; field < end;) {
+    const char* field_end = memchr(field, '&', end - field);
+    if(!field_end)
+      field_end = end;
+
+    const char* equals = memchr(field, '=', field_end - field);
+    if(equals && equals + 1 < field_end) {
+      PyObject* name = NULL;
+      PyObject* value = NULL;
+      PyObject* item = NULL;
+      bool failed = true;
+      size_t decoded_len;
+
+      decoded_len = url_decode(buffer, field, equals - field, true);
+      if(!(name = PyUnicode_DecodeUTF8(buffer, decoded_len, "replace")))
+        goto loop_finally;
+
+      decoded_len = url_decode(
+        buffer, equals + 1, field_end - equals - 1, true);
+      if(!(value = PyUnicode_DecodeUTF8(buffer, decoded_len, "replace")))
+        goto loop_finally;
+
+      if(!(item = PyTuple_Pack(2, name, value)))
+        goto loop_finally;
+
+      if(PyList_Append(items, item) == -1)
+        goto loop_finally;
+
+      failed = false;
+
+      loop_finally:
+      Py_XDECREF(name);
+      Py_XDECREF(value);
+      Py_XDECREF(item);
+
+      if(failed)
+        goto error;
+    }
+
+    field = field_end + 1;
   }
 
-  *qs_len = self->qs_len;
-  return qs;
+  goto finally;
+
+  error:
+  Py_XDECREF(items);
+  items = NULL;
+
+  finally:
+  PyMem_Free(buffer);
+  return items;
 }
 
 
@@ -482,6 +639,36 @@ static inline void title_case(char* data, size_t len)
 }
 
 
+/* Common names come from the intern table, which also spares the
+   title_case pass. */
+static inline PyObject*
+Request_header_name(struct phr_header* header)
+{
+  PyObject* name;
+  if((name = Intern_lookup(
+      &intern_header_names, header->name, header->name_len)))
+    return name;
+
+  title_case((char*)header->name, header->name_len);
+
+  // FIXME check ASCII
+  return PyUnicode_FromStringAndSize(header->name, header->name_len);
+}
+
+
+static inline PyObject*
+Request_header_value(struct phr_header* header)
+{
+  PyObject* value;
+  if((value = Intern_lookup(
+      &intern_header_values, header->value, header->value_len)))
+    return value;
+
+  // FIXME this can fail on codec errors
+  return PyUnicode_DecodeLatin1(header->value, header->value_len, NULL);
+}
+
+
 static inline PyObject*
 Request_decode_headers(Request* self)
 {
@@ -498,17 +685,10 @@ Request_decode_headers(Request* self)
       PyObject* name = NULL;
       PyObject* value = NULL;
 
-      title_case((char*)header->name, header->name_len);
-      // TODO by inserting 0 byte we could call PyDict_SetItemString
-
-      // FIXME check ASCII
-      name = PyUnicode_FromStringAndSize(header->name, header->name_len);
-      if(!name)
+      if(!(name = Request_header_name(header)))
         goto loop_error;
 
-      // FIXME this can fail on codec errors
-      value = PyUnicode_DecodeLatin1(header->value, header->value_len, NULL);
-      if(!value)
+      if(!(value = Request_header_value(header)))
         goto loop_error;
 
       if(PyDict_SetItem(headers, name, value) == -1)
@@ -538,10 +718,88 @@ Request_decode_headers(Request* self)
 }
 
 
+/* Every header as a (name, value) tuple in the order they were sent,
+   repeated headers included. */
+static PyObject*
+Request_get_header_items(Request* self, void* closure)
+{
+  PyObject* result = NULL;
+  PyObject* items = PyList_New(self->num_headers);
+  if(!items)
+    goto error;
+
+  for(size_t i = 0; i < self->num_headers; i++) {
+    struct phr_header* header = self->headers + i;
+    PyObject* name = NULL;
+    PyObject* value = NULL;
+    PyObject* item = NULL;
+
+    if(!(name = Request_header_name(header)))
+      goto loop_finally;
+
+    if(!(value = Request_header_value(header)))
+      goto loop_finally;
+
+    if(!(item = PyTuple_Pack(2, name, value)))
+      goto loop_finally;
+
+    PyList_SET_ITEM(items, i, item);
+
+    loop_finally:
+    Py_XDECREF(name);
+    Py_XDECREF(value);
+
+    if(!item)
+      goto error;
+  }
+
+  result = items;
+  goto finally;
+
+  error:
+  Py_XDECREF(items);
+
+  finally:
+  return result;
+}
+
+
+static PyObject*
+Request_get_header(Request* self, PyObject* args, PyObject* kw)
+{
+  static char *kwlist[] = {"name", "default", NULL};
+
+  PyObject* name = NULL;
+  PyObject* default_ = Py_None;
+  const char* cname;
+  Py_ssize_t name_len;
+
+  if(!PyArg_ParseTupleAndKeywords(
+      args, kw, "U|O", kwlist, &name, &default_))
+    return NULL;
+
+  if(!(cname = PyUnicode_AsUTF8AndSize(name, &name_len)))
+    return NULL;
+
+  // looks at the raw headers so request.headers doesn't need to be built,
+  // backwards since the last of repeated headers wins there
+  for(size_t i = self->num_headers; i-- > 0;) {
+    struct phr_header* header = self->headers + i;
+    if(header->name_len == (size_t)name_len
+       && strncasecmp(header->name, cname, header->name_len) == 0)
+      return Request_header_value(header);
+  }
+
+  Py_INCREF(default_);
+  return default_;
+}
+
+
 static PyObject*
 Request_get_method(Request* self, void* closure)
 {
-  if(!self->py_method) {
+  if(!self->py_method && !(self->py_method = Intern_lookup(
+      &intern_methods, REQUEST_METHOD(self), self->method_len))) {
     self->py_method = PyUnicode_DecodeLatin1(
       REQUEST_METHOD(self), self->method_len, NULL);
   }
@@ -570,12 +828,18 @@ Request_get_qs(Request* self, void* closure)
 {
   if(!self->py_qs) {
     size_t qs_len;
-    char* qs = Request_get_decoded_qs(self, &qs_len);
+    char* qs = Request_get_raw_qs(self, &qs_len);
     if(!qs)
       Py_RETURN_NONE;
 
-    // skip the ? char
-    self->py_qs = PyUnicode_FromStringAndSize(qs + 1, qs_len - 1);
+    // decoded into a copy, request.query parses the raw query string
+    char* decoded;
+    if(!(decoded = PyMem_Malloc(qs_len + 1)))
+      return PyErr_NoMemory();
+
+    self->py_qs = PyUnicode_FromStringAndSize(
+      decoded, url_decode(decoded, qs, qs_len, false));
+    PyMem_Free(decoded);
   }
 
   Py_XINCREF(self->py_qs);
@@ -602,6 +866,59 @@ Request_get_headers(Request* self, void* closure) {
 }
 
 
+static PyObject*
+Request_get_query(Request* self, void* closure)
+{
+  if(!self->py_query) {
+    PyObject* items;
+    size_t qs_len;
+    char* qs = Request_get_raw_qs(self, &qs_len);
+
+    if(!(items = parse_urlencoded(qs, qs_len)))
+      return NULL;
+
+    self->py_query = PyObject_CallFunctionObjArgs(MultiDict, items, NULL);
+    Py_DECREF(items);
+  }
+
+  Py_XINCREF(self->py_query);
+  return self->py_query;
+}
+
+
+static PyObject*
+Request_get_proxy(Request* self, char* attr);
+
+
+static PyObject*
+Request_get_form_and_files(Request* self, Py_ssize_t index)
+{
+  if(!self->py_form)
+    self->py_form = Request_get_proxy(self, "parsed_form_and_files");
+
+  if(!self->py_form)
+    return NULL;
+
+  PyObject* result = PyTuple_GET_ITEM(self->py_form, index);
+  Py_INCREF(result);
+  return result;
+}
+
+
+static PyObject*
+Request_get_form(Request* self, void* closure)
+{
+  return Request_get_form_and_files(self, 0);
+}
+
+
+static PyObject*
+Request_get_files(Request* self, void* closure)
+{
+  return Request_get_form_and_files(self, 1);
+}
+
+
 static PyObject*
 Request_get_match_dict(Request* self, void* closure)
 {
@@ -743,10 +1060,14 @@ static PyGetSetDef Request_getset[] = {
   {"method", (getter)Request_get_method, NULL, "", NULL},
   {"path", (getter)Request_get_path, NULL, "", NULL},
   {"query_string", (getter)Request_get_qs, NULL, "", NULL},
+  {"query", (getter)Request_get_query, NULL, "", NULL},
   {"version", (getter)Request_get_version, NULL, "", NULL},
   {"headers", (getter)Request_get_headers, NULL, "", NULL},
+  {"header_items", (getter)Request_get_header_items, NULL, "", NULL},
   {"match_dict", (getter)Request_get_match_dict, NULL, "", NULL},
   {"body", (getter)Request_get_body, NULL, "", NULL},
+  {"form", (getter)Request_get_form, NULL, "", NULL},
+  {"files", (getter)Request_get_files, NULL, "", NULL},
   {"transport", (getter)Request_get_transport, NULL, "", NULL},
   {"keep_alive", (getter)Request_get_keep_alive, NULL, "", NULL},
   {"route", (getter)Request_get_route, NULL, "", NULL},
@@ -754,61 +1075,78 @@ static PyGetSetDef Request_getset[] = {
   {"app", (getter)Request_get_app, NULL, "", NULL},
   PROXY(text),
   PROXY(json),
-  PROXY(query),
   PROXY(mime_type),
   PROXY(encoding),
-  PROXY(form),
-  PROXY(files),
   PROXY(remote_addr),
   PROXY(hostname),
   PROXY(port),
   PROXY(cookies),
+  PROXY(multi_headers),
   {NULL}
 };
 
 #undef PROXY
 
 static PyObject*
-Request_getattro(Request* self, PyObject* name)
+Request_get_extension(Request* self, PyObject* name, PyObject* entry)
 {
-  PyObject* result;
-
-  if((result = PyObject_GenericGetAttr((PyObject*)self, name)))
-    return result;
+  PyObject* result = NULL;
+  PyObject* handler = PyTuple_GET_ITEM(entry, 0);
+
+  if(PyTuple_GET_ITEM(entry, 1) == Py_True) {
+    // properties are computed once per request
+    if(self->py_extensions
+       && (result = PyDict_GetItem(self->py_extensions, name))) {
+      Py_INCREF(result);
+      goto finally;
+    }
 
-  PyObject* extensions = NULL;
-  if(!(extensions = PyObject_GetAttrString(self->app, "_request_extensions")))
-    goto error;
+    if(!(result = PyObject_CallFunctionObjArgs(handler, self, NULL)))
+      goto error;
 
-  PyObject* entry;
-  if(!(entry = PyDict_GetItem(extensions, name)))
-    goto error;
-  else
-    PyErr_Clear();
+    if(!self->py_extensions && !(self->py_extensions = PyDict_New()))
+      goto error;
 
-  PyObject* handler;
-  PyObject* property;
-  if(!(handler = PyTuple_GetItem(entry, 0)))
-    goto error;
+    if(PyDict_SetItem(self->py_extensions, name, result) == -1)
+      goto error;
 
-  if(!(property = PyTuple_GetItem(entry, 1)))
-    goto error;
+    goto finally;
+  }
 
-  if(property == Py_True) {
-    if(!(result = PyObject_CallFunctionObjArgs(handler, self, NULL)))
+  // functions bind like methods, other callables go through partial
+  descrgetfunc descr_get = Py_TYPE(handler)->tp_descr_get;
+  if(descr_get) {
+    if(!(result = descr_get(handler, (PyObject*)self, (PyObject*)Py_TYPE(self))))
       goto error;
   } else {
     if(!(result = PyObject_CallFunctionObjArgs(partial, handler, self, NULL)))
       goto error;
   }
 
+  goto finally;
+
   error:
-  Py_XDECREF(extensions);
+  Py_CLEAR(result);
 
+  finally:
   return result;
 }
 
 
+static PyObject*
+Request_getattro(Request* self, PyObject* name)
+{
+  PyObject* entry;
+
+  // extension names never shadow builtin attributes, see
+  // Application.extend_request
+  if(self->extensions && (entry = PyDict_GetItem(self->extensions, name)))
+    return Request_get_extension(self, name, entry);
+
+  return PyObject_GenericGetAttr((PyObject*)self, name);
+}
+
+
 static PyObject*
 Request_add_done_callback(Request* self, PyObject* callback)
 {
@@ -827,9 +1165,34 @@ Request_add_done_callback(Request* self, PyObject* callback)
 }
 
 
+/* Requests to streaming routes get their stream from the protocol, for
+   the rest the already read body is wrapped. */
+static PyObject*
+Request_stream(Request* self)
+{
+  if(!self->stream && !(self->stream = Request_get_proxy(self, "body_stream")))
+    return NULL;
+
+  Py_INCREF(self->stream);
+  return self->stream;
+}
+
+
+/* Coroutine parsing the form from request.stream(), see read_form in
+   request/__init__.py. */
+static PyObject*
+Request_read_form(Request* self)
+{
+  return Request_get_proxy(self, "read_form");
+}
+
+
 static PyMethodDef Request_methods[] = {
   {"Response", (PyCFunction)Request_Response, METH_VARARGS | METH_KEYWORDS, ""},
   {"add_done_callback", (PyCFunction)Request_add_done_callback, METH_O, ""},
+  {"get_header", (PyCFunction)Request_get_header, METH_VARARGS | METH_KEYWORDS, ""},
+  {"stream", (PyCFunction)Request_stream, METH_NOARGS, ""},
+  {"read_form", (PyCFunction)Request_read_form, METH_NOARGS, ""},
   {NULL}
 };
 
@@ -876,12 +1239,103 @@ static PyTypeObject RequestType = {
 };
 
 
+static PyObject*
+crequest_parse_urlencoded(PyObject* self, PyObject* args)
+{
+  Py_buffer data;
+  PyObject* result;
+
+  if(!PyArg_ParseTuple(args, "y*", &data))
+    return NULL;
+
+  result = parse_urlencoded(data.buf, (size_t)data.len);
+  PyBuffer_Release(&data);
+
+  return result;
+}
+
+
+/* The intern tables are exported for tests only. */
+static InternTable*
+crequest_intern_table(const char* name)
+{
+  if(strcmp(name, "methods") == 0)
+    return &intern_methods;
+  if(strcmp(name, "header_names") == 0)
+    return &intern_header_names;
+  if(strcmp(name, "header_values") == 0)
+    return &intern_header_values;
+
+  PyErr_Format(PyExc_ValueError, "Unknown intern table %s", name);
+  return NULL;
+}
+
+
+static PyObject*
+crequest_intern_entries(PyObject* self, PyObject* args)
+{
+  const char* name;
+  InternTable* table;
+  PyObject* result;
+
+  if(!PyArg_ParseTuple(args, "s", &name))
+    return NULL;
+
+  if(!(table = crequest_intern_table(name)))
+    return NULL;
+
+  if(!(result = PyTuple_New(table->length)))
+    return NULL;
+
+  for(size_t i = 0; i < table->length; i++) {
+    Py_INCREF(table->entries[i].str);
+    PyTuple_SET_ITEM(result, i, table->entries[i].str);
+  }
+
+  return result;
+}
+
+
+static PyObject*
+crequest_intern_lookup(PyObject* self, PyObject* args)
+{
+  const char* name;
+  Py_buffer data;
+  InternTable* table;
+  PyObject* result = NULL;
+
+  if(!PyArg_ParseTuple(args, "sy*", &name, &data))
+    return NULL;
+
+  if(!(table = crequest_intern_table(name)))
+    goto finally;
+
+  if(!(result = Intern_lookup(table, data.buf, (size_t)data.len))) {
+    result = Py_None;
+    Py_INCREF(result);
+  }
+
+  finally:
+  PyBuffer_Release(&data);
+
+  return result;
+}
+
+
+static PyMethodDef crequest_methods[] = {
+  {"parse_urlencoded", (PyCFunction)crequest_parse_urlencoded, METH_VARARGS, ""},
+  {"_intern_entries", (PyCFunction)crequest_intern_entries, METH_VARARGS, ""},
+  {"_intern_lookup", (PyCFunction)crequest_intern_lookup, METH_VARARGS, ""},
+  {NULL}
+};
+
+
 static PyModuleDef crequest = {
   PyModuleDef_HEAD_INIT,
   "crequest",
   "crequest",
   -1,
-  NULL, NULL, NULL, NULL, NULL
+  crequest_methods, NULL, NULL, NULL, NULL
 };
 #endif
 
@@ -918,6 +1372,9 @@ crequest_init(void)
   alloc_static2(HTTP10, "1.0")
   alloc_static2(HTTP11, "1.1")
 
+  if(Intern_init() == -1)
+    goto error;
+
   m = PyModule_Create(&crequest);
   if(!m)
     goto error;
@@ -942,6 +1399,9 @@ crequest_init(void)
   if(!request)
     goto error;
 
+  if(!(MultiDict = PyObject_GetAttrString(request, "MultiDict")))
+    goto error;
+
   Py_INCREF(&RequestType);
   PyModule_AddObject(m, "Request", (PyObject*)&RequestType);
 
@@ -951,7 +1411,8 @@ crequest_init(void)
     Request_from_raw,
     Request_get_decoded_path,
     Request_set_match_dict_entries,
-    Request_set_body
+    Request_set_body,
+    _Request_get_keep_alive
   };
   api_capsule = export_capi(m, "japronto.request.crequest", &capi);
   if(!api_capsule)
@@ -969,6 +1430,7 @@ crequest_init(void)
 #ifdef REQUEST_OPAQUE
   Py_XDECREF(HTTP10);
   Py_XDECREF(HTTP11);
+  Intern_clear();
 #endif
   m = NULL;
 
@@ -8,6 +8,8 @@
 #include "common.h"
 
 #define REQUEST_INITIAL_BUFFER_LEN 1024
+// deallocated requests kept for reuse by a worker
+#define REQUEST_FREELIST_LEN 256
 
 typedef struct {
   PyObject_HEAD
@@ -17,7 +19,6 @@ typedef struct {
   char* path;
   bool path_decoded;
   size_t path_len;
-  bool qs_decoded;
   size_t qs_len;
   int minor_version;
   struct phr_header* headers;
@@ -30,21 +31,34 @@ typedef struct {
   size_t buffer_len;
   char inline_buffer[REQUEST_INITIAL_BUFFER_LEN];
   KEEP_ALIVE keep_alive;
-  bool simple;
   bool response_called;
+  // the response was rendered before the request arrived, see
+  // Protocol_handle_request
+  bool prerendered;
   MatcherEntry* matcher_entry;
   PyObject* exception;
 
   PyObject* transport;
   PyObject* app;
+  // name -> (handler, property) compiled by the application, NULL when no
+  // extensions are registered
+  PyObject* extensions;
   PyObject* py_method;
   PyObject* py_path;
   PyObject* py_qs;
+  PyObject* py_query;
   PyObject* py_headers;
   PyObject* py_match_dict;
   PyObject* py_body;
+  // (form, files) tuple parsed from the body
+  PyObject* py_form;
   PyObject* extra;
+  // values of extension properties computed for this request
+  PyObject* py_extensions;
   PyObject* done_callbacks;
+  PyObject* stream;
+  // key the response is stored under in the response cache
+  PyObject* cache_key;
   Response response;
 } Request;
 
@@ -78,6 +92,9 @@ typedef struct {
 
   void (*Request_set_body)
     (Request* self, char* body, size_t body_len);
+
+  KEEP_ALIVE (*Request_get_keep_alive)
+    (Request* self);
 } Request_CAPI;
 
 
@@ -4,7 +4,7 @@ from distutils.core import Extension
 def get_extension():
     return Extension(
         'japronto.request.crequest',
-        sources=['crequest.c', '../response/cresponse.c',
+        sources=['crequest.c', 'intern.c', '../response/cresponse.c',
                  '../router/match_dict.c', '../capsule.c'],
         include_dirs=['../../picohttpparser', '..',
                       '../response', '../router'],
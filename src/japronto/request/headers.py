@@ -0,0 +1,82 @@
+from collections.abc import Mapping
+
+
+def _split_params(line):
+    # semicolons inside quoted strings don't separate parameters
+    while line[:1] == ';':
+        line = line[1:]
+        end = line.find(';')
+        while end > 0 and (
+                line.count('"', 0, end) - line.count('\\"', 0, end)) % 2:
+            end = line.find(';', end + 1)
+        if end < 0:
+            end = len(line)
+
+        yield line[:end].strip()
+        line = line[end:]
+
+
+def parse_header(line):
+    """Splits a header like Content-Type into its value and a dictionary
+       of parameters, as `cgi.parse_header` did before `cgi` was removed."""
+    parts = _split_params(';' + line)
+    value = next(parts)
+    params = {}
+    for part in parts:
+        name, equals, param = part.partition('=')
+        if not equals:
+            continue
+
+        param = param.strip()
+        if len(param) >= 2 and param[0] == param[-1] == '"':
+            param = param[1:-1].replace('\\\\', '\\').replace('\\"', '"')
+        params[name.strip().lower()] = param
+
+    return value, params
+
+
+class MultiHeaders(Mapping):
+    """Case-insensitive mapping of request headers that keeps every value
+       of repeated headers, like Cookie or X-Forwarded-For.
+
+       Indexing returns the last value like `request.headers` does, `getall`
+       returns all of them in the order they were sent. The index is built on first lookup."""
+    __slots__ = ('_items', '_index')
+
+    def __init__(self, items):
+        self._items = items
+        self._index = None
+
+    def _get_index(self):
+        if self._index is None:
+            index = {}
+            for name, value in self._items:
+                index.setdefault(name.lower(), (name, []))[1].append(value)
+            self._index = index
+
+        return self._index
+
+    def __getitem__(self, name):
+        return self._get_index()[name.lower()][1][-1]
+
+    def getall(self, name, default=None):
+        entry = self._get_index().get(name.lower())
+        if entry is None:
+            return [] if default is None else default
+
+        return list(entry[1])
+
+    def __contains__(self, name):
+        return isinstance(name, str) and name.lower() in self._get_index()
+
+    def __iter__(self):
+        return (name for name, _ in self._get_index().values())
+
+    def __len__(self):
+        return len(self._get_index())
+
+    def multi_items(self):
+        return list(self._items)
+
+    def __repr__(self):
+        return '<MultiHeaders {!r}>'.format(self._items)
@@ -0,0 +1,168 @@
+#include <Python.h>
+#include <strings.h>
+
+#include "intern.h"
+
+
+#define ENTRY(s) {s, sizeof(s) - 1, NULL}
+
+static InternEntry methods[] = {
+  ENTRY("GET"), ENTRY("POST"), ENTRY("PUT"), ENTRY("DELETE"), ENTRY("HEAD"),
+  ENTRY("OPTIONS"), ENTRY("PATCH"), ENTRY("CONNECT"), ENTRY("TRACE")
+};
+
+// title-cased the same way as Request_decode_headers does
+static InternEntry header_names[] = {
+  ENTRY("Host"), ENTRY("User-Agent"), ENTRY("Accept"),
+  ENTRY("Accept-Language"), ENTRY("Accept-Encoding"), ENTRY("Accept-Charset"),
+  ENTRY("Connection"), ENTRY("Keep-Alive"), ENTRY("Cookie"),
+  ENTRY("Content-Length"), ENTRY("Content-Type"), ENTRY("Content-Encoding"),
+  ENTRY("Transfer-Encoding"), ENTRY("Authorization"), ENTRY("Cache-Control"),
+  ENTRY("Pragma"), ENTRY("Referer"), ENTRY("Origin"), ENTRY("Upgrade"),
+  ENTRY("Expect"), ENTRY("Range"), ENTRY("If-Range"),
+  ENTRY("If-None-Match"), ENTRY("If-Modified-Since"), ENTRY("If-Match"),
+  ENTRY("Te"), ENTRY("Dnt"), ENTRY("Via"), ENTRY("Forwarded"),
+  ENTRY("X-Forwarded-For"), ENTRY("X-Forwarded-Proto"),
+  ENTRY("X-Forwarded-Host"), ENTRY("X-Real-Ip"), ENTRY("X-Request-Id"),
+  ENTRY("X-Requested-With"), ENTRY("Upgrade-Insecure-Requests"),
+  ENTRY("Sec-Fetch-Site"), ENTRY("Sec-Fetch-Mode"), ENTRY("Sec-Fetch-Dest"),
+  ENTRY("Sec-Fetch-User")
+};
+
+static InternEntry header_values[] = {
+  ENTRY("keep-alive"), ENTRY("close"), ENTRY("Keep-Alive"), ENTRY("Close"),
+  ENTRY("Upgrade"), ENTRY("websocket"), ENTRY("chunked"), ENTRY("identity"),
+  ENTRY("gzip"), ENTRY("deflate"), ENTRY("gzip, deflate"),
+  ENTRY("gzip, deflate, br"), ENTRY("*/*"), ENTRY("no-cache"),
+  ENTRY("max-age=0"), ENTRY("application/json"), ENTRY("text/plain"),
+  ENTRY("text/html"), ENTRY("application/x-www-form-urlencoded"),
+  ENTRY("0"), ENTRY("1"), ENTRY("?1"), ENTRY("XMLHttpRequest"),
+  ENTRY("same-origin"), ENTRY("cross-site"), ENTRY("none"), ENTRY("cors"),
+  ENTRY("navigate"), ENTRY("document"), ENTRY("empty"), ENTRY("trailers"),
+  ENTRY("100-continue"), ENTRY("http"), ENTRY("https")
+};
+
+#undef ENTRY
+
+#define TABLE(entries, case_sensitive) \
+  {0, case_sensitive, entries, sizeof(entries) / sizeof(InternEntry), 0, \
+   {NULL}}
+
+InternTable intern_methods = TABLE(methods, true);
+InternTable intern_header_names = TABLE(header_names, false);
+InternTable intern_header_values = TABLE(header_values, true);
+
+#undef TABLE
+
+
+/* FNV-1a, for case insensitive tables over the case folded bytes. Folding
+   non-letters too is harmless since a match is confirmed by comparing. */
+static inline size_t
+hash(InternTable* table, const char* data, size_t len)
+{
+  const char fold = table->case_sensitive ? 0 : 0x20;
+  size_t h = 2166136261u ^ table->seed;
+  for(const char* c = data; c < data + len; c++) {
+    h ^= (unsigned char)(*c | fold);
+    h *= 16777619u;
+  }
+
+  return (h ^ (h >> 16)) & (INTERN_SLOTS - 1);
+}
+
+
+/* Tries seeds until every entry gets its own slot. */
+static int
+InternTable_init(InternTable* table)
+{
+  table->max_len = 0;
+  for(InternEntry* entry = table->entries;
+      entry < table->entries + table->length;
+      entry++) {
+    if(!(entry->str = PyUnicode_InternFromString(entry->data)))
+      return -1;
+
+    if(entry->len > table->max_len)
+      table->max_len = entry->len;
+  }
+
+  for(table->seed = 0; table->seed < 100000; table->seed++) {
+    memset(table->slots, 0, sizeof(table->slots));
+
+    InternEntry* entry;
+    for(entry = table->entries; entry < table->entries + table->length;
+        entry++) {
+      InternEntry** slot =
+        table->slots + hash(table, entry->data, entry->len);
+      if(*slot)
+        break;
+
+      *slot = entry;
+    }
+
+    if(entry == table->entries + table->length)
+      return 0;
+  }
+
+  PyErr_SetString(PyExc_RuntimeError, "No perfect hash for intern table");
+  return -1;
+}
+
+
+int
+Intern_init(void)
+{
+  if(InternTable_init(&intern_methods) == -1)
+    return -1;
+
+  if(InternTable_init(&intern_header_names) == -1)
+    return -1;
+
+  if(InternTable_init(&intern_header_values) == -1)
+    return -1;
+
+  return 0;
+}
+
+
+static void
+InternTable_clear(InternTable* table)
+{
+  for(InternEntry* entry = table->entries;
+      entry < table->entries + table->length;
+      entry++)
+    Py_CLEAR(entry->str);
+
+  memset(table->slots, 0, sizeof(table->slots));
+}
+
+
+void
+Intern_clear(void)
+{
+  InternTable_clear(&intern_methods);
+  InternTable_clear(&intern_header_names);
+  InternTable_clear(&intern_header_values);
+}
+
+
+/* Returns a new reference to the interned str equal to the bytes or NULL
+   without an exception set if there is none. */
+PyObject*
+Intern_lookup(InternTable* table, const char* data, size_t len)
+{
+  if(!len || len > table->max_len)
+    return NULL;
+
+  InternEntry* entry = table->slots[hash(table, data, len)];
+  if(!entry || entry->len != len)
+    return NULL;
+
+  if(table->case_sensitive
+     ? memcmp(entry->data, data, len) != 0
+     : strncasecmp(entry->data, data, len) != 0)
+    return NULL;
+
+  Py_INCREF(entry->str);
+  return entry->str;
+}
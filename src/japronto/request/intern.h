@@ -0,0 +1,39 @@
+#pragma once
+
+#include <Python.h>
+#include <stdbool.h>
+
+// power of two, large enough that a seed without collisions is found quickly
+#define INTERN_SLOTS 256
+
+typedef struct {
+  const char* data;
+  size_t len;
+  PyObject* str;
+} InternEntry;
+
+/* Interned str objects for common request strings, looked up by the raw
+   bytes with a hash that is perfect for the entries it was built from. */
+typedef struct {
+  size_t seed;
+  bool case_sensitive;
+  InternEntry* entries;
+  size_t length;
+  // length of the longest entry, longer strings are never hashed
+  size_t max_len;
+  InternEntry* slots[INTERN_SLOTS];
+} InternTable;
+
+extern InternTable intern_methods;
+extern InternTable intern_header_names;
+extern InternTable intern_header_values;
+
+
+int
+Intern_init(void);
+
+void
+Intern_clear(void);
+
+PyObject*
+Intern_lookup(InternTable* table, const char* data, size_t len);
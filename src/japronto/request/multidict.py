@@ -0,0 +1,23 @@
+class MultiDict(dict):
+    """Dictionary of a query string or form that keeps repeated fields.
+
+       Indexing returns the last value of a field like a plain dictionary
+       built from the fields would, `getall` returns all of them in the
+       order they were sent."""
+    __slots__ = ('_items',)
+
+    def __init__(self, items=()):
+        super().__init__()
+        self._items = list(items)
+        for name, value in self._items:
+            self[name] = value
+
+    def getall(self, name, default=None):
+        values = [v for n, v in self._items if n == name]
+        if not values and default is not None:
+            return default
+
+        return values
+
+    def multi_items(self):
+        return list(self._items)
@@ -0,0 +1,179 @@
+from tempfile import SpooledTemporaryFile
+
+from .headers import parse_header
+from .multidict import MultiDict
+
+
+PREAMBLE, HEADERS, BODY, DONE = range(4)
+
+MAX_PART_HEADERS = 16 * 1024
+# larger data is fed in slices of this size
+FEED_SIZE = 64 * 1024
+
+
+class File:
+    """File part of a multipart form.
+
+       The content is in `file`, a SpooledTemporaryFile that moves to disk
+       once it grows over the parser's `spool_size`."""
+    __slots__ = ('type', 'name', 'file')
+
+    def __init__(self, type, name, file):
+        self.type = type
+        self.name = name
+        self.file = file
+
+    @property
+    def body(self):
+        """The whole content as bytes."""
+        position = self.file.tell()
+        self.file.seek(0)
+        try:
+            return self.file.read()
+        finally:
+            self.file.seek(position)
+
+    def __repr__(self):
+        return '<File {!r} {}>'.format(self.name, self.type)
+
+
+class MultipartParser:
+    """Incremental multipart/form-data parser.
+
+       Data is fed in chunks as it arrives. Only the tail of a chunk that
+       could be the start of a boundary is kept between calls, field values
+       are collected in memory and files are written to
+       SpooledTemporaryFile objects, so a large upload is never held in
+       memory as a whole. A large chunk, like a whole buffered body, is
+       parsed in slices of `FEED_SIZE` bytes."""
+    __slots__ = (
+        '_delimiter', '_buffer', '_state', '_spool_size', '_fields',
+        '_files', '_part_name', '_part_file', '_part_data')
+
+    def __init__(self, boundary, spool_size=1024 * 1024):
+        self._delimiter = b'\r\n--' + boundary
+        # the first boundary is not preceded by a line break
+        self._buffer = bytearray(b'\r\n')
+        self._state = PREAMBLE
+        self._spool_size = spool_size
+        self._fields = []
+        self._files = []
+        self._part_name = None
+        self._part_file = None
+        self._part_data = None
+
+    def feed(self, data):
+        with memoryview(data) as view:
+            for start in range(0, len(view), FEED_SIZE):
+                if self._state == DONE:
+                    return
+
+                self._buffer += view[start:start + FEED_SIZE]
+                while self._step():
+                    pass
+
+    def close(self):
+        """Returns fields and files, both as MultiDict."""
+        if self._state != DONE:
+            raise ValueError('Incomplete multipart body')
+
+        return MultiDict(self._fields), MultiDict(self._files)
+
+    def _step(self):
+        buffer = self._buffer
+        delimiter = self._delimiter
+
+        if self._state == PREAMBLE:
+            index = buffer.find(delimiter)
+            if index == -1:
+                # keep what could be the start of the delimiter
+                del buffer[:max(len(buffer) - len(delimiter) + 1, 0)]
+                return False
+
+            end = index + len(delimiter)
+            if len(buffer) < end + 2:
+                return False
+
+            if buffer[end:end + 2] == b'--':
+                self._state = DONE
+                return False
+
+            del buffer[:end + 2]
+            self._state = HEADERS
+            return True
+
+        if self._state == HEADERS:
+            if buffer.startswith(b'\r\n'):
+                index, end = 0, 2
+            else:
+                index = buffer.find(b'\r\n\r\n')
+                end = index + 4
+
+            if index == -1:
+                if len(buffer) > MAX_PART_HEADERS:
+                    raise ValueError('Multipart headers too long')
+                return False
+
+            self._start_part(bytes(buffer[:index]))
+            del buffer[:end]
+            self._state = BODY
+            return True
+
+        if self._state == BODY:
+            index = buffer.find(delimiter)
+            if index == -1:
+                keep = len(delimiter) - 1
+                if len(buffer) > keep:
+                    self._write_buffer(len(buffer) - keep)
+                return False
+
+            self._write_buffer(index)
+            self._finish_part()
+            self._state = PREAMBLE
+            return True
+
+        return False
+
+    def _start_part(self, headers):
+        name = filename = content_type = None
+        for line in headers.decode('utf-8').split('\r\n'):
+            if not line:
+                continue
+
+            header_name, _, header_value = line.partition(':')
+            value, params = parse_header(header_value.strip())
+            header_name = header_name.strip().lower()
+
+            if header_name == 'content-disposition':
+                name = params.get('name')
+                filename = params.get('filename')
+            elif header_name == 'content-type':
+                content_type = value
+
+        self._part_name = name
+        if filename or content_type:
+            self._part_file = File(
+                content_type, filename,
+                SpooledTemporaryFile(max_size=self._spool_size))
+        else:
+            self._part_data = bytearray()
+
+    def _write_buffer(self, end):
+        """Writes the buffer up to end to the part and removes it."""
+        with memoryview(self._buffer) as view:
+            if self._part_file:
+                self._part_file.file.write(view[:end])
+            else:
+                self._part_data += view[:end]
+
+        del self._buffer[:end]
+
+    def _finish_part(self):
+        if self._part_file:
+            self._part_file.file.seek(0)
+            self._files.append((self._part_name, self._part_file))
+        else:
+            self._fields.append(
+                (self._part_name, self._part_data.decode('utf-8')))
+
+        self._part_name = self._part_file = self._part_data = None
@@ -0,0 +1,78 @@
+import asyncio
+from collections import deque
+
+
+class BodyStream:
+    """Request body delivered in chunks as they arrive.
+
+       The protocol feeds a stream for every request to a route registered
+       with `stream=True`. Once more than `limit` bytes wait for the
+       handler the protocol stops reading from the socket and resumes when
+       the handler consumed half of them, so an upload never occupies
+       much more than `limit` bytes of memory."""
+    __slots__ = (
+        '_protocol', '_limit', '_chunks', '_size', '_eof', '_waiter',
+        '_paused')
+
+    def __init__(self, protocol=None, limit=65536):
+        self._protocol = protocol
+        self._limit = limit
+        self._chunks = deque()
+        self._size = 0
+        self._eof = False
+        self._waiter = None
+        self._paused = False
+
+    @classmethod
+    def from_body(cls, body):
+        stream = cls()
+        if body:
+            stream.feed(body)
+        stream.feed_eof()
+
+        return stream
+
+    def feed(self, data):
+        self._chunks.append(data)
+        self._size += len(data)
+
+        if self._protocol and not self._paused and self._size > self._limit:
+            self._paused = True
+            self._protocol.pause_stream(self)
+
+        self._wakeup()
+
+    def feed_eof(self):
+        self._eof = True
+        self._wakeup()
+
+    def _wakeup(self):
+        waiter = self._waiter
+        if waiter:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._chunks:
+            if self._eof:
+                raise StopAsyncIteration
+
+            self._waiter = asyncio.get_event_loop().create_future()
+            await self._waiter
+
+        chunk = self._chunks.popleft()
+        self._size -= len(chunk)
+
+        if self._paused and self._size <= self._limit // 2:
+            self._paused = False
+            self._protocol.resume_stream(self)
+
+        return chunk
+
+    async def read(self):
+        """Returns the rest of the body as bytes."""
+        return b''.join([chunk async for chunk in self])
@@ -0,0 +1,62 @@
+import pytest
+
+from .headers import MultiHeaders, parse_header
+
+
+@pytest.fixture
+def headers():
+    return MultiHeaders([
+        ('Host', 'example.com'),
+        ('X-Forwarded-For', '10.0.0.1'),
+        ('Cookie', 'a=1'),
+        ('X-Forwarded-For', '10.0.0.2'),
+        ('Cookie', 'b=2')])
+
+
+def test_getitem(headers):
+    assert headers['host'] == 'example.com'
+    assert headers['X-FORWARDED-FOR'] == '10.0.0.2'
+
+    with pytest.raises(KeyError):
+        headers['Authorization']
+
+
+def test_getall(headers):
+    assert headers.getall('x-forwarded-for') == ['10.0.0.1', '10.0.0.2']
+    assert headers.getall('Cookie') == ['a=1', 'b=2']
+    assert headers.getall('Authorization') == []
+    assert headers.getall('Authorization', ['none']) == ['none']
+
+
+def test_mapping(headers):
+    assert 'cookie' in headers
+    assert 'Authorization' not in headers
+    assert 1 not in headers
+    assert len(headers) == 3
+    assert list(headers) == ['Host', 'X-Forwarded-For', 'Cookie']
+    assert headers.get('cookie') == 'b=2'
+    assert dict(headers) == {
+        'Host': 'example.com', 'X-Forwarded-For': '10.0.0.2',
+        'Cookie': 'b=2'}
+    assert len(headers.multi_items()) == 5
+
+
+def test_empty():
+    headers = MultiHeaders([])
+
+    assert len(headers) == 0
+    assert headers.get('Host') is None
+
+
+@pytest.mark.parametrize('line,value,params', [
+    ('text/plain', 'text/plain', {}),
+    ('text/plain; charset=UTF-8', 'text/plain', {'charset': 'UTF-8'}),
+    ('multipart/form-data; boundary="a;b"; Charset = latin-1',
+     'multipart/form-data', {'boundary': 'a;b', 'charset': 'latin-1'}),
+    ('form-data; name="a"; filename="x \\"y\\".txt"',
+     'form-data', {'name': 'a', 'filename': 'x "y".txt'}),
+    ('form-data; name=""; flag', 'form-data', {'name': ''}),
+    ('', '', {}),
+])
+def test_parse_header(line, value, params):
+    assert parse_header(line) == (value, params)
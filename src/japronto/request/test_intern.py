@@ -0,0 +1,59 @@
+import pytest
+
+from .crequest import _intern_entries, _intern_lookup
+
+
+TABLES = ['methods', 'header_names', 'header_values']
+
+
+def entries(table):
+    return [(table, entry) for entry in _intern_entries(table)]
+
+
+@pytest.mark.parametrize(
+    'table,entry', [e for table in TABLES for e in entries(table)])
+def test_entry(table, entry):
+    data = entry.encode('ascii')
+
+    assert _intern_lookup(table, data) is entry
+    assert _intern_lookup(table, bytearray(data)) is entry
+
+    # near misses are either other entries or nothing
+    for miss in [data[:-1], data + b'x', data[1:], b'x' + data]:
+        result = _intern_lookup(table, miss)
+        assert result is None or result.encode('ascii') == miss
+
+
+@pytest.mark.parametrize('table,data,expected', [
+    ('header_names', b'content-type', 'Content-Type'),
+    ('header_names', b'CONTENT-TYPE', 'Content-Type'),
+    ('header_names', b'x-FORWARDED-for', 'X-Forwarded-For'),
+    ('header_names', b'te', 'Te'),
+    ('header_names', b'upgrade-insecure-requests',
+     'Upgrade-Insecure-Requests'),
+    ('methods', b'get', None),
+    ('methods', b'Get', None),
+    ('header_values', b'Chunked', None),
+    ('header_values', b'KEEP-ALIVE', None),
+    ('header_values', b'Keep-Alive', 'Keep-Alive'),
+    ('header_values', b'application/x-www-form-urlencoded',
+     'application/x-www-form-urlencoded'),
+    ('header_values', b'application/x-www-form-urlencoded; charset=utf-8',
+     None),
+    ('header_names', b'Content-Typf', None),
+    ('header_names', b'Content_Type', None),
+    ('methods', b'', None),
+    ('header_values', b'x' * 1000, None),
+])
+def test_lookup(table, data, expected):
+    result = _intern_lookup(table, data)
+    if expected is None:
+        assert result is None
+    else:
+        assert result == expected
+        assert result is _intern_lookup(table, expected.encode('ascii'))
+
+
+def test_unknown_table():
+    with pytest.raises(ValueError):
+        _intern_lookup('paths', b'/')
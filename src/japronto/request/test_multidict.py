@@ -0,0 +1,32 @@
+import pytest
+
+from .crequest import parse_urlencoded
+from .multidict import MultiDict
+
+
+@pytest.mark.parametrize('data,items', [
+    (b'', []),
+    (b'a=1', [('a', '1')]),
+    (b'a=1&b=2&a=3', [('a', '1'), ('b', '2'), ('a', '3')]),
+    (b'a=&b&=1&&c=2', [('', '1'), ('c', '2')]),
+    (b'q=a+b%20c%2B%26%3d', [('q', 'a b c+&=')]),
+    (b'k%C3%B3d=z%c5%82oty', [('kód', 'złoty')]),
+    (b'a=%zz%4&b=%', [('a', '%zz%4'), ('b', '%')]),
+    (b'a=%ff', [('a', '�')]),
+])
+def test_parse_urlencoded(data, items):
+    assert parse_urlencoded(data) == items
+    assert parse_urlencoded(bytearray(data)) == items
+
+
+def test_multidict():
+    query = MultiDict([('a', '1'), ('b', '2'), ('a', '3')])
+
+    assert query == {'a': '3', 'b': '2'}
+    assert query['a'] == '3'
+    assert query.get('c') is None
+    assert query.getall('a') == ['1', '3']
+    assert query.getall('c') == []
+    assert query.getall('c', ['0']) == ['0']
+    assert query.multi_items() == [('a', '1'), ('b', '2'), ('a', '3')]
+    assert MultiDict() == {}
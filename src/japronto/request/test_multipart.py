@@ -0,0 +1,124 @@
+import pytest
+
+from .multipart import FEED_SIZE, MultipartParser
+
+
+BOUNDARY = b'----boundary'
+
+
+def multipart(*parts):
+    body = b'preamble\r\n'
+    for headers, content in parts:
+        body += b'--' + BOUNDARY + b'\r\n'
+        for header in headers:
+            body += header + b'\r\n'
+        body += b'\r\n' + content + b'\r\n'
+
+    return body + b'--' + BOUNDARY + b'--\r\nepilogue'
+
+
+BODY = multipart(
+    ([b'Content-Disposition: form-data; name="a"'], b'1'),
+    ([b'Content-Disposition: form-data; name="text"'],
+     'zażółć\r\n--'.encode('utf-8')),
+    ([b'Content-Disposition: form-data; name="upload"; filename="a.txt"',
+      b'Content-Type: text/plain'], b'hello\r\n-- world'),
+    ([b'Content-Disposition: form-data; name="a"'], b''),
+    ([b'content-disposition: form-data; name="upload"; filename="b.bin"'],
+     b'\r\n' * 10))
+
+
+def check(fields, files):
+    assert fields.multi_items() == [
+        ('a', '1'), ('text', 'zażółć\r\n--'), ('a', '')]
+
+    first, second = files.getall('upload')
+    assert first.name == 'a.txt'
+    assert first.type == 'text/plain'
+    assert first.file.read() == b'hello\r\n-- world'
+    assert second.name == 'b.bin'
+    assert second.type is None
+    assert second.body == b'\r\n' * 10
+
+
+def test_whole():
+    parser = MultipartParser(BOUNDARY)
+    parser.feed(BODY)
+
+    check(*parser.close())
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 16, 17, 64])
+def test_chunks(size):
+    parser = MultipartParser(BOUNDARY)
+    for i in range(0, len(BODY), size):
+        parser.feed(BODY[i:i + size])
+
+    check(*parser.close())
+
+
+def test_spool():
+    content = bytes(range(256)) * 1024
+    body = multipart(
+        ([b'Content-Disposition: form-data; name="f"; filename="big"'],
+         content),
+        ([b'Content-Disposition: form-data; name="g"; filename="small"'],
+         b'small'))
+
+    parser = MultipartParser(BOUNDARY, spool_size=64 * 1024)
+    for i in range(0, len(body), 4096):
+        parser.feed(body[i:i + 4096])
+    _, files = parser.close()
+
+    assert files['f'].file._rolled
+    assert files['f'].body == content
+    assert not files['g'].file._rolled
+    assert files['g'].body == b'small'
+
+
+class TrackingParser(MultipartParser):
+    max_buffer = 0
+
+    def _step(self):
+        self.max_buffer = max(self.max_buffer, len(self._buffer))
+        return super()._step()
+
+
+@pytest.mark.parametrize('data', [bytes, memoryview], ids=['bytes', 'view'])
+def test_bounded_buffer(data):
+    content = bytes(range(256)) * 4096
+    body = multipart(
+        ([b'Content-Disposition: form-data; name="f"; filename="big"'],
+         content),
+        ([b'Content-Disposition: form-data; name="a"'], b'1' * FEED_SIZE))
+
+    parser = TrackingParser(BOUNDARY)
+    parser.feed(data(body))
+    fields, files = parser.close()
+
+    # a whole body is fed in slices
+    assert parser.max_buffer <= FEED_SIZE + 64
+    assert files['f'].body == content
+    assert fields['a'] == '1' * FEED_SIZE
+
+
+def test_empty():
+    parser = MultipartParser(BOUNDARY)
+    parser.feed(b'--' + BOUNDARY + b'--\r\n')
+    fields, files = parser.close()
+
+    assert fields == {}
+    assert files == {}
+
+
+@pytest.mark.parametrize('body', [
+    b'',
+    b'--' + BOUNDARY + b'\r\nContent-Disposition: form-data; name="a"\r\n',
+    multipart(([b'Content-Disposition: form-data; name="a"'], b'1'))[:-20],
+])
+def test_incomplete(body):
+    parser = MultipartParser(BOUNDARY)
+    parser.feed(body)
+
+    with pytest.raises(ValueError):
+        parser.close()
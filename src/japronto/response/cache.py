@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from time import monotonic
+
+
+class ResponseCache:
+    """LRU cache of rendered responses for routes registered with
+       `cache_ttl`.
+
+       Entries are keyed by route, path, query string and the values of
+       the route's `cache_vary` headers and are evicted least recently used
+       first once there are more than `max_entries` of them or they take
+       more than `max_bytes`. A hit is written without calling the
+       handler."""
+    __slots__ = ('max_entries', 'max_bytes', 'size', 'hits', 'misses',
+                 '_entries')
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError('max_entries and max_bytes must be positive')
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, request):
+        """Returns the cached response as bytes, the key to store the
+           response under or None if the response can't be cached.
+
+           Rendered responses depend on the protocol version and keep-alive
+           so only keep-alive HTTP/1.1 GET requests are served."""
+        if request.method != 'GET' or request.version != '1.1' \
+           or not request.keep_alive:
+            return None
+
+        route = request.route
+        key = (route, request.path, request.query_string)
+        if route.cache_vary:
+            headers = request.headers
+            key += tuple(headers.get(name) for name in route.cache_vary)
+
+        entry = self._entries.get(key)
+        if entry:
+            response, expires = entry
+            if expires > monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+                return response
+
+            self.size -= len(response)
+            del self._entries[key]
+
+        self.misses += 1
+
+        return key
+
+    def store(self, key, response):
+        if len(response) > self.max_bytes:
+            return
+
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.size -= len(entry[0])
+
+        self._entries[key] = response, monotonic() + key[0].cache_ttl
+        self.size += len(response)
+
+        while len(self._entries) > self.max_entries \
+                or self.size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
@@ -1,5 +1,6 @@
 #include <Python.h>
 #include <sys/param.h>
+#include <time.h>
 
 #include "cresponse.h"
 #include "capsule.h"
@@ -7,6 +8,8 @@
 
 #ifdef RESPONSE_OPAQUE
 static PyObject* json_dumps;
+// set with set_json_encoder(), json.dumps by default
+static PyObject* json_encoder;
 static const size_t reason_offset = 13;
 static const size_t minor_offset = 7;
 #endif
@@ -38,9 +41,12 @@ Response_new(PyTypeObject* type, Response* self)
   self->opaque = false;
 #endif
 
+  self->owner = NULL;
   self->code = NULL;
   self->mime_type = NULL;
   self->body = NULL;
+  self->stream = NULL;
+  self->stream_length = -1;
   self->encoding = NULL;
   self->headers = NULL;
   self->cookies = NULL;
@@ -63,12 +69,24 @@ void
 #endif
 Response_dealloc(Response* self)
 {
+#ifdef RESPONSE_OPAQUE
+  if(!self->opaque) {
+    // embedded response lost it's last reference, the fields are released
+    // together with the owning request
+    PyObject* owner = self->owner;
+    self->owner = NULL;
+    Py_XDECREF(owner);
+    return;
+  }
+#endif
+
   if(self->buffer != self->inline_buffer)
     free(self->buffer);
 
   Py_XDECREF(self->cookies);
   Py_XDECREF(self->headers);
   Py_XDECREF(self->encoding);
+  Py_XDECREF(self->stream);
   Py_XDECREF(self->body);
   Py_XDECREF(self->mime_type);
   Py_XDECREF(self->code);
@@ -87,6 +105,26 @@ static const size_t code_offset = 9;
 static PyObject* application_json;
 static PyObject* application_octet;
 
+
+/* Default Date and Server headers rendered into every response unless the
+   response sets its own. The date is formatted once per second by
+   update_date(), called from a loop timer, instead of on every render. */
+#define DATE_LEN (sizeof("Sun, 06 Nov 1994 08:49:37 GMT") - 1)
+
+static bool date_enabled = false;
+static char date_line[] = "Date: Thu, 01 Jan 1970 00:00:00 GMT\r\n";
+static char* const date_value = date_line + sizeof("Date: ") - 1;
+static PyObject* server_line;
+
+static PyObject* Date;
+static PyObject* Server;
+
+static const char days[][4] = {
+  "Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"};
+static const char months[][4] = {
+  "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+  "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"};
+
 int
 Response_init(Response* self, PyObject *args, PyObject *kw)
 {
@@ -116,8 +154,22 @@ Response_init(Response* self, PyObject *args, PyObject *kw)
   if(!empty(json)) {
     assert(empty(text) && empty(body));
 
-    if(!(text = PyObject_CallFunctionObjArgs(json_dumps, json, NULL)))
+    if(!(text = PyObject_CallFunctionObjArgs(json_encoder, json, NULL)))
       goto error;
+
+    // encoders like orjson produce UTF-8 bytes, used as the body as they are
+    if(PyBytes_Check(text)) {
+      if(empty(encoding)) {
+        self->body = text;
+        text = NULL;
+      } else {
+        PyObject* encoded = text;
+        text = PyUnicode_FromEncodedObject(encoded, "utf-8", NULL);
+        Py_DECREF(encoded);
+        if(!text)
+          goto error;
+      }
+    }
   } else if(!empty(text)) {
     Py_INCREF(text);
   }
@@ -141,8 +193,22 @@ Response_init(Response* self, PyObject *args, PyObject *kw)
   }
 
   if(!empty(body)) {
-    self->body = body;
-    Py_INCREF(self->body);
+    PyAsyncMethods* as_async = Py_TYPE(body)->tp_as_async;
+
+    if(as_async && as_async->am_aiter) {
+      self->stream = body;
+      Py_INCREF(self->stream);
+
+      // sized streams, like files, go out with Content-Length
+      if((self->stream_length = PyObject_Length(body)) == -1) {
+        if(!PyErr_ExceptionMatches(PyExc_TypeError))
+          goto error;
+        PyErr_Clear();
+      }
+    } else {
+      self->body = body;
+      Py_INCREF(self->body);
+    }
   }
 
   if(!empty(mime_type)) {
@@ -216,81 +282,13 @@ static const char text_plain[] = "text/plain";
   memcpy(self->buffer + buffer_offset, data, len); \
   buffer_offset += len;
 
-#ifdef RESPONSE_CACHE
-
-typedef struct {
-  PyObject* body;
-  PyObject* response_bytes;
-} CacheEntry;
-
-#define CACHE_LEN 10
-#define CACHE_CUTOFF 4096
-
-typedef struct {
-  size_t end;
-  CacheEntry entries[CACHE_LEN];
-} Cache;
-
-static Cache cache = {0};
-
-#define Bytes_AS_STRING(op) ((PyBytesObject *)op)->ob_sval
-
-#define Response_cacheable(r, simple) \
-  simple && r->body && Py_SIZE(r->body) < CACHE_CUTOFF \
-  && !r->code && !r->headers && !r->cookies && !r->mime_type \
-  && !r->encoding && r->minor_version == 1 && r->keep_alive == KEEP_ALIVE_TRUE
-
-static inline PyObject*
-Response_from_cache(PyObject* body)
-{
-  CacheEntry* cache_entry;
-  for(cache_entry = cache.entries; cache_entry < cache.entries + cache.end;
-      cache_entry++) {
-    if(Py_SIZE(cache_entry->body) != Py_SIZE(body))
-      continue;
-
-    if(memcmp(Bytes_AS_STRING(cache_entry->body), Bytes_AS_STRING(body), Py_SIZE(body)) != 0)
-      continue;
-
-    Py_INCREF(cache_entry->response_bytes);
-    return cache_entry->response_bytes;
-  }
-
-  return NULL;
-}
-
-
-static inline void
-Response_cache(PyObject* body, PyObject* response_bytes)
-{
-  if(cache.end == CACHE_LEN)
-    return;
-
-  CacheEntry* entry = cache.entries + cache.end;
-  entry->body = body;
-  entry->response_bytes = response_bytes;
-
-  Py_INCREF(body);
-  Py_INCREF(response_bytes);
-  cache.end++;
-}
-
-#endif
-
-
 PyObject*
-Response_render(Response* self, bool simple)
+Response_render(Response* self)
 {
   PyObject* response_bytes = NULL;
   PyObject* cookies_str = NULL;
   PyObject* cookies_bytes = NULL;
 
-#ifdef RESPONSE_CACHE
-  bool cacheable = Response_cacheable(self, simple);
-  if(cacheable && (response_bytes = Response_from_cache(self->body)))
-    return response_bytes;
-#endif
-
   size_t buffer_offset;
   Py_ssize_t body_len = 0;
   const char* body = NULL;
@@ -334,34 +332,71 @@ Response_render(Response* self, bool simple)
     buffer_offset = strlen(header);
   }
 
-  if(self->body) {
-    if(PyBytes_AsStringAndSize(self->body, (char**)&body, &body_len) == -1)
-      goto error;
+  if(Response_chunked(self)) {
+    // the length of a streamed body is not known upfront, HTTP/1.0
+    // clients read until the connection is closed
+    buffer_offset -= strlen("Content-Length: ");
 
-    int result = sprintf(
-      self->buffer + buffer_offset, "%ld", (unsigned long)body_len);
-    buffer_offset += result;
+    if(self->minor_version == 1) {
+      memcpy(
+        self->buffer + buffer_offset, "Transfer-Encoding: chunked\r\n",
+        strlen("Transfer-Encoding: chunked\r\n"));
+      buffer_offset += strlen("Transfer-Encoding: chunked\r\n");
+    }
   } else {
-    *(self->buffer + buffer_offset) = '0';
-    buffer_offset++;
-  }
+    if(self->body) {
+      if(PyBytes_AsStringAndSize(self->body, (char**)&body, &body_len) == -1)
+        goto error;
 
-  CRLF
+      int result = sprintf(
+        self->buffer + buffer_offset, "%ld", (unsigned long)body_len);
+      buffer_offset += result;
+    } else if(self->stream) {
+      int result = sprintf(
+        self->buffer + buffer_offset, "%ld", (unsigned long)self->stream_length);
+      buffer_offset += result;
+    } else {
+      *(self->buffer + buffer_offset) = '0';
+      buffer_offset++;
+    }
+
+    CRLF
+  }
 
   if(self->minor_version == 1 && self->keep_alive == KEEP_ALIVE_FALSE) {
     memcpy(
       self->buffer + buffer_offset, "Connection: close\r\n",
       strlen("Connection: close\r\n"));
     buffer_offset += strlen("Connection: close\r\n");
-  } else if(self->minor_version == 0 && self->keep_alive == KEEP_ALIVE_TRUE) {
+  } else if(self->minor_version == 0 && self->keep_alive == KEEP_ALIVE_TRUE
+            && !Response_chunked(self)) {
     memcpy(
       self->buffer + buffer_offset, "Connection: keep-alive\r\n",
       strlen("Connection: keep-aplive\r\n"));
     buffer_offset += strlen("Connection: keep-alive\r\n");
   }
 
+  if(date_enabled) {
+    int has_date = self->headers ? PyDict_Contains(self->headers, Date) : 0;
+    if(has_date == -1)
+      goto error;
+    if(!has_date) {
+      bfrcpy(date_line, strlen(date_line))
+    }
+  }
+
+  if(server_line) {
+    int has_server =
+      self->headers ? PyDict_Contains(self->headers, Server) : 0;
+    if(has_server == -1)
+      goto error;
+    if(!has_server) {
+      bfrcpy(PyBytes_AS_STRING(server_line), (size_t)Py_SIZE(server_line))
+    }
+  }
+
   // dont output Content-Type if there is no body
-  if(!self->body)
+  if(!self->body && !self->stream)
     goto headers;
 
   memcpy(self->buffer + buffer_offset, Content_Type, strlen(Content_Type));
@@ -482,11 +517,6 @@ Response_render(Response* self, bool simple)
   if(!(response_bytes = PyBytes_FromStringAndSize(self->buffer, buffer_offset)))
     goto error;
 
-#ifdef RESPONSE_CACHE
-  if(cacheable)
-    Response_cache(self->body, response_bytes);
-#endif
-
   goto finally;
 
   error:
@@ -501,8 +531,182 @@ Response_render(Response* self, bool simple)
 }
 
 
+/* Renders a response created outside of a request, the protocol version
+   and keep-alive are normally taken from the request. */
+static PyObject*
+Response_render_for(Response* self, PyObject* args)
+{
+  int minor_version;
+  int keep_alive;
+
+  if(!PyArg_ParseTuple(args, "ip", &minor_version, &keep_alive))
+    return NULL;
+
+  if(minor_version != 0 && minor_version != 1) {
+    PyErr_SetString(PyExc_ValueError, "minor_version must be 0 or 1");
+    return NULL;
+  }
+
+  if(self->stream) {
+    PyErr_SetString(
+      PyExc_ValueError, "Streamed responses can't be rendered upfront");
+    return NULL;
+  }
+
+  self->minor_version = minor_version;
+  self->keep_alive = keep_alive ? KEEP_ALIVE_TRUE : KEEP_ALIVE_FALSE;
+
+  return Response_render(self);
+}
+
+
+/* Returns rendered response bytes with the Date header set to the cached
+   date, bytes rendered in an earlier second are copied. Used for responses
+   rendered upfront or taken from the response cache. */
+static PyObject*
+Response_refresh_date(PyObject* rendered)
+{
+  PyObject* result = rendered;
+  char* data = PyBytes_AS_STRING(rendered);
+  size_t len = (size_t)Py_SIZE(rendered);
+  char* headers_end;
+  char* date;
+
+  if(!date_enabled)
+    goto finally;
+
+  if(!(headers_end = memmem(data, len, "\r\n\r\n", 4)))
+    goto finally;
+
+  if(!(date = memmem(data, headers_end - data, "\r\nDate: ", 8)))
+    goto finally;
+  date += 8;
+
+  if(memcmp(date, date_value, DATE_LEN) == 0)
+    goto finally;
+
+  if(!(result = PyBytes_FromStringAndSize(data, len)))
+    return NULL;
+
+  memcpy(PyBytes_AS_STRING(result) + (date - data), date_value, DATE_LEN);
+  return result;
+
+  finally:
+  Py_INCREF(result);
+  return result;
+}
+
+
+static PyObject*
+set_json_encoder(PyObject* self, PyObject* args)
+{
+  PyObject* encoder = Py_None;
+
+  if(!PyArg_ParseTuple(args, "|O", &encoder))
+    return NULL;
+
+  if(encoder == Py_None)
+    encoder = json_dumps;
+
+  if(!PyCallable_Check(encoder)) {
+    PyErr_SetString(PyExc_TypeError, "json_encoder must be callable");
+    return NULL;
+  }
+
+  Py_INCREF(encoder);
+  Py_XDECREF(json_encoder);
+  json_encoder = encoder;
+
+  Py_RETURN_NONE;
+}
+
+
+static PyObject*
+update_date(PyObject* self, PyObject* args)
+{
+  PyObject* timestamp = NULL;
+  time_t now;
+  struct tm tm;
+
+  if(!PyArg_ParseTuple(args, "|O", &timestamp))
+    return NULL;
+
+  if(timestamp && timestamp != Py_None) {
+    now = (time_t)PyLong_AsLong(timestamp);
+    if(now == -1 && PyErr_Occurred())
+      return NULL;
+  } else {
+    // time() reads a coarse clock that lags behind at the second boundary
+    struct timespec ts;
+    clock_gettime(CLOCK_REALTIME, &ts);
+    now = ts.tv_sec;
+  }
+
+  if(!gmtime_r(&now, &tm)) {
+    PyErr_SetString(PyExc_OverflowError, "timestamp out of range");
+    return NULL;
+  }
+
+  // IMF-fixdate from RFC 7231, independent of the locale unlike strftime
+  char buffer[DATE_LEN + 1];
+  snprintf(
+    buffer, sizeof(buffer), "%s, %02d %s %04d %02d:%02d:%02d GMT",
+    days[tm.tm_wday], tm.tm_mday, months[tm.tm_mon], tm.tm_year + 1900,
+    tm.tm_hour, tm.tm_min, tm.tm_sec);
+  memcpy(date_value, buffer, DATE_LEN);
+
+  Py_RETURN_NONE;
+}
+
+
+static PyObject*
+set_default_headers(PyObject* self, PyObject* args, PyObject* kw)
+{
+  static char *kwlist[] = {"date", "server", NULL};
+
+  PyObject* result = Py_None;
+  int date = 0;
+  PyObject* server = NULL;
+  PyObject* line_str = NULL;
+  PyObject* line = NULL;
+
+  if(!PyArg_ParseTupleAndKeywords(args, kw, "|pO", kwlist, &date, &server))
+    goto error;
+
+  if(!empty(server)) {
+    if(!(line_str = PyUnicode_FromFormat("Server: %S\r\n", server)))
+      goto error;
+
+    if(!(line = PyUnicode_AsASCIIString(line_str)))
+      goto error;
+
+    if(memchr(PyBytes_AS_STRING(line), '\r', Py_SIZE(line) - 2)
+       || memchr(PyBytes_AS_STRING(line), '\n', Py_SIZE(line) - 2)) {
+      PyErr_SetString(PyExc_ValueError, "Invalid Server header");
+      goto error;
+    }
+  }
+
+  date_enabled = date;
+  Py_XDECREF(server_line);
+  server_line = line;
+  line = NULL;
+
+  goto finally;
+
+  error:
+  result = NULL;
+
+  finally:
+  Py_XINCREF(result);
+  Py_XDECREF(line);
+  Py_XDECREF(line_str);
+  return result;
+}
+
+
 static PyMethodDef Response_methods[] = {
-  //{"render", (PyCFunction)Response_render, METH_NOARGS, "render"},
+  {"render", (PyCFunction)Response_render_for, METH_VARARGS, ""},
   {NULL}
 };
 
@@ -549,12 +753,21 @@ static PyTypeObject ResponseType = {
 };
 
 
+static PyMethodDef cresponse_methods[] = {
+  {"set_json_encoder", (PyCFunction)set_json_encoder, METH_VARARGS, ""},
+  {"update_date", (PyCFunction)update_date, METH_VARARGS, ""},
+  {"set_default_headers", (PyCFunction)set_default_headers,
+   METH_VARARGS | METH_KEYWORDS, ""},
+  {NULL}
+};
+
+
 static PyModuleDef cresponse = {
   PyModuleDef_HEAD_INIT,
   "cresponse",
   "cresponse",
   -1,
-  NULL, NULL, NULL, NULL, NULL
+  cresponse_methods, NULL, NULL, NULL, NULL
 };
 
 
@@ -581,16 +794,26 @@ PyInit_cresponse(void)
   if(!(json_dumps = PyObject_GetAttrString(json, "dumps")))
     goto error;
 
+  json_encoder = json_dumps;
+  Py_INCREF(json_encoder);
+
   if(!(application_json = PyUnicode_FromString("application/json")))
     goto error;
 
   if(!(application_octet = PyUnicode_FromString("application/octet-stream")))
     goto error;
 
+  if(!(Date = PyUnicode_InternFromString("Date")))
+    goto error;
+
+  if(!(Server = PyUnicode_InternFromString("Server")))
+    goto error;
+
   static Response_CAPI capi = {
     &ResponseType,
     Response_render,
-    Response_init
+    Response_init,
+    Response_refresh_date
   };
   api_capsule = export_capi(m, "japronto.response.cresponse", &capi);
   if(!api_capsule)
@@ -11,12 +11,18 @@ typedef struct {
   PyObject_HEAD
 
   bool opaque;
+  // request keeping an embedded response alive while it's referenced
+  PyObject* owner;
   int minor_version;
   KEEP_ALIVE keep_alive;
 
   PyObject* code;
   PyObject* mime_type;
   PyObject* body;
+  // async iterable producing the body, written with chunked encoding
+  // unless it knows its length upfront
+  PyObject* stream;
+  Py_ssize_t stream_length;
   PyObject* encoding;
   PyObject* headers;
   PyObject* cookies;
@@ -27,10 +33,14 @@ typedef struct {
 } Response;
 
 
+#define Response_chunked(r) ((r)->stream && (r)->stream_length < 0)
+
+
 typedef struct {
   PyTypeObject* ResponseType;
-  PyObject* (*Response_render)(Response*, bool);
+  PyObject* (*Response_render)(Response*);
   int (*Response_init)(Response* self, PyObject *args, PyObject *kw);
+  PyObject* (*Response_refresh_date)(PyObject* rendered);
 } Response_CAPI;
 
 #ifndef RESPONSE_OPAQUE
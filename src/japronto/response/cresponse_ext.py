@@ -3,8 +3,6 @@ from distutils.core import Extension
 
 def get_extension():
     define_macros = [('RESPONSE_OPAQUE', 1)]
-    if system.args.enable_response_cache:
-        define_macros.append(('RESPONSE_CACHE', 1))
 
     return Extension(
         'japronto.response.cresponse',
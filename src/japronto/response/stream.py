@@ -0,0 +1,122 @@
+import asyncio
+import os
+import traceback
+
+
+async def write_chunks(protocol, transport, body, chunked):
+    async for chunk in body:
+        if not chunk:
+            continue
+
+        if chunked:
+            transport.writelines((b'%x\r\n' % len(chunk), chunk, b'\r\n'))
+        else:
+            transport.write(chunk)
+
+        drained = protocol.drain()
+        if drained:
+            await drained
+
+
+async def write_body(protocol, transport, body, chunked, close):
+    """Writes the chunks an async iterable produces as the body of a
+       response.
+
+       HTTP/1.1 bodies use chunked encoding, HTTP/1.0 ones end when the
+       connection is closed, unless the body knows its length. Writing waits
+       whenever the transport asks the protocol to pause writing so a slow
+       client doesn't make the server buffer the whole body. Bodies with a
+       `sendfile` method write themselves."""
+    try:
+        sendfile = getattr(body, 'sendfile', None)
+        if sendfile and not chunked:
+            await sendfile(protocol, transport)
+        else:
+            await write_chunks(protocol, transport, body, chunked)
+    except Exception:
+        traceback.print_exc()
+        # the headers are gone already, closing without the last chunk is
+        # the only way to tell the client the body is incomplete
+        transport.close()
+        return
+
+    if chunked:
+        transport.write(b'0\r\n\r\n')
+
+    if close:
+        transport.close()
+
+
+class FileBody:
+    """Part of a file sent as a response body.
+
+       The file is opened only when the body is written and goes out with
+       `os.sendfile()` straight to the socket of the transport, so the
+       contents are not copied into Python while the client keeps up."""
+    __slots__ = ('path', 'offset', 'count')
+
+    def __init__(self, path, offset, count):
+        self.path = path
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __aiter__(self):
+        return self._read()
+
+    async def _read(self, size=65536):
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            left = self.count
+            while left:
+                chunk = f.read(min(size, left))
+                if not chunk:
+                    raise EOFError('{} was truncated'.format(self.path))
+                left -= len(chunk)
+                yield chunk
+
+    async def sendfile(self, protocol, transport, size=65536):
+        """Sends the file with `os.sendfile()` while the transport has
+           nothing buffered, otherwise the data would overtake what it
+           buffered. Once the socket is full a chunk goes through the
+           transport instead and writing waits until the transport resumes
+           writing."""
+        sock = transport.get_extra_info('socket')
+        if sock is None:
+            await write_chunks(protocol, transport, self, False)
+            return
+
+        with open(self.path, 'rb') as f:
+            offset = self.offset
+            left = self.count
+            while left and not transport.is_closing():
+                if not transport.get_write_buffer_size():
+                    try:
+                        sent = os.sendfile(
+                            sock.fileno(), f.fileno(), offset,
+                            min(size, left))
+                    except BlockingIOError:
+                        pass
+                    else:
+                        if not sent:
+                            raise EOFError(
+                                '{} was truncated'.format(self.path))
+                        offset += sent
+                        left -= sent
+                        continue
+
+                chunk = os.pread(f.fileno(), min(size, left), offset)
+                if not chunk:
+                    raise EOFError('{} was truncated'.format(self.path))
+                transport.write(chunk)
+                offset += len(chunk)
+                left -= len(chunk)
+
+                drained = protocol.drain()
+                if drained:
+                    await drained
+                else:
+                    # let the transport write what it buffered
+                    await asyncio.sleep(0)
@@ -0,0 +1,124 @@
+import pytest
+
+from japronto.router import Route
+from . import cache as cache_module
+from .cache import ResponseCache
+
+
+class FakeRequest:
+    def __init__(self, route, path='/', query_string=None, headers=None,
+                 method='GET', version='1.1', keep_alive=True):
+        self.route = route
+        self.path = path
+        self.query_string = query_string
+        self.headers = headers or {}
+        self.method = method
+        self.version = version
+        self.keep_alive = keep_alive
+
+
+def handler(request):
+    return request.Response()
+
+
+@pytest.fixture
+def route():
+    return Route('/{id}', handler, ['GET'], cache_ttl=5)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, 'monotonic', lambda: now[0])
+
+    return now
+
+
+def test_hit(route, clock):
+    cache = ResponseCache()
+    request = FakeRequest(route, '/1')
+
+    key = cache.lookup(request)
+    assert isinstance(key, tuple)
+    cache.store(key, b'response')
+
+    assert cache.lookup(request) == b'response'
+    assert cache.lookup(FakeRequest(route, '/1', 'a=1')) != b'response'
+    assert cache.lookup(FakeRequest(route, '/2')) != b'response'
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert len(cache) == 1
+    assert cache.size == len(b'response')
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'method': 'HEAD'}, {'version': '1.0'}, {'keep_alive': False}])
+def test_not_cacheable(route, kwargs):
+    cache = ResponseCache()
+
+    assert cache.lookup(FakeRequest(route, **kwargs)) is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_expire(route, clock):
+    cache = ResponseCache()
+    request = FakeRequest(route)
+    cache.store(cache.lookup(request), b'response')
+
+    clock[0] += 4.9
+    assert cache.lookup(request) == b'response'
+
+    clock[0] += 0.2
+    assert isinstance(cache.lookup(request), tuple)
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_vary(clock):
+    route = Route('/', handler, ['GET'], cache_ttl=5,
+                  cache_vary=['accept-encoding'])
+    cache = ResponseCache()
+
+    gzip = FakeRequest(route, headers={'Accept-Encoding': 'gzip'})
+    plain = FakeRequest(route)
+    cache.store(cache.lookup(gzip), b'gzip')
+    cache.store(cache.lookup(plain), b'plain')
+
+    assert cache.lookup(gzip) == b'gzip'
+    assert cache.lookup(plain) == b'plain'
+
+
+def test_evict_entries(route, clock):
+    cache = ResponseCache(max_entries=2)
+    requests = [FakeRequest(route, '/{}'.format(i)) for i in range(3)]
+
+    cache.store(cache.lookup(requests[0]), b'0')
+    cache.store(cache.lookup(requests[1]), b'1')
+    # touching the first entry makes the second least recently used
+    assert cache.lookup(requests[0]) == b'0'
+    cache.store(cache.lookup(requests[2]), b'2')
+
+    assert len(cache) == 2
+    assert cache.lookup(requests[0]) == b'0'
+    assert cache.lookup(requests[2]) == b'2'
+    assert isinstance(cache.lookup(requests[1]), tuple)
+
+
+def test_evict_bytes(route, clock):
+    cache = ResponseCache(max_bytes=10)
+    requests = [FakeRequest(route, '/{}'.format(i)) for i in range(3)]
+
+    cache.store(cache.lookup(requests[0]), b'x' * 4)
+    cache.store(cache.lookup(requests[1]), b'x' * 4)
+    cache.store(cache.lookup(requests[2]), b'x' * 4)
+
+    assert len(cache) == 2
+    assert cache.size == 8
+    assert isinstance(cache.lookup(requests[0]), tuple)
+
+    # too large to ever fit
+    cache.store(cache.lookup(requests[0]), b'x' * 11)
+    assert len(cache) == 2
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
@@ -0,0 +1,91 @@
+import pytest
+
+from .cresponse import Response, set_default_headers, set_json_encoder, \
+    update_date
+
+
+@pytest.fixture
+def default_headers():
+    yield set_default_headers
+
+    set_default_headers()
+
+
+def headers(rendered):
+    head, _, body = rendered.partition(b'\r\n\r\n')
+
+    return head.split(b'\r\n')[1:]
+
+
+def test_no_default_headers():
+    rendered = Response(text='ok').render(1, True)
+
+    assert not any(h.startswith((b'Date:', b'Server:'))
+                   for h in headers(rendered))
+
+
+@pytest.mark.parametrize('timestamp,date', [
+    (0, b'Thu, 01 Jan 1970 00:00:00 GMT'),
+    (784111777, b'Sun, 06 Nov 1994 08:49:37 GMT'),
+    (1700000000, b'Tue, 14 Nov 2023 22:13:20 GMT'),
+])
+def test_date(default_headers, timestamp, date):
+    default_headers(date=True)
+    update_date(timestamp)
+
+    rendered = Response(text='ok').render(1, True)
+
+    assert b'Date: ' + date in headers(rendered)
+    assert rendered.endswith(b'\r\n\r\nok')
+
+
+def test_server(default_headers):
+    default_headers(server='japronto')
+
+    assert b'Server: japronto' in headers(Response().render(0, False))
+
+
+def test_own_headers_win(default_headers):
+    default_headers(date=True, server='japronto')
+    response = Response(headers={'Date': 'yesterday', 'Server': 'other'})
+
+    rendered = headers(response.render(1, True))
+
+    assert rendered.count(b'Date: yesterday') == 1
+    assert rendered.count(b'Server: other') == 1
+    assert len([h for h in rendered if h.startswith(b'Date:')]) == 1
+    assert len([h for h in rendered if h.startswith(b'Server:')]) == 1
+
+
+def test_invalid_server(default_headers):
+    with pytest.raises(ValueError):
+        default_headers(server='japronto\r\nX-Injected: 1')
+
+
+@pytest.fixture
+def json_encoder():
+    yield set_json_encoder
+
+    set_json_encoder()
+
+
+@pytest.mark.parametrize('result', [
+    b'{"a":1}', '{"a":1}'], ids=['bytes', 'str'])
+def test_json_encoder(json_encoder, result):
+    json_encoder(lambda obj: result)
+
+    rendered = Response(json={'a': 1}).render(1, True)
+
+    assert b'Content-Type: application/json; charset=utf-8' \
+        in headers(rendered)
+    assert rendered.endswith(b'\r\n\r\n{"a":1}')
+
+
+def test_json_encoder_default(json_encoder):
+    json_encoder(None)
+
+    assert Response(json={'a': 1}).render(1, True) \
+        .endswith(b'\r\n\r\n{"a": 1}')
+
+    with pytest.raises(TypeError):
+        json_encoder(1)
@@ -1,5 +1,6 @@
 from .route import Route, RouteNotFoundException
 from .cmatcher import Matcher
+from .static import StaticHandler
 
 
 class Router:
@@ -7,7 +8,9 @@ class Router:
         self._routes = []
         self.matcher_factory = matcher_factory
 
-    def add_route(self, pattern, handler, method=None, methods=None):
+    def add_route(self, pattern, handler, method=None, methods=None,
+                  stream=False, cache_ttl=None, cache_vary=(),
+                  max_body_size=None):
         assert not(method and methods), "Cannot use method and methods"
 
         if method:
@@ -17,11 +20,30 @@ class Router:
             methods = []
 
         methods = {m.upper() for m in methods}
-        route = Route(pattern, handler, methods)
+        route = Route(
+            pattern, handler, methods, stream, cache_ttl, cache_vary,
+            max_body_size=max_body_size)
 
         self._routes.append(route)
 
         return route
 
+    def add_static_response(self, pattern, response, method=None,
+                            methods=None):
+        """Answers requests matching `pattern` with a constant `response`.
+
+           The response is rendered once when the application starts and
+           written without calling into Python."""
+        route = self.add_route(pattern, None, method, methods)
+        route.response = response
+
+        return route
+
+    def add_static(self, prefix, directory):
+        """Serves files below `directory` under URLs starting with `prefix`."""
+        pattern = prefix.rstrip('/') + '/{path:path}'
+
+        return self.add_route(pattern, StaticHandler(directory), method='GET')
+
     def get_matcher(self):
         return self.matcher_factory(self._routes)
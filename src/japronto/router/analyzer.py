@@ -5,41 +5,38 @@ import types
 from japronto import helpers
 
 
-def is_simple(fun):
-    """A heuristic to find out if a function is simple enough."""
-    seen_load_fast_0 = False
-    seen_load_response = False
-    seen_call_fun = False
-
-    for instruction in dis.get_instructions(fun):
-        if instruction.opname == 'LOAD_FAST' and instruction.arg == 0:
-            seen_load_fast_0 = True
-            continue
-
-        if instruction.opname == 'LOAD_ATTR' \
-           and instruction.argval == 'Response':
-            seen_load_response = True
-            continue
-
-        if instruction.opname.startswith('CALL_FUNCTION'):
-            if seen_call_fun:
-                return False
-
-            seen_call_fun = True
-            continue
-
-    return seen_call_fun and seen_load_fast_0 and seen_load_response
+# YIELD_FROM up to 3.10, SEND from 3.11, GET_AWAITABLE is emitted for
+# await and async with, GET_ANEXT for async for
+SUSPEND_OPNAMES = {'GET_AWAITABLE', 'GET_ANEXT', 'YIELD_FROM', 'SEND'}
 
 
 def is_pointless_coroutine(fun):
     for instruction in dis.get_instructions(fun):
-        if instruction.opname in ('GET_AWAITABLE', 'YIELD_FROM'):
+        if instruction.opname in SUSPEND_OPNAMES:
             return False
 
     return True
 
 
 def coroutine_to_func(f):
+    if helpers.PY_310:
+        # the bytecode starts with GEN_START (RETURN_GENERATOR from 3.11)
+        # so clearing CO_COROUTINE is not enough anymore, drive the
+        # coroutine that never suspends to completion instead
+        @functools.wraps(f)
+        def g(*args, **kwargs):
+            coro = f(*args, **kwargs)
+            try:
+                coro.send(None)
+            except StopIteration as e:
+                return e.value
+            else:
+                coro.close()
+                raise RuntimeError(
+                    '{} suspended, it is not pointless'.format(f.__name__))
+
+        return g
+
     # Based on http://stackoverflow.com/questions/13503079/
     # how-to-create-a-copy-of-a-python-function
     oc = f.__code__
@@ -11,12 +11,16 @@ struct _Matcher {
 
   size_t buffer_len;
   char* buffer;
+
+  size_t tree_len;
+  char* tree;
 };
 
 
 typedef enum {
   SEGMENT_EXACT,
-  SEGMENT_PLACEHOLDER
+  SEGMENT_PLACEHOLDER,
+  SEGMENT_TAIL
 } SegmentType;
 
 
@@ -42,7 +46,20 @@ typedef struct {
 } Segment;
 
 
-static MatchDictEntry _match_dict_entries[10];
+typedef struct {
+  size_t min_entry;
+  size_t placeholder;
+  size_t tail;
+  size_t entries_cnt;
+  size_t children_cnt;
+  size_t label_length;
+  size_t data[];
+} MatcherNode;
+
+
+#define MAX_PLACEHOLDERS 10
+
+static MatchDictEntry _match_dict_entries[MAX_PLACEHOLDERS];
 
 static Request_CAPI* request_capi;
 static PyObject* compile_all;
@@ -58,6 +75,8 @@ Matcher_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 
   self->buffer = NULL;
   self->buffer_len = 0;
+  self->tree = NULL;
+  self->tree_len = 0;
 
   finally:
   return (PyObject*)self;
@@ -82,6 +101,13 @@ for(Segment* segment = (Segment*)entry->buffer; \
       ROUNDTO8(segment->type == SEGMENT_EXACT ? \
         segment->exact.data_length : segment->placeholder.name_length)))
 
+#define ENTRY(offset) ((MatcherEntry*)(self->buffer + (offset)))
+#define NODE(offset) ((MatcherNode*)(self->tree + (offset)))
+#define NODE_ENTRIES(node) ((node)->data)
+#define NODE_CHILDREN(node) ((node)->data + (node)->entries_cnt)
+#define NODE_LABEL(node) \
+  ((char*)(NODE_CHILDREN(node) + (node)->children_cnt))
+
 
 static void
 Matcher_dealloc(Matcher* self)
@@ -94,6 +120,9 @@ Matcher_dealloc(Matcher* self)
     free(self->buffer);
   }
 
+  if(self->tree)
+    free(self->tree);
+
   Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
@@ -111,8 +140,17 @@ Matcher_init(Matcher* self, PyObject *args, PyObject *kw)
   if(!(compiled = PyObject_CallFunctionObjArgs(compile_all, routes, NULL)))
     goto error;
 
+  PyObject* compiled_entries;
+  PyObject* compiled_nodes;
+  if(!PyArg_ParseTuple(compiled, "SS", &compiled_entries, &compiled_nodes))
+    goto error;
+
   char* compiled_buffer;
-  if(PyBytes_AsStringAndSize(compiled, &compiled_buffer, (Py_ssize_t*)&self->buffer_len) == -1)
+  if(PyBytes_AsStringAndSize(compiled_entries, &compiled_buffer, (Py_ssize_t*)&self->buffer_len) == -1)
+    goto error;
+
+  char* compiled_tree;
+  if(PyBytes_AsStringAndSize(compiled_nodes, &compiled_tree, (Py_ssize_t*)&self->tree_len) == -1)
     goto error;
 
   if(!(self->buffer = malloc(self->buffer_len)))
@@ -120,6 +158,11 @@ Matcher_init(Matcher* self, PyObject *args, PyObject *kw)
 
   memcpy(self->buffer, compiled_buffer, self->buffer_len);
 
+  if(!(self->tree = malloc(self->tree_len)))
+    goto error;
+
+  memcpy(self->tree, compiled_tree, self->tree_len);
+
   ENTRY_LOOP {
     Py_INCREF(entry->handler);
     Py_INCREF(entry->route);
@@ -134,6 +177,126 @@ Matcher_init(Matcher* self, PyObject *args, PyObject *kw)
   return result;
 }
 
+static inline bool
+MatcherEntry_accepts_method(MatcherEntry* entry,
+                            char* method_str, size_t method_len)
+{
+  if(!entry->methods_len)
+    return true;
+
+  char* method_found = memmem(
+    entry->buffer + entry->pattern_len, entry->methods_len,
+    method_str, method_len);
+  if(!method_found)
+    return false;
+
+  return *(method_found + method_len) == ' ';
+}
+
+
+typedef struct {
+  char* method_str;
+  size_t method_len;
+  size_t best;
+  MatchDictEntry values[MAX_PLACEHOLDERS];
+} MatchState;
+
+
+/* Walks the radix tree looking for the earliest registered route matching
+   the rest of the path. At every node at most one exact child, the
+   placeholder child and the tail child can match so the cost is
+   proportional to the path length. Subtrees that cannot contain a route registered before the best
+   match found so far are skipped. */
+static void
+Matcher_walk(Matcher* self, MatchState* state, MatcherNode* node,
+             char* rest, size_t rest_len, size_t depth)
+{
+  if(node->min_entry >= state->best)
+    return;
+
+  if(!rest_len) {
+    for(size_t* entry_offset = NODE_ENTRIES(node);
+        entry_offset < NODE_ENTRIES(node) + node->entries_cnt;
+        entry_offset++) {
+      if(*entry_offset >= state->best)
+        break;
+
+      if(!MatcherEntry_accepts_method(
+          ENTRY(*entry_offset), state->method_str, state->method_len))
+        continue;
+
+      state->best = *entry_offset;
+      memcpy(_match_dict_entries, state->values,
+             depth * sizeof(MatchDictEntry));
+      break;
+    }
+
+    return;
+  }
+
+  MatcherNode* child = NULL;
+  size_t low = 0;
+  size_t high = node->children_cnt;
+  while(low < high) {
+    size_t middle = (low + high) / 2;
+    MatcherNode* candidate = NODE(NODE_CHILDREN(node)[middle]);
+    unsigned char first = *(unsigned char*)NODE_LABEL(candidate);
+
+    if(first < *(unsigned char*)rest) {
+      low = middle + 1;
+    } else if(first > *(unsigned char*)rest) {
+      high = middle;
+    } else {
+      child = candidate;
+      break;
+    }
+  }
+
+  if(child && (rest_len < child->label_length ||
+     memcmp(rest, NODE_LABEL(child), child->label_length) != 0))
+    child = NULL;
+
+  MatcherNode* placeholder = NULL;
+  size_t value_length = 0;
+  if(node->placeholder) {
+    char* slash = memchr(rest, '/', rest_len);
+    value_length = slash ? (size_t)(slash - rest) : rest_len;
+    if(value_length)
+      placeholder = NODE(node->placeholder);
+  }
+
+  bool placeholder_first =
+    placeholder && child && placeholder->min_entry < child->min_entry;
+
+  if(child && !placeholder_first)
+    Matcher_walk(self, state, child, rest + child->label_length,
+                 rest_len - child->label_length, depth);
+
+  if(placeholder) {
+    assert(depth < MAX_PLACEHOLDERS);
+
+    state->values[depth].value = rest;
+    state->values[depth].value_length = value_length;
+
+    Matcher_walk(self, state, placeholder, rest + value_length,
+                 rest_len - value_length, depth + 1);
+  }
+
+  if(child && placeholder_first)
+    Matcher_walk(self, state, child, rest + child->label_length,
+                 rest_len - child->label_length, depth);
+
+  if(node->tail) {
+    assert(depth < MAX_PLACEHOLDERS);
+
+    state->values[depth].value = rest;
+    state->values[depth].value_length = rest_len;
+
+    Matcher_walk(self, state, NODE(node->tail), rest + rest_len, 0, depth + 1);
+  }
+}
+
+
 // borrows route and handler in matcher entry
 MatcherEntry*
 Matcher_match_request(Matcher* self, PyObject* request,
@@ -171,82 +334,37 @@ Matcher_match_request(Matcher* self, PyObject* request,
       REQUEST(request), &path_len);
   }
 
-  ENTRY_LOOP {
-    char* rest = path_str;
-    size_t rest_len = path_len;
-
-    MatchDictEntry* current_mde = _match_dict_entries;
-    size_t value_length = 1;
-
-    SEGMENT_LOOP {
-      if(segment->type == SEGMENT_EXACT) {
-        if(rest_len < segment->exact.data_length)
-          break;
-
-        if(memcmp(rest, segment->exact.data, segment->exact.data_length) != 0)
-          break;
-
-        rest += segment->exact.data_length;
-        rest_len -= segment->exact.data_length;
-      } else if(segment->type == SEGMENT_PLACEHOLDER) {
-        assert(((size_t)(current_mde - _match_dict_entries)) < sizeof(_match_dict_entries) / sizeof(MatchDictEntry));
-
-        char* slash = memchr(rest, '/', rest_len);
-        current_mde->value = rest;
-        if(slash) {
-          value_length = current_mde->value_length = slash - rest;
-          rest_len -= current_mde->value_length;
-          rest = slash;
-        } else {
-          value_length = current_mde->value_length = rest_len;
-          rest_len = 0;
-        }
-
-        if(!value_length)
-          break;
-
-        current_mde->key = segment->placeholder.name;
-        current_mde->key_length = segment->placeholder.name_length;
-
-        current_mde++;
-      } else {
-        assert(0);
-      }
-    }
-
-    if(rest_len)
-      continue;
+  MatchState state;
+  state.method_str = method_str;
+  state.method_len = method_len;
+  state.best = self->buffer_len;
 
-    if(!value_length)
-      continue;
+  Matcher_walk(self, &state, NODE(0), path_str, path_len, 0);
 
-    if((size_t)(current_mde - _match_dict_entries) != entry->placeholder_cnt)
-      continue;
+  if(state.best == self->buffer_len) {
+    if(match_dict_length)
+      *match_dict_length = 0;
 
-    if(!entry->methods_len)
-      goto loop_finally;
+    goto finally;
+  }
 
-    char* method_found = memmem(
-      entry->buffer + entry->pattern_len, entry->methods_len,
-      method_str, (size_t)method_len);
-    if(!method_found)
-      continue;
+  MatcherEntry* entry = result = ENTRY(state.best);
 
-    if(*(method_found + (size_t)method_len) != ' ')
+  MatchDictEntry* current_mde = _match_dict_entries;
+  SEGMENT_LOOP {
+    if(segment->type == SEGMENT_EXACT)
       continue;
 
-    loop_finally:
-    result = entry;
+    current_mde->key = segment->placeholder.name;
+    current_mde->key_length = segment->placeholder.name_length;
 
-    if(match_dict_entries)
-      *match_dict_entries = _match_dict_entries;
-    if(match_dict_length)
-      *match_dict_length = current_mde - _match_dict_entries;
-    goto finally;
+    current_mde++;
   }
 
+  if(match_dict_entries)
+    *match_dict_entries = _match_dict_entries;
   if(match_dict_length)
-    *match_dict_length = 0;
+    *match_dict_length = current_mde - _match_dict_entries;
 
   goto finally;
 
@@ -8,11 +8,19 @@
 typedef struct {
   PyObject* route;
   PyObject* handler;
+  // list of a constant response rendered for HTTP/1.0 and HTTP/1.1 with
+  // and without keep-alive, borrowed from route
+  PyObject* rendered;
   bool coro_func;
-  bool simple;
+  // the handler runs once headers arrive and reads request.stream()
+  bool stream;
+  // responses are looked up in and stored to the response cache
+  bool cache;
   size_t pattern_len;
   size_t methods_len;
   size_t placeholder_cnt;
+  // SIZE_MAX when the route uses the app's limit
+  size_t max_body_size;
   char buffer[];
 } MatcherEntry;
 
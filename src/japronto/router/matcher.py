@@ -7,26 +7,34 @@ class Matcher:
             match_dict = {}
             rest = request.path
 
-            value = True
+            matched = True
             for typ, data in route.segments:
                 if typ == 'exact':
                     if not rest.startswith(data):
+                        matched = False
                         break
 
                     rest = rest[len(data):]
                 elif typ == 'placeholder':
                     value, slash, rest = rest.partition('/')
                     if not value:
+                        matched = False
                         break
                     match_dict[data] = value
                     rest = slash + rest
+                elif typ == 'tail':
+                    if not rest:
+                        matched = False
+                        break
+                    match_dict[data] = rest
+                    rest = ''
                 else:
                     assert 0, 'Unknown type'
 
             if rest:
                 continue
 
-            if not value:
+            if not matched:
                 continue
 
             if len(match_dict) != route.placeholder_cnt:
@@ -7,15 +7,28 @@ class RouteNotFoundException(Exception):
     pass
 
 class Route:
-    __slots__ = ('pattern', 'handler', 'methods', 'segments', 'placeholder_cnt')
-
-    def __init__(self, pattern, handler, methods):
+    __slots__ = (
+        'pattern', 'handler', 'methods', 'segments', 'placeholder_cnt',
+        'stream', 'cache_ttl', 'cache_vary', 'response', 'rendered',
+        'max_body_size')
+
+    def __init__(self, pattern, handler, methods, stream=False,
+                 cache_ttl=None, cache_vary=(), response=None,
+                 max_body_size=None):
         self.pattern = pattern
         self.handler = handler
         self.methods = methods
+        self.stream = stream
+        # None uses the app's limit
+        self.max_body_size = max_body_size
+        self.response = response
+        self.rendered = None
+        self.cache_ttl = cache_ttl
+        # request headers are title cased
+        self.cache_vary = tuple(name.title() for name in cache_vary)
         self.segments = parse(pattern)
         self.placeholder_cnt = \
-            sum(1 for s in self.segments if s[0] == 'placeholder')
+            sum(1 for s in self.segments if s[0] != 'exact')
 
     def __repr__(self):
         return '<Route {}, {} {}>'.format(
@@ -28,6 +41,9 @@ class Route:
     def __eq__(self, other):
         return self.pattern == other.pattern and self.methods == other.methods
 
+    def __hash__(self):
+        return hash((self.pattern, frozenset(self.methods)))
+
 
 def parse(pattern):
     result = []
@@ -56,10 +72,15 @@ def parse(pattern):
         if rest and rest[0] != '/':
             raise ValueError(
                 '"}" must be followed by "/" or appear at the end')
-        name_val = ('placeholder', name)
-        if name_val in result:
+        # {name:path} matches the rest of the path including slashes
+        typ = 'placeholder'
+        if name.endswith(':path'):
+            if rest:
+                raise ValueError('":path" must appear at the end')
+            typ, name = 'tail', name[:-len(':path')]
+        if name in (data for t, data in result if t != 'exact'):
             raise ValueError('Duplicate name "{}" in pattern'.format(name))
-        result.append(name_val)
+        result.append((typ, name))
 
     return result
 
@@ -67,26 +88,33 @@ def parse(pattern):
 class SegmentType(IntEnum):
     EXACT = 0
     PLACEHOLDER = 1
+    TAIL = 2
 
 
 """
 typedef struct {
   PyObject* route;
   PyObject* handler;
+  PyObject* rendered;
   bool coro_func;
-  bool simple;
+  bool stream;
+  bool cache;
   size_t pattern_len;
   size_t methods_len;
   size_t placeholder_cnt;
+  size_t max_body_size;
   char buffer[];
 } MatcherEntry;
 """
-MatcherEntry = Struct('PP??NNN')
+MatcherEntry = Struct('PPP???NNNN')
+
+MAX_BODY_SIZE_UNSET = MatcherEntry.unpack(b'\xff' * MatcherEntry.size)[-1]
 
 """
 typedef enum {
   SEGMENT_EXACT,
-  SEGMENT_PLACEHOLDER
+  SEGMENT_PLACEHOLDER,
+  SEGMENT_TAIL
 } SegmentType;
 
 
@@ -132,6 +160,15 @@ def padto8(data):
 retain_handlers = set()
 
 
+def render(response):
+    """Renders a constant response for every protocol version and
+       keep-alive, indexed by minor version * 2 + (not keep-alive)."""
+    # a list so the protocol can swap in copies with a fresh Date header
+    return [
+        response.render(minor_version, keep_alive)
+        for minor_version in (0, 1) for keep_alive in (True, False)]
+
+
 def compile(route):
     pattern_buf = b''
     for segment in route.segments:
@@ -154,13 +191,165 @@ def compile(route):
         # destruction
         retain_handlers.add(handler)
 
+    # matchers only borrow the list, one compiled earlier still uses it
+    if route.response is not None and route.rendered is None:
+        route.rendered = render(route.response)
+
     return MatcherEntry.pack(
-        id(route), id(handler),
+        id(route), id(handler), id(route.rendered) if route.rendered else 0,
         asyncio.iscoroutinefunction(handler),
-        analyzer.is_simple(handler),
-        len(pattern_buf), methods_len, route.placeholder_cnt) \
+        route.stream, bool(route.cache_ttl),
+        len(pattern_buf), methods_len, route.placeholder_cnt,
+        MAX_BODY_SIZE_UNSET if route.max_body_size is None
+        else route.max_body_size) \
         + pattern_buf + methods_buf
 
 
+"""
+typedef struct {
+  size_t min_entry;
+  size_t placeholder;
+  size_t tail;
+  size_t entries_cnt;
+  size_t children_cnt;
+  size_t label_length;
+  size_t data[];
+} MatcherNode;
+"""
+MatcherNode = Struct('NNNNNN')
+
+
+PLACEHOLDER = object()
+TAIL = object()
+
+
+class Node:
+    __slots__ = (
+        'label', 'children', 'placeholder', 'tail', 'entries', 'min_index')
+
+    def __init__(self, label=b''):
+        self.label = label
+        self.children = {}
+        self.placeholder = None
+        self.tail = None
+        self.entries = []
+        self.min_index = None
+
+
+def tokenize(route):
+    """Turns route segments into a sequence of bytes, PLACEHOLDER and TAIL
+       marks."""
+    for typ, data in route.segments:
+        if typ == 'exact':
+            yield from data.encode('utf-8')
+        elif typ == 'tail':
+            yield TAIL
+        else:
+            yield PLACEHOLDER
+
+
+def build_tree(routes):
+    """Builds an uncompressed prefix tree where every exact edge is one byte.
+
+       Terminal nodes keep indexes of routes ending there in
+       registration order and every node remembers the smallest route index
+       reachable from it so the C matcher can honour registration
+       order without scanning every route."""
+    root = Node()
+
+    for index, route in enumerate(routes):
+        node = root
+        for token in tokenize(route):
+            node.min_index = min(node.min_index, index) \
+                if node.min_index is not None else index
+            if token is PLACEHOLDER:
+                if not node.placeholder:
+                    node.placeholder = Node()
+                node = node.placeholder
+            elif token is TAIL:
+                if not node.tail:
+                    node.tail = Node()
+                node = node.tail
+            else:
+                node = node.children.setdefault(token, Node(bytes([token])))
+        node.min_index = min(node.min_index, index) \
+            if node.min_index is not None else index
+        node.entries.append(index)
+
+    return root
+
+
+def compress_tree(node):
+    """Merges chains of single child nodes into radix tree edges."""
+    for key, child in list(node.children.items()):
+        while len(child.children) == 1 and not child.placeholder \
+                and not child.tail and not child.entries:
+            grandchild, = child.children.values()
+            grandchild.label = child.label + grandchild.label
+            child = grandchild
+        node.children[key] = compress_tree(child)
+
+    if node.placeholder:
+        node.placeholder = compress_tree(node.placeholder)
+
+    if node.tail:
+        node.tail = compress_tree(node.tail)
+
+    return node
+
+
+def node_size(node):
+    return MatcherNode.size \
+        + 8 * (len(node.entries) + len(node.children)) \
+        + roundto8(len(node.label))
+
+
+def compile_tree(routes, entry_offsets, entries_len):
+    root = compress_tree(build_tree(routes))
+
+    nodes = []
+    offsets = {}
+    offset = 0
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        offsets[id(node)] = offset
+        offset += node_size(node)
+        nodes.append(node)
+        if node.placeholder:
+            pending.append(node.placeholder)
+        if node.tail:
+            pending.append(node.tail)
+        pending.extend(node.children.values())
+
+    # nodes that lead to no route point past the last entry
+    entry_offsets = entry_offsets + [entries_len]
+
+    tree_buf = b''
+    for node in nodes:
+        children = [node.children[k] for k in sorted(node.children)]
+        tree_buf += MatcherNode.pack(
+            entry_offsets[node.min_index]
+            if node.min_index is not None else entries_len,
+            offsets[id(node.placeholder)] if node.placeholder else 0,
+            offsets[id(node.tail)] if node.tail else 0,
+            len(node.entries), len(children), len(node.label))
+        tree_buf += b''.join(
+            Struct('N').pack(entry_offsets[i]) for i in node.entries)
+        tree_buf += b''.join(
+            Struct('N').pack(offsets[id(c)]) for c in children)
+        tree_buf += padto8(node.label)
+
+    return tree_buf
+
+
 def compile_all(routes):
-    return b''.join(compile(r) for r in routes)
+    entries = [compile(r) for r in routes]
+
+    entry_offsets = []
+    offset = 0
+    for entry in entries:
+        entry_offsets.append(offset)
+        offset += len(entry)
+
+    return b''.join(entries), compile_tree(routes, entry_offsets, offset)
@@ -0,0 +1,117 @@
+import mimetypes
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+
+from japronto.response.stream import FileBody
+from .route import RouteNotFoundException
+
+
+def parse_range(value, size):
+    """Parses a single `bytes=` range into offset and count.
+
+       Returns None for ranges that should be ignored, like multiple
+       ranges, and raises ValueError for ranges outside of the file."""
+    unit, _, ranges = value.partition('=')
+    if unit.strip() != 'bytes' or ',' in ranges:
+        return None
+
+    first, dash, last = ranges.strip().partition('-')
+    if not dash:
+        return None
+
+    try:
+        if not first:
+            # the last bytes of the file
+            first, last = size - min(int(last), size), size - 1
+        else:
+            first = int(first)
+            last = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+
+    if first >= size or last < first:
+        raise ValueError('Unsatisfiable range')
+
+    return first, last - first + 1
+
+
+def not_modified(headers, etag, mtime):
+    if 'If-None-Match' in headers:
+        tags = [t.strip() for t in headers['If-None-Match'].split(',')]
+        return etag in tags or '*' in tags
+
+    if 'If-Modified-Since' in headers:
+        try:
+            since = parsedate_to_datetime(headers['If-Modified-Since'])
+        except (TypeError, ValueError):
+            return False
+
+        return int(mtime) <= since.timestamp()
+
+    return False
+
+
+class StaticHandler:
+    """Serves files from a directory, registered by `Router.add_static`.
+
+       Responses carry ETag and Last-Modified so revalidation with
+       If-None-Match and If-Modified-Since is answered with 304 and a single
+       Range is answered with 206, neither of which reads the file. The body
+       is sent with sendfile."""
+    __slots__ = ('directory',)
+
+    def __init__(self, directory):
+        self.directory = os.path.realpath(directory)
+
+    def resolve(self, path):
+        path = os.path.realpath(os.path.join(self.directory, path))
+        if not path.startswith(self.directory + os.sep):
+            return None
+
+        return path
+
+    def __call__(self, request):
+        path = self.resolve(request.match_dict['path'])
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            st = None
+        if not st or not stat.S_ISREG(st.st_mode):
+            raise RouteNotFoundException()
+
+        size = st.st_size
+        etag = '"{:x}-{:x}"'.format(st.st_mtime_ns, size)
+        headers = {
+            'ETag': etag,
+            'Last-Modified': formatdate(st.st_mtime, usegmt=True),
+            'Accept-Ranges': 'bytes'}
+
+        if not_modified(request.headers, etag, st.st_mtime):
+            return request.Response(code=304, headers=headers)
+
+        code = 200
+        offset, count = 0, size
+        if 'Range' in request.headers \
+           and request.headers.get('If-Range', etag) == etag:
+            try:
+                byte_range = parse_range(request.headers['Range'], size)
+            except ValueError:
+                headers['Content-Range'] = 'bytes */{}'.format(size)
+                return request.Response(code=416, headers=headers)
+
+            if byte_range:
+                code = 206
+                offset, count = byte_range
+                headers['Content-Range'] = 'bytes {}-{}/{}'.format(
+                    offset, offset + count - 1, size)
+
+        mime_type, encoding = mimetypes.guess_type(path)
+        if encoding:
+            # serve precompressed files as they are
+            mime_type = 'application/octet-stream'
+
+        return request.Response(
+            code=code, mime_type=mime_type or 'application/octet-stream',
+            body=FileBody(path, offset, count) if count else None,
+            headers=headers)
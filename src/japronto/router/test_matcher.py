@@ -110,3 +110,112 @@ def test_matcher_not_found(make_matcher, req):
     del matcher
 
     assert cnt == TracingRoute.cnt
+
+
+def parametrize_make_overlapping_matcher():
+    def make(cls):
+        routes = [route_from_str(r) for r in [
+            '/users/me GET',
+            '/users/{id} GET,PATCH',
+            '/users/{id}/posts',
+            '/users/me/posts POST',
+            '/{section}/{id}/posts',
+            '/user-{name}',
+            '/users/{id}/posts/{post}',
+            '/{section}',
+            '/{id}/about'
+        ]]
+
+        return cls(routes)
+
+    make_matcher = partial(make, Matcher)
+    make_cmatcher = partial(make, CMatcher)
+
+    return pytest.mark.parametrize(
+        'make_matcher', [make_matcher, make_cmatcher], ids=['py', 'c'])
+
+
+@parametrize_request_route_and_dict([
+    ('GET /users/me', '/users/me GET', {}),
+    ('PATCH /users/me', '/users/{id} GET,PATCH', {'id': 'me'}),
+    ('POST /users/me/posts', '/users/{id}/posts', {'id': 'me'}),
+    ('GET /pages/1/posts', '/{section}/{id}/posts',
+     {'section': 'pages', 'id': '1'}),
+    ('GET /user-jane', '/user-{name}', {'name': 'jane'}),
+    ('GET /users/1/posts/2', '/users/{id}/posts/{post}',
+     {'id': '1', 'post': '2'}),
+    ('DELETE /users', '/{section}', {'section': 'users'}),
+    ('GET /jane/about', '/{id}/about', {'id': 'jane'})
+])
+@parametrize_make_overlapping_matcher()
+def test_matcher_registration_order(make_matcher, req, route, match_dict):
+    matcher = make_matcher()
+    assert matcher.match_request(req) == (route, match_dict)
+
+
+@parametrize_request([
+    'DELETE /users/me',
+    'GET /users/1/posts/2/3',
+    'GET /jane/about/'
+])
+@parametrize_make_overlapping_matcher()
+def test_matcher_registration_order_not_found(make_matcher, req):
+    matcher = make_matcher()
+    assert matcher.match_request(req) is None
+
+
+def test_matcher_many_routes():
+    routes = [route_from_str('/r{}/{{id}}'.format(i)) for i in range(1000)]
+    routes.append(route_from_str('/r1/{id}/extra'))
+    matcher = CMatcher(routes)
+
+    assert matcher.match_request(FakeRequest.from_str('GET /r999/x')) \
+        == (routes[999], {'id': 'x'})
+    assert matcher.match_request(FakeRequest.from_str('GET /r1/x/extra')) \
+        == (routes[1000], {'id': 'x'})
+    assert matcher.match_request(FakeRequest.from_str('GET /r1000/x')) is None
+
+
+def parametrize_make_tail_matcher():
+    def make(cls):
+        routes = [route_from_str(r) for r in [
+            '/static/index.html',
+            '/static/{path:path} GET',
+            '/{section}/{rest:path}',
+            '/static/{name}/about'
+        ]]
+
+        return cls(routes)
+
+    make_matcher = partial(make, Matcher)
+    make_cmatcher = partial(make, CMatcher)
+
+    return pytest.mark.parametrize(
+        'make_matcher', [make_matcher, make_cmatcher], ids=['py', 'c'])
+
+
+@parametrize_request_route_and_dict([
+    ('GET /static/index.html', '/static/index.html', {}),
+    ('GET /static/css/app.css', '/static/{path:path} GET',
+     {'path': 'css/app.css'}),
+    ('GET /static/a/about', '/static/{path:path} GET', {'path': 'a/about'}),
+    ('POST /static/a/about', '/{section}/{rest:path}',
+     {'section': 'static', 'rest': 'a/about'}),
+    ('GET /users/1/posts/', '/{section}/{rest:path}',
+     {'section': 'users', 'rest': '1/posts/'})
+])
+@parametrize_make_tail_matcher()
+def test_matcher_tail(make_matcher, req, route, match_dict):
+    matcher = make_matcher()
+    assert matcher.match_request(req) == (route, match_dict)
+
+
+@parametrize_request([
+    'GET /static/',
+    'GET /users/',
+    'GET /users'
+])
+@parametrize_make_tail_matcher()
+def test_matcher_tail_not_found(make_matcher, req):
+    matcher = make_matcher()
+    assert matcher.match_request(req) is None
@@ -3,8 +3,9 @@ from collections import namedtuple
 
 import pytest
 
+from japronto.response.cresponse import Response
 from .route import parse, MatcherEntry, Segment, SegmentType, Route, \
-    compile, roundto8
+    compile, roundto8, MAX_BODY_SIZE_UNSET
 
 
 @pytest.mark.parametrize('pattern,result', [
@@ -14,7 +15,9 @@ from .route import parse, MatcherEntry, Segment, SegmentType, Route, \
     ('a/{a}', [('exact', 'a/'), ('placeholder', 'a')]),
     ('{a}/a', [('placeholder', 'a'), ('exact', '/a')]),
     ('{a}/{{a}}', [('placeholder', 'a'), ('exact', '/{a}')]),
-    ('{a}/{b}', [('placeholder', 'a'), ('exact', '/'), ('placeholder', 'b')])
+    ('{a}/{b}', [('placeholder', 'a'), ('exact', '/'), ('placeholder', 'b')]),
+    ('/static/{a:path}', [('exact', '/static/'), ('tail', 'a')]),
+    ('{a}/{b:path}', [('placeholder', 'a'), ('exact', '/'), ('tail', 'b')])
 ])
 def test_parse(pattern, result):
     assert parse(pattern) == result
@@ -24,7 +27,9 @@ def test_parse(pattern, result):
     ('{a', 'Unbalanced'),
     ('{a}/{b', 'Unbalanced'),
     ('{a}a', 'followed by'),
-    ('{a}/{a}', 'Duplicate')
+    ('{a}/{a}', 'Duplicate'),
+    ('{a}/{a:path}', 'Duplicate'),
+    ('{a:path}/a', 'at the end')
 ])
 def test_parse_error(pattern, error):
     with pytest.raises(ValueError) as info:
@@ -34,12 +39,13 @@ def test_parse_error(pattern, error):
 
 DecodedRoute = namedtuple(
     'DecodedRoute',
-    'route_id,handler_id,coro_func,simple,placeholder_cnt,segments,methods')
+    'route_id,handler_id,rendered_id,coro_func,stream,cache,'
+    'placeholder_cnt,max_body_size,segments,methods')
 
 
 def decompile(buffer):
-    route_id, handler_id, coro_func, simple, \
-        pattern_len, methods_len, placeholder_cnt \
+    route_id, handler_id, rendered_id, coro_func, stream, cache, \
+        pattern_len, methods_len, placeholder_cnt, max_body_size \
         = MatcherEntry.unpack_from(buffer, 0)
     offset = MatcherEntry.size
     pattern_offset_end = offset + roundto8(pattern_len)
@@ -58,8 +64,8 @@ def decompile(buffer):
         .split()
 
     return DecodedRoute(
-        route_id, handler_id, coro_func, simple,
-        placeholder_cnt, segments, methods)
+        route_id, handler_id, rendered_id, coro_func, stream, cache,
+        placeholder_cnt, max_body_size, segments, methods)
 
 
 def handler():
@@ -76,15 +82,62 @@ async def coro():
     Route('/', coro, ['GET']),
     Route('/test/{hi}', handler, []),
     Route('/test/{hi}', coro, ['POST']),
-    Route('/tést', coro, ['POST'])
+    Route('/tést', coro, ['POST']),
+    Route('/upload', coro, ['PUT'], stream=True),
+    Route('/static/{path:path}', handler, ['GET']),
+    Route('/cached/{id}', handler, ['GET'], cache_ttl=5),
+    Route('/upload', coro, ['POST'], max_body_size=1024)
 ], ids=Route.describe)
 def test_compile(route):
     decompiled = decompile(compile(route))
 
     assert decompiled.route_id == id(route)
     assert decompiled.handler_id == id(route.handler)
+    assert decompiled.rendered_id == 0
     assert decompiled.coro_func == asyncio.iscoroutinefunction(route.handler)
-    assert not decompiled.simple
+    assert decompiled.stream == route.stream
+    assert decompiled.cache == bool(route.cache_ttl)
     assert decompiled.placeholder_cnt == route.placeholder_cnt
+    assert decompiled.max_body_size == (
+        MAX_BODY_SIZE_UNSET if route.max_body_size is None
+        else route.max_body_size)
     assert decompiled.segments == route.segments
     assert decompiled.methods == route.methods
+
+
+def test_compile_response():
+    route = Route('/health', None, ['GET'], response=Response(text='ok'))
+    decompiled = decompile(compile(route))
+
+    assert decompiled.rendered_id == id(route.rendered)
+
+    http10_keep_alive, http10, http11, http11_close = route.rendered
+    assert http10_keep_alive.startswith(b'HTTP/1.0 200 OK\r\n')
+    assert b'Connection: keep-alive\r\n' in http10_keep_alive
+    assert http10.startswith(b'HTTP/1.0 200 OK\r\n')
+    assert b'Connection' not in http10
+    assert http11.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert b'Connection' not in http11
+    assert b'Connection: close\r\n' in http11_close
+    for rendered in route.rendered:
+        assert rendered.endswith(b'\r\n\r\nok')
+
+
+def test_compile_response_again():
+    # a matcher compiled earlier keeps using the list it borrowed
+    route = Route('/health', None, ['GET'], response=Response(text='ok'))
+    rendered = decompile(compile(route)).rendered_id
+
+    assert decompile(compile(route)).rendered_id == rendered
+    assert id(route.rendered) == rendered
+
+
+async def chunks():
+    yield b'chunk'
+
+
+def test_compile_stream_response():
+    route = Route('/', None, ['GET'], response=Response(body=chunks()))
+
+    with pytest.raises(ValueError):
+        compile(route)
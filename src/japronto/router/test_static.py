@@ -0,0 +1,57 @@
+import pytest
+
+from .static import parse_range, not_modified, StaticHandler
+
+
+@pytest.mark.parametrize('value,result', [
+    ('bytes=0-9', (0, 10)),
+    ('bytes=10-', (10, 90)),
+    ('bytes=-10', (90, 10)),
+    ('bytes=-200', (0, 100)),
+    ('bytes=90-200', (90, 10)),
+    ('bytes=0-0', (0, 1)),
+    ('bytes=0-1,5-6', None),
+    ('items=0-9', None),
+    ('bytes=a-b', None),
+    ('bytes=5', None)
+])
+def test_parse_range(value, result):
+    assert parse_range(value, 100) == result
+
+
+@pytest.mark.parametrize('value', ['bytes=100-', 'bytes=9-5', 'bytes=-0'])
+def test_parse_range_unsatisfiable(value):
+    with pytest.raises(ValueError):
+        parse_range(value, 100)
+
+
+@pytest.mark.parametrize('headers,result', [
+    ({}, False),
+    ({'If-None-Match': '"abc"'}, True),
+    ({'If-None-Match': '"x", "abc"'}, True),
+    ({'If-None-Match': '*'}, True),
+    ({'If-None-Match': '"x"'}, False),
+    ({'If-None-Match': '"x"',
+      'If-Modified-Since': 'Sat, 13 Feb 2010 23:31:30 GMT'}, False),
+    ({'If-Modified-Since': 'Sat, 13 Feb 2010 23:31:30 GMT'}, True),
+    ({'If-Modified-Since': 'Sat, 13 Feb 2010 23:31:29 GMT'}, False),
+    ({'If-Modified-Since': 'garbage'}, False)
+])
+def test_not_modified(headers, result):
+    assert not_modified(headers, '"abc"', 1266103890.5) == result
+
+
+@pytest.mark.parametrize('path,result', [
+    ('a.txt', 'a.txt'),
+    ('css/a.css', 'css/a.css'),
+    ('css/../a.txt', 'a.txt'),
+    ('../a.txt', None),
+    ('css/../../a.txt', None),
+    ('/etc/passwd', None)
+])
+def test_resolve(tmpdir, path, result):
+    handler = StaticHandler(str(tmpdir))
+
+    if result:
+        result = str(tmpdir.realpath().join(result))
+    assert handler.resolve(path) == result